@@ -185,6 +185,12 @@ class WingmanProTtsProvider(Enum):
     OPENAI = "openai"
 
 
+class RequestPolicy(Enum):
+    QUEUE = "queue"
+    COALESCE = "coalesce"
+    REPLACE = "replace"
+
+
 class SkillCategory(Enum):
     GENERAL = "general"
     STAR_CITIZEN = "star_citizen"
@@ -300,6 +306,10 @@ class SkillCategoryModel(BaseEnumModel):
     category: SkillCategory
 
 
+class RequestPolicyModel(BaseEnumModel):
+    request_policy: RequestPolicy
+
+
 # Add all additional Pydantic models for enums as needed
 
 
@@ -329,6 +339,7 @@ ENUM_TYPES = {
     "WingmanProTtsProvider": WingmanProTtsProviderModel,
     "SkillCategory": SkillCategoryModel,
     "PerplexityModel": PerplexityModelEnumModel,
+    "RequestPolicy": RequestPolicyModel,
     # Add new enums here as key-value pairs
 }
 
@@ -22,6 +22,7 @@ from api.enums import (
     WingmanProSttProvider,
     WingmanProTtsProvider,
     PerplexityModel,
+    RequestPolicy,
 )
 
 
@@ -108,6 +109,12 @@ class AudioDeviceSettings(BaseModel):
 class AudioSettings(BaseModel):
     input: Optional[int | AudioDeviceSettings] = None
     output: Optional[int | AudioDeviceSettings] = None
+    output_blocksize: Optional[int] = None
+    """Frames per block of the output stream. Leave empty to let the audio driver choose. Smaller values reduce latency but might cause crackling."""
+    output_latency: Optional[float | str] = None
+    """Latency of the output stream in seconds or 'low'/'high'. Defaults to 'low'."""
+    input_pre_roll: Optional[float] = None
+    """Seconds of audio before the push-to-talk key press that are added to the recording. Defaults to 0.3."""
 
 
 class WhispercppSettings(BaseModel):
@@ -255,6 +262,8 @@ class EdgeTtsConfig(BaseModel):
 
     Voice samples: https://speech.microsoft.com/portal/voicegallery
     """
+    output_streaming: Optional[bool] = False
+    """Play the speech while it's still being generated instead of waiting for the whole response."""
 
 
 class XVASynthVoiceConfig(BaseModel):
@@ -397,8 +406,20 @@ class FeaturesConfig(BaseModel):
     stt_provider: SttProvider
     conversation_provider: ConversationProvider
     remember_messages: Optional[int] = None
+    max_context_tokens: Optional[int] = None
+    """The estimated token budget of each LLM call, including the system prompt, the tools and the conversation history. The oldest messages are dropped to meet it. Unlimited if not set."""
     image_generation_provider: ImageGenerationProvider
     use_generic_instant_responses: bool
+    stream_responses: Optional[bool] = False
+    """Stream the LLM response and start speaking each sentence as soon as it is complete. Only supported by OpenAI-compatible conversation providers."""
+    use_tts_cache: Optional[bool] = True
+    """Keep synthesized reusable phrases (command responses and fillers, never LLM responses) on disk and replay them without calling the TTS provider again."""
+    concurrent_tool_calls: Optional[bool] = False
+    """Run independent tool calls of the same LLM response in parallel. Commands and tools that skills declare as exclusive still run alone, in order."""
+    tool_call_timeout: Optional[float] = None
+    """The default time in seconds a tool call may take before it's cancelled. Skills can set their own timeout per tool. Unlimited if not set."""
+    request_policy: Optional[RequestPolicy] = RequestPolicy.REPLACE
+    """How new inputs are handled while the Wingman is still busy: 'queue' processes them one after another, 'coalesce' merges the waiting ones into one request, 'replace' cancels the current request in favor of the latest input."""
 
 
 class AudioFile(BaseModel):
@@ -678,3 +699,5 @@ class SettingsConfig(BaseModel):
     wingman_pro: WingmanProSettings
     xvasynth: XVASynthSettings
     debug_mode: bool = False
+    debug_save_recordings: Optional[bool] = False
+    """Writes every recording to the audio_output directory. Recordings are only kept in memory otherwise."""
@@ -243,6 +243,11 @@ async def ping():
 
 
 async def async_main(host: str, port: int, sidecar: bool):
+    # background jobs (also started while loading the config) run on this loop
+    event_loop = asyncio.get_running_loop()
+    core.runtime.start(event_loop)
+    core.audio_player.set_event_loop(event_loop)
+
     await core.config_service.migrate_configs(system_manager)
     await core.config_service.load_config()
     saved_secrets: list[str] = []
@@ -263,8 +268,6 @@ async def async_main(host: str, port: int, sidecar: bool):
             core.startup_errors.append(error)
 
     await core.startup()
-    event_loop = asyncio.get_running_loop()
-    core.audio_player.set_event_loop(event_loop)
     asyncio.create_task(core.process_events())
     core.is_started = True
 
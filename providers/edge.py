@@ -1,12 +1,16 @@
-from os import path
+import asyncio
+import io
 from edge_tts import Communicate
+import numpy as np
+import soundfile as sf
 from api.interface import EdgeTtsConfig, SoundConfig
 from services.audio_player import AudioPlayer
-from services.file import get_writable_dir
+from services.audio_stream_decoder import AudioStreamDecoder
 from services.printr import Printr
+from services.ring_buffer import PcmRingBuffer
 
-RECORDING_PATH = "audio_output"
-OUTPUT_FILE: str = "edge_tts.mp3"
+SAMPLE_RATE = 24000
+"""Edge TTS always sends 24 kHz mono mp3."""
 
 printr = Printr()
 
@@ -22,29 +26,57 @@ class Edge:
         sound_config: SoundConfig,
         audio_player: AudioPlayer,
         wingman_name: str,
-    ):
-        communicate, output_file = await self.__generate_speech(
-            text=text, voice=config.voice
-        )
-        audio, sample_rate = audio_player.get_audio_from_file(output_file)
-
-        await audio_player.play_with_effects(
-            input_data=(audio, sample_rate),
-            config=sound_config,
-            wingman_name=wingman_name,
-        )
-
-    async def __generate_speech(
-        self,
-        text: str,
-        voice: str = "en-US-GuyNeural",
-        rate: str = "+0%",
     ):
         if not text:
             return
 
-        communicate = Communicate(text=text, voice=voice, rate=rate)
-        file_path = path.join(get_writable_dir(RECORDING_PATH), OUTPUT_FILE)
-        await communicate.save(file_path)
+        communicate = Communicate(text=text, voice=config.voice)
 
-        return communicate, file_path
+        if config.output_streaming:
+
+            async def produce(ring_buffer: PcmRingBuffer):
+                decoder = AudioStreamDecoder()
+
+                async def write(samples: np.ndarray | None) -> bool:
+                    if samples is None:
+                        return True
+                    if samples.ndim > 1:
+                        # downmix, the playback expects mono
+                        samples = samples.mean(axis=1, dtype=np.float32)
+                    return await asyncio.to_thread(
+                        ring_buffer.write, samples
+                    ) == samples.nbytes
+
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        samples = await asyncio.to_thread(decoder.feed, chunk["data"])
+                        if not await write(samples):
+                            # playback was stopped
+                            return
+                await write(await asyncio.to_thread(decoder.finish))
+
+            await audio_player.stream_from_producer(
+                producer=produce,
+                config=sound_config,
+                wingman_name=wingman_name,
+                sample_rate=SAMPLE_RATE,
+                dtype="float32",
+            )
+        else:
+            audio, sample_rate = await self.__generate_speech(communicate)
+            await audio_player.play_with_effects(
+                input_data=(audio, sample_rate),
+                config=sound_config,
+                wingman_name=wingman_name,
+            )
+
+    async def __generate_speech(self, communicate: Communicate):
+        """Receives the whole speech and decodes it in memory."""
+        data = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                data += chunk["data"]
+
+        return await asyncio.to_thread(
+            sf.read, io.BytesIO(data), dtype="float32"
+        )
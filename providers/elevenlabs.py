@@ -5,7 +5,7 @@ from api.enums import SoundEffect, WingmanInitializationErrorType
 from api.interface import ElevenlabsConfig, SoundConfig, WingmanInitializationError
 from services.audio_player import AudioPlayer
 from services.secret_keeper import SecretKeeper
-from services.sound_effects import get_sound_effects
+from services.sound_effects import compile_sound_effects
 from services.websocket_user import WebSocketUser
 
 
@@ -41,15 +41,20 @@ class ElevenLabs:
         wingman_name: str,
         stream: bool,
     ):
-        user = User(self.api_key)
-        voice = (
-            user.get_voice_by_ID(config.voice.id)
-            if config.voice.id
-            else user.get_voices_by_name(config.voice.name)[0]
-        )
+        def get_voice():
+            user = User(self.api_key)
+            return (
+                user.get_voice_by_ID(config.voice.id)
+                if config.voice.id
+                else user.get_voices_by_name(config.voice.name)[0]
+            )
+
+        # elevenlabslib is blocking, so all API calls are made in a thread
+        voice = await asyncio.to_thread(get_voice)
 
         def notify_playback_finished():
             audio_player.playback_events.unsubscribe("finished", playback_finished)
+            release_effects_chain()
 
             contains_high_end_radio = SoundEffect.HIGH_END_RADIO in sound_config.effects
             if contains_high_end_radio:
@@ -78,13 +83,19 @@ class ElevenLabs:
                 audio_player.notify_playback_started(wingman_name)
             )
 
-        sound_effects = get_sound_effects(sound_config)
+        sound_effects = compile_sound_effects(sound_config)
+        effects_chain = sound_effects.acquire() if stream else None
+        unreleased_chains = [effects_chain]
 
-        def audio_post_processor(audio_chunk, sample_rate):
-            for sound_effect in sound_effects:
-                audio_chunk = sound_effect(audio_chunk, sample_rate, reset=False)
+        def release_effects_chain():
+            # called from the playback thread and the event loop, but must return the chain only once
+            try:
+                sound_effects.release(unreleased_chains.pop())
+            except IndexError:
+                pass
 
-            return audio_chunk
+        def audio_post_processor(audio_chunk, sample_rate):
+            return effects_chain(audio_chunk, sample_rate, reset=False)
 
         playback_options = (
             PlaybackOptions(
@@ -96,7 +107,7 @@ class ElevenLabs:
             else PlaybackOptions(runInBackground=True)
         )
 
-        if stream and len(sound_effects) > 0:
+        if effects_chain:
             playback_options.audioPostProcessor = audio_post_processor
 
         generation_options = GenerationOptions(
@@ -114,29 +125,39 @@ class ElevenLabs:
 
         if not stream:
             # play with our audio player so that we call our started and ended callbacks
-            audio_bytes, generation_info = voice.generate_audio_v3(
+            audio_bytes, generation_info = await asyncio.to_thread(
+                voice.generate_audio_v3,
                 prompt=text,
                 generation_options=generation_options,
             )
             if audio_bytes:
                 await audio_player.play_with_effects(
-                    input_data=audio_bytes.result(),
+                    input_data=await asyncio.to_thread(audio_bytes.result),
                     config=sound_config,
                     wingman_name=wingman_name,
                 )
         else:
-            # playback using elevenlabslib
-            _, _, output_stream_future, _ = voice.stream_audio_v3(
-                prompt=text,
-                generation_options=generation_options,
-                playback_options=playback_options,
-            )
+            # playback using elevenlabslib, which plays right away and bypasses our audio player
+            await audio_player.wait_for_playback_turn()
+            try:
+                _, _, output_stream_future, _ = await asyncio.to_thread(
+                    voice.stream_audio_v3,
+                    prompt=text,
+                    generation_options=generation_options,
+                    playback_options=playback_options,
+                )
 
-            # if the user cancels the playback...
-            output_stream = output_stream_future.result()
+                # if the user cancels the playback...
+                output_stream = await asyncio.to_thread(output_stream_future.result)
+            except BaseException:
+                # failed or cancelled before the playback started, so onPlaybackEnd won't release the chain
+                release_effects_chain()
+                raise
 
             def playback_finished(wingman_name):
                 output_stream.abort()
+                # an aborted stream doesn't always call onPlaybackEnd
+                release_effects_chain()
 
             audio_player.playback_events.subscribe("finished", playback_finished)
 
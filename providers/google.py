@@ -10,7 +10,7 @@ class GoogleGenAI:
     def __init__(self, api_key: str):
         genai.configure(api_key=api_key)
 
-    def ask(
+    async def ask(
         self,
         messages: list[dict[str, str]],
         model: str,
@@ -45,7 +45,7 @@ class GoogleGenAI:
                 "threshold": "BLOCK_NONE",
             },
         ]
-        response = aimodel.generate_content(
+        response = await aimodel.generate_content_async(
             contents=contents,
             stream=stream,
             # tools=google_tools,
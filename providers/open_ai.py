@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
+import asyncio
 import re
 from typing import Literal
-from openai import OpenAI, APIStatusError, AzureOpenAI
+from weakref import WeakKeyDictionary
+from openai import AsyncOpenAI, APIStatusError, AsyncAzureOpenAI
 import azure.cognitiveservices.speech as speechsdk
 from api.enums import (
     AzureRegion,
@@ -14,16 +16,34 @@ from api.interface import (
     SoundConfig,
 )
 from services.audio_player import AudioPlayer
+from services.http_client import get_async_http_client
 from services.printr import Printr
+from services.recorded_audio import RecordedAudio
+from services.ring_buffer import PcmRingBuffer
 
 printr = Printr()
 
 
 class BaseOpenAi(ABC):
+    def __init__(self):
+        # async clients are bound to the event loop they were created in, so we keep one set per loop
+        self.clients: WeakKeyDictionary[asyncio.AbstractEventLoop, dict] = (
+            WeakKeyDictionary()
+        )
+
     @abstractmethod
     def _create_client(self, *args, **kwargs):
         """Subclasses should implement this method to create their specific client."""
 
+    def _get_client(self, key: tuple, *args, **kwargs):
+        """Returns the client for the given key and the running event loop, creating it on first use."""
+        clients = self.clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(key)
+        if client is None:
+            client = self._create_client(*args, **kwargs)
+            clients[key] = client
+        return client
+
     def _handle_key_error(self):
         printr.toast_error(
             "The OpenAI API key you provided is invalid. Please check the GUI settings or your 'secrets.yaml'"
@@ -45,18 +65,17 @@ class BaseOpenAi(ABC):
         else:
             printr.toast_error("The API did not provide further information.")
 
-    def _perform_transcription(
+    async def _perform_transcription(
         self,
-        client: OpenAI | AzureOpenAI,
-        filename: str,
+        client: AsyncOpenAI | AsyncAzureOpenAI,
+        recording: RecordedAudio,
         model: Literal["whisper-1"],
     ):
         try:
-            with open(filename, "rb") as audio_input:
-                transcript = client.audio.transcriptions.create(
-                    model=model, file=audio_input
-                )
-                return transcript
+            transcript = await client.audio.transcriptions.create(
+                model=model, file=recording.get_upload()
+            )
+            return transcript
         except APIStatusError as e:
             self._handle_api_error(e)
         except UnicodeEncodeError:
@@ -64,9 +83,9 @@ class BaseOpenAi(ABC):
 
         return None
 
-    def _perform_ask(
+    async def _perform_ask(
         self,
-        client: OpenAI | AzureOpenAI,
+        client: AsyncOpenAI | AsyncAzureOpenAI,
         messages: list[dict[str, str]],
         stream: bool,
         tools: list[dict[str, any]],
@@ -74,13 +93,13 @@ class BaseOpenAi(ABC):
     ):
         try:
             if not tools:
-                completion = client.chat.completions.create(
+                completion = await client.chat.completions.create(
                     stream=stream,
                     messages=messages,
                     model=model,
                 )
             else:
-                completion = client.chat.completions.create(
+                completion = await client.chat.completions.create(
                     stream=stream,
                     messages=messages,
                     model=model,
@@ -105,10 +124,16 @@ class OpenAi(BaseOpenAi):
     ):
         super().__init__()
         self.api_key = api_key
-        self.client = self._create_client(
-            api_key=api_key,
-            organization=organization,
-            base_url=base_url,
+        self.organization = organization
+        self.base_url = base_url
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return self._get_client(
+            (),
+            api_key=self.api_key,
+            organization=self.organization,
+            base_url=self.base_url,
         )
 
     def _create_client(
@@ -118,25 +143,26 @@ class OpenAi(BaseOpenAi):
         base_url: str | None = None,
     ):
         """Create an OpenAI client with the given parameters."""
-        return OpenAI(
+        return AsyncOpenAI(
             api_key=api_key,
             organization=organization,
             base_url=base_url,
+            http_client=get_async_http_client(),
         )
 
-    def transcribe(self, filename: str, model: str = "whisper-1"):
-        return self._perform_transcription(
-            client=self.client, filename=filename, model=model
+    async def transcribe(self, recording: RecordedAudio, model: str = "whisper-1"):
+        return await self._perform_transcription(
+            client=self.client, recording=recording, model=model
         )
 
-    def ask(
+    async def ask(
         self,
         messages: list[dict[str, str]],
         model: str = None,
         stream: bool = False,
         tools: list[dict[str, any]] = None,
     ):
-        return self._perform_ask(
+        return await self._perform_ask(
             client=self.client,
             messages=messages,
             model=model,
@@ -156,7 +182,7 @@ class OpenAi(BaseOpenAi):
             if not voice:
                 voice = OpenAiTtsVoice.NOVA
 
-            response = self.client.audio.speech.create(
+            response = await self.client.audio.speech.create(
                 model="tts-1",
                 voice=voice.value,
                 input=text,
@@ -176,35 +202,59 @@ class OpenAi(BaseOpenAi):
 class OpenAiAzure(BaseOpenAi):
     def _create_client(self, api_key: str, config: AzureInstanceConfig):
         """Create an AzureOpenAI client with the given parameters."""
-        return AzureOpenAI(
+        return AsyncAzureOpenAI(
             api_key=api_key,
             azure_endpoint=config.api_base_url,
             api_version=config.api_version.value,
             azure_deployment=config.deployment_name,
+            http_client=get_async_http_client(),
         )
 
-    def transcribe_whisper(
+    def _get_azure_client(self, api_key: str, config: AzureInstanceConfig):
+        return self._get_client(
+            (
+                api_key,
+                config.api_base_url,
+                config.api_version.value,
+                config.deployment_name,
+            ),
+            api_key=api_key,
+            config=config,
+        )
+
+    async def transcribe_whisper(
         self,
-        filename: str,
+        recording: RecordedAudio,
         api_key: str,
         config: AzureInstanceConfig,
         model: str = "whisper-1",
     ):
-        azure_client = self._create_client(api_key=api_key, config=config)
-        return self._perform_transcription(
+        azure_client = self._get_azure_client(api_key=api_key, config=config)
+        return await self._perform_transcription(
             client=azure_client,
-            filename=filename,
+            recording=recording,
             model=model,
         )
 
-    def transcribe_azure_speech(
-        self, filename: str, api_key: str, config: AzureSttConfig
+    async def transcribe_azure_speech(
+        self, recording: RecordedAudio, api_key: str, config: AzureSttConfig
     ):
         speech_config = speechsdk.SpeechConfig(
             subscription=api_key,
             region=config.region.value,
         )
-        audio_config = speechsdk.AudioConfig(filename=filename)
+        # feed the PCM from memory instead of letting the SDK read a file
+        pcm = recording.get_pcm()
+        audio_stream = speechsdk.audio.PushAudioInputStream(
+            stream_format=speechsdk.audio.AudioStreamFormat(
+                samples_per_second=recording.sample_rate,
+                bits_per_sample=recording.sample_width * 8,
+                channels=recording.channels,
+            )
+        )
+        audio_stream.write(pcm)
+        audio_stream.close()
+        audio_config = speechsdk.audio.AudioConfig(stream=audio_stream)
 
         auto_detect_source_language_config = (
             (
@@ -224,9 +274,10 @@ class OpenAiAzure(BaseOpenAi):
             language=language,
             auto_detect_source_language_config=auto_detect_source_language_config,
         )
-        return speech_recognizer.recognize_once_async().get()
+        # the Speech SDK only offers blocking futures, so wait for them in a thread
+        return await asyncio.to_thread(speech_recognizer.recognize_once_async().get)
 
-    def ask(
+    async def ask(
         self,
         messages: list[dict[str, str]],
         api_key: str,
@@ -234,8 +285,8 @@ class OpenAiAzure(BaseOpenAi):
         stream: bool = False,
         tools: list[dict[str, any]] = None,
     ):
-        azure_client = self._create_client(api_key=api_key, config=config)
-        return self._perform_ask(
+        azure_client = self._get_azure_client(api_key=api_key, config=config)
+        return await self._perform_ask(
             client=azure_client,
             messages=messages,
             # Azure uses the deployment name as the model
@@ -265,25 +316,30 @@ class OpenAiAzure(BaseOpenAi):
             audio_config=None,
         )
 
-        result = (
-            speech_synthesizer.start_speaking_text_async(text).get()
-            if config.output_streaming
-            else speech_synthesizer.speak_text_async(text).get()
+        result = await asyncio.to_thread(
+            (
+                speech_synthesizer.start_speaking_text_async(text)
+                if config.output_streaming
+                else speech_synthesizer.speak_text_async(text)
+            ).get
         )
 
-        def buffer_callback(audio_buffer):
-            buffer = bytes(2048)
-            size = audio_data_stream.read_data(buffer)
-            audio_buffer[:size] = buffer
-            return size
+        def produce(ring_buffer: PcmRingBuffer):
+            # the SDK only reads into bytes, so one chunk is reused for the whole stream
+            chunk = bytes(2048)
+            chunk_view = memoryview(chunk)
+            while (size := audio_data_stream.read_data(chunk)) > 0:
+                if ring_buffer.write(chunk_view[:size]) < size:
+                    # playback was stopped
+                    break
 
         if result is not None:
             if config.output_streaming:
                 audio_data_stream = speechsdk.AudioDataStream(result)
 
-                await audio_player.stream_with_effects(
-                    buffer_callback,
-                    sound_config,
+                await audio_player.stream_from_producer(
+                    producer=produce,
+                    config=sound_config,
                     wingman_name=wingman_name,
                     use_gain_boost=True,  # "Azure Streaming" low gain workaround
                 )
@@ -2,10 +2,12 @@ from time import sleep
 from os import path
 import platform
 import subprocess
-import requests
+import httpx
 from api.enums import LogType
 from api.interface import WhispercppSettings, WhispercppSttConfig, WhispercppTranscript
+from services.http_client import get_async_http_client, get_http_session
 from services.printr import Printr
+from services.recorded_audio import RecordedAudio
 
 STANDARD_DIR = "whispercpp"
 CUDA_DIR = "whispercpp-cuda"
@@ -38,44 +40,39 @@ class Whispercpp:
         else:
             self.__validate()
 
-    def transcribe(
+    async def transcribe(
         self,
-        filename: str,
+        recording: RecordedAudio,
         config: WhispercppSttConfig,
         response_format: str = "json",
         timeout: int = 10,
     ):
         try:
-            with open(filename, "rb") as file:
-                response = requests.post(
-                    url=f"{self.settings.host}:{self.settings.port}/inference",
-                    files={"file": file},
-                    data={
-                        "temperature": config.temperature,
-                        "response_format": response_format,
-                    },
-                    timeout=timeout,
-                )
-                response.raise_for_status()
-                # Wrap response.json = {"text":"transcription"} into a Pydantic model for typesafe further processing
-                return WhispercppTranscript(
-                    text=response.json()["text"].strip(),
-                    language=self.settings.language,
-                )
-        except requests.HTTPError as e:
+            response = await get_async_http_client().post(
+                url=f"{self.settings.host}:{self.settings.port}/inference",
+                files={"file": recording.get_upload()},
+                data={
+                    "temperature": config.temperature,
+                    "response_format": response_format,
+                },
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            # Wrap response.json = {"text":"transcription"} into a Pydantic model for typesafe further processing
+            return WhispercppTranscript(
+                text=response.json()["text"].strip(),
+                language=self.settings.language,
+            )
+        except httpx.HTTPStatusError as e:
             self.printr.toast_error(
-                text=f"whispercpp transcription request failed: {e.strerror}"
+                text=f"whispercpp transcription request failed: {str(e)}"
             )
             return None
-        except requests.Timeout:
+        except httpx.TimeoutException:
             self.printr.toast_error(
                 text=f"whispercpp transcription request timed out after {timeout}s."
             )
             return None
-        except FileNotFoundError:
-            self.printr.toast_error(
-                f"whispercpp file to transcript'{filename}' not found."
-            )
 
     def start_server(self):
         if self.__is_server_running() or not self.is_windows:
@@ -150,7 +147,7 @@ class Whispercpp:
             return
 
         if self.current_model != self.settings.model:
-            response = requests.post(
+            response = get_http_session().post(
                 f"{self.settings.host}:{self.settings.port}/load",
                 data={"model": path.join(self.models_dir, self.settings.model)},
                 timeout=timeout,
@@ -197,7 +194,7 @@ class Whispercpp:
 
     def __is_server_running(self, timeout=5):
         try:
-            response = requests.get(
+            response = get_http_session().get(
                 url=f"{self.settings.host}:{self.settings.port}", timeout=timeout
             )
             return response.ok
@@ -1,5 +1,5 @@
+import httpx
 import openai
-import requests
 from api.enums import CommandTag, LogType, OpenAiTtsVoice, WingmanProAzureDeployment
 from api.interface import (
     AzureSttConfig,
@@ -8,7 +8,10 @@ from api.interface import (
     WingmanProSettings,
 )
 from services.audio_player import AudioPlayer
+from services.http_client import get_async_http_client, get_http_session
 from services.printr import Printr
+from services.recorded_audio import RecordedAudio
+from services.ring_buffer import PcmRingBuffer
 from services.secret_keeper import SecretKeeper
 
 
@@ -29,39 +32,42 @@ class WingmanPro:
             color=LogType.ERROR,
         )
 
-    def transcribe_whisper(self, filename: str):
-        with open(filename, "rb") as audio_input:
-            files = {"audio_file": (filename, audio_input)}
-            response = requests.post(
-                url=f"{self.settings.base_url}/transcribe-whisper",
-                params={"region": self.settings.region.value},
-                files=files,
-                headers=self._get_headers(),
-                timeout=self.timeout,
-            )
-            if response.status_code == 403:
-                self.send_unauthorized_error()
-                return None
-            else:
-                response.raise_for_status()
-            json = response.json()
-            transcription = openai.types.audio.Transcription.model_validate(json)
-            return transcription
+    async def _post(self, path: str, **kwargs) -> httpx.Response:
+        """Sends a POST request to the Wingman Pro API without blocking the event loop."""
+        return await get_async_http_client().post(
+            url=f"{self.settings.base_url}/{path}",
+            headers=self._get_headers(),
+            timeout=self.timeout,
+            **kwargs,
+        )
 
-    def transcribe_azure_speech(self, filename: str, config: AzureSttConfig):
-        with open(filename, "rb") as audio_input:
-            files = {"file": (filename, audio_input)}
-            params = {
-                "region": self.settings.region.value,
-                "languages": config.languages,
-            }
-            response = requests.post(
-                url=f"{self.settings.base_url}/transcribe-azure-speech",
-                params=params,
-                headers=self._get_headers(),
-                files=files,
-                timeout=self.timeout,
-            )
+    async def transcribe_whisper(self, recording: RecordedAudio):
+        response = await self._post(
+            "transcribe-whisper",
+            params={"region": self.settings.region.value},
+            files={"audio_file": recording.get_upload()},
+        )
+        if response.status_code == 403:
+            self.send_unauthorized_error()
+            return None
+        else:
+            response.raise_for_status()
+        json = response.json()
+        transcription = openai.types.audio.Transcription.model_validate(json)
+        return transcription
+
+    async def transcribe_azure_speech(
+        self, recording: RecordedAudio, config: AzureSttConfig
+    ):
+        params = {
+            "region": self.settings.region.value,
+            "languages": config.languages,
+        }
+        response = await self._post(
+            "transcribe-azure-speech",
+            params=params,
+            files={"file": recording.get_upload()},
+        )
         if response.status_code == 403:
             self.send_unauthorized_error()
             return None
@@ -70,7 +76,7 @@ class WingmanPro:
         json = response.json()
         return json
 
-    def ask(
+    async def ask(
         self,
         messages: list[dict[str, str]],
         deployment: WingmanProAzureDeployment,
@@ -91,12 +97,10 @@ class WingmanPro:
             "stream": stream,
             "tools": tools,
         }
-        response = requests.post(
-            url=f"{self.settings.base_url}/ask",
+        response = await self._post(
+            "ask",
             params={"region": self.settings.region.value},
-            headers=self._get_headers(),
             json=data,
-            timeout=self.timeout,
         )
         if response.status_code == 401 or response.status_code == 403:
             self.send_unauthorized_error()
@@ -123,8 +127,8 @@ class WingmanPro:
         }
         if config.output_streaming:
 
-            def buffer_generator():
-                with requests.post(
+            def produce(ring_buffer: PcmRingBuffer):
+                with get_http_session().post(
                     url=f"{self.settings.base_url}/generate-azure-speech",
                     params={"region": self.settings.region.value},
                     json=data,
@@ -134,59 +138,26 @@ class WingmanPro:
                 ) as response:
                     if response.status_code == 403:
                         self.send_unauthorized_error()
-                        return None
+                        return
                     else:
                         response.raise_for_status()
+                    # the ring buffer only hands out whole samples, so odd chunk sizes don't matter
                     for chunk in response.iter_content(chunk_size=2048):
-                        if not chunk:
+                        if ring_buffer.write(chunk) < len(chunk):
+                            # playback was stopped
                             break
-                        yield chunk
 
-            generator_instance = buffer_generator()
-            # Initialize an incomplete buffer storage
-            incomplete_buffer = b""
-
-            def buffer_callback(audio_buffer):
-                nonlocal incomplete_buffer
-                try:
-                    chunk = next(generator_instance)
-                    # Prepend any previously incomplete buffer to the chunk
-                    chunk = incomplete_buffer + chunk
-                    # Compute new incomplete buffer size if any
-                    remainder = len(chunk) % 2  # 2 bytes for 'int16'
-                    if remainder:
-                        # Store incomplete bytes for next callback
-                        incomplete_buffer = chunk[-remainder:]
-                        # Exclude the incomplete buffer from the current chunk
-                        chunk = chunk[:-remainder]
-                    else:
-                        # No incomplete bytes, reset the incomplete buffer
-                        incomplete_buffer = b""
-
-                    audio_buffer[: len(chunk)] = chunk
-                    return len(chunk)
-                except StopIteration:
-                    if incomplete_buffer:
-                        # Handle any remaining incomplete buffer, if present, when the stream ends
-                        audio_buffer[: len(incomplete_buffer)] = incomplete_buffer
-                        chunk_length = len(incomplete_buffer)
-                        incomplete_buffer = b""  # Clear the storage
-                        return chunk_length
-                    return 0
-
-            await audio_player.stream_with_effects(
-                buffer_callback=buffer_callback,
+            await audio_player.stream_from_producer(
+                producer=produce,
                 config=sound_config,
                 wingman_name=wingman_name,
                 use_gain_boost=True,  # "Azure Streaming" low gain workaround
             )
         else:  # non-streaming
-            response = requests.post(
-                url=f"{self.settings.base_url}/generate-azure-speech",
+            response = await self._post(
+                "generate-azure-speech",
                 params={"region": self.settings.region.value},
-                headers=self._get_headers(),
                 json=data,
-                timeout=self.timeout,
             )
             if response.status_code == 403:
                 self.send_unauthorized_error()
@@ -214,14 +185,12 @@ class WingmanPro:
             "voice_name": voice.value,
             "stream": False,
         }
-        response = requests.post(
-            url=f"{self.settings.base_url}/generate-openai-speech",
+        response = await self._post(
+            "generate-openai-speech",
             params={
                 "region": self.settings.region.value,
             },
-            headers=self._get_headers(),
             json=data,
-            timeout=self.timeout,
         )
         if response is not None:
             if response.status_code == 403:
@@ -242,14 +211,12 @@ class WingmanPro:
         data = {
             "text": text,
         }
-        response = requests.post(
-            url=f"{self.settings.base_url}/generate-image",
+        response = await self._post(
+            "generate-image",
             params={
                 "region": self.settings.region.value,
             },
-            headers=self._get_headers(),
             json=data,
-            timeout=self.timeout,
         )
         if response is not None:
             if response.status_code == 403:
@@ -260,7 +227,7 @@ class WingmanPro:
             return response.text
 
     def get_available_voices(self, locale: str = ""):
-        response = requests.get(
+        response = get_http_session().get(
             url=f"{self.settings.base_url}/azure-voices",
             params={"region": self.settings.region.value, "locale": locale},
             timeout=self.timeout,
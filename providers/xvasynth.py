@@ -1,13 +1,15 @@
+import asyncio
 import os
 from os import path
 import platform
 import subprocess
 import time
-import requests
+import httpx
 from api.enums import LogType
 from api.interface import XVASynthSettings, XVASynthTtsConfig, SoundConfig
 from services.audio_player import AudioPlayer
 from services.file import get_writable_dir
+from services.http_client import get_async_http_client, get_http_session
 from services.printr import Printr
 
 RECORDING_PATH = "audio_output"
@@ -25,6 +27,7 @@ class XVASynth:
         self.printr = Printr()
         self.models_dir: str = ""
         self.server_executable_path: str = ""
+        self.synthesis_lock = asyncio.Lock()
 
         if settings.enable and self.__validate():
             self.start_server()
@@ -42,7 +45,7 @@ class XVASynth:
                 text="XVASynth must be enabled and configured in the Settings view."
             )
             return
-        if not self.change_voice(config):
+        if not await self.change_voice(config):
             self.printr.toast_error(
                 text=f"Unable to load XVASynth model {config.voice.model_directory}/{config.voice.voice_name}."
             )
@@ -51,8 +54,6 @@ class XVASynth:
         voiceline = text
 
         file_path = path.join(get_writable_dir(RECORDING_PATH), OUTPUT_FILE)
-        if path.exists(file_path):
-            os.remove(file_path)
 
         # Synthesize voiceline
         data = {
@@ -68,20 +69,24 @@ class XVASynth:
             "useCleanup": config.use_cleanup,
         }
         try:
-            response = requests.post(
-                f"{self.settings.host}:{self.settings.port}/{SYNTHESIZE_URL}",
-                json=data,
-                timeout=30,
-            )
-            response.raise_for_status()
-            audio, sample_rate = audio_player.get_audio_from_file(file_path)
+            # all voice lines share the output file, so they are synthesized one at a time
+            async with self.synthesis_lock:
+                if path.exists(file_path):
+                    os.remove(file_path)
+                response = await get_async_http_client().post(
+                    f"{self.settings.host}:{self.settings.port}/{SYNTHESIZE_URL}",
+                    json=data,
+                    timeout=30,
+                )
+                response.raise_for_status()
+                audio, sample_rate = audio_player.get_audio_from_file(file_path)
 
             await audio_player.play_with_effects(
                 input_data=(audio, sample_rate),
                 config=sound_config,
                 wingman_name=wingman_name,
             )
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             self.printr.toast_error(
                 text=f"Error synthesizing XVASynth voice line: \n{str(e)}"
             )
@@ -144,7 +149,7 @@ class XVASynth:
 
         self.printr.print("XVASynth settings updated.", server_only=True)
 
-    def change_voice(self, config: XVASynthTtsConfig, timeout=10):
+    async def change_voice(self, config: XVASynthTtsConfig, timeout=10):
         if (
             self.current_model
             == f"{config.voice.model_directory}/{config.voice.voice_name}"
@@ -164,14 +169,14 @@ class XVASynth:
             "base_lang": config.voice.language,
             "pluginsContext": "{}",
         }
-        response = requests.post(
+        response = await get_async_http_client().post(
             f"{self.settings.host}:{self.settings.port}/{LOAD_MODEL_URL}",
             json=model_change,
             timeout=timeout,
         )
         response.raise_for_status()
         self.current_model = f"{config.voice.model_directory}/{config.voice.voice_name}"
-        return response.ok
+        return response.is_success
 
     def __validate(self):
         if not path.exists(self.settings.install_dir):
@@ -208,7 +213,7 @@ class XVASynth:
 
     def __is_server_running(self, timeout=10):
         try:
-            response = requests.get(
+            response = get_http_session().get(
                 url=f"{self.settings.host}:{self.settings.port}", timeout=timeout
             )
             return response.ok
@@ -1,16 +1,17 @@
 import asyncio
+from concurrent.futures import Future
 import os
-import threading
-import time
 from os import path
 from random import randint
 from api.interface import AudioFile, AudioFileConfig
 from services.printr import Printr
 from services.audio_player import AudioPlayer
 from services.file import get_writable_dir
+from services.runtime import Runtime
 
 printr = Printr()
 DIR_AUDIO_LIBRARY = "audio_library"
+AUDIO_LIBRARY_GROUP = "audio_library"
 
 class AudioLibrary:
     def __init__(
@@ -79,7 +80,7 @@ class AudioLibrary:
         )
         if audio_file.wait:
             while True:
-                time.sleep(0.1)
+                await asyncio.sleep(0.1)
                 status = self.get_playback_status(selected_file)
                 if not status[1]: # no audio player
                     break
@@ -193,21 +194,9 @@ class AudioLibrary:
     ### Helper functions ###
     ########################
 
-    def __threaded_execution(self, function, *args) -> threading.Thread:
-        """Execute a function in a separate thread."""
-
-        def start_thread(function, *args):
-            if asyncio.iscoroutinefunction(function):
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-                new_loop.run_until_complete(function(*args))
-                new_loop.close()
-            else:
-                function(*args)
-
-        thread = threading.Thread(target=start_thread, args=(function, *args))
-        thread.start()
-        return thread
+    def __threaded_execution(self, function, *args) -> Future | None:
+        """Execute a function in the background without waiting for it."""
+        return Runtime().run(function, *args, group=AUDIO_LIBRARY_GROUP)
 
     def __get_audio_file_config(
         self, audio_file: AudioFile | AudioFileConfig
@@ -0,0 +1,331 @@
+from collections import deque
+from math import gcd
+import threading
+from typing import Callable, Optional
+import numpy as np
+import sounddevice as sd
+from scipy.signal import resample_poly
+
+PRIORITY_BACKGROUND = 0
+"""Audio library sounds, music etc."""
+PRIORITY_VOICE = 1
+"""Wingman responses and their effects."""
+
+DUCKING_VOLUME = 0.4
+"""Volume factor for sources while a source with a higher priority is playing."""
+
+DEFAULT_SAMPLE_RATE = 48000
+
+
+def convert_audio(
+    audio: np.ndarray, sample_rate: int, target_sample_rate: int, target_channels: int
+) -> np.ndarray:
+    """Converts audio to float32 frames of shape (frames, channels) in the target format."""
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim == 1:
+        audio = audio[:, np.newaxis]
+    audio = resample_audio(audio, sample_rate, target_sample_rate)
+    return _convert_channels(audio, target_channels)
+
+
+def resample_audio(
+    audio: np.ndarray, sample_rate: int, target_sample_rate: int
+) -> np.ndarray:
+    """Resamples audio along its first axis with a polyphase filter (much cheaper than an FFT resample)."""
+    if sample_rate == target_sample_rate or len(audio) == 0:
+        return audio
+    divisor = gcd(int(sample_rate), int(target_sample_rate))
+    return resample_poly(
+        audio,
+        int(target_sample_rate) // divisor,
+        int(sample_rate) // divisor,
+        axis=0,
+    ).astype(np.float32)
+
+
+def _convert_channels(audio: np.ndarray, target_channels: int) -> np.ndarray:
+    channels = audio.shape[1]
+    if channels == target_channels:
+        return audio
+    if channels == 1:
+        return np.repeat(audio, target_channels, axis=1)
+    if target_channels == 1:
+        return audio.mean(axis=1, keepdims=True)
+    if channels > target_channels:
+        return audio[:, :target_channels]
+    return np.concatenate(
+        (audio, np.repeat(audio[:, -1:], target_channels - channels, axis=1)), axis=1
+    )
+
+
+class StreamResampler:
+    """Resamples a continuous stream chunk by chunk using linear interpolation, without clicks at the chunk borders."""
+
+    def __init__(self, sample_rate: int, target_sample_rate: int):
+        self.step = sample_rate / target_sample_rate
+        self.position = 0.0
+        self.last_frame: Optional[np.ndarray] = None
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        if self.step == 1.0 or len(audio) == 0:
+            return audio
+
+        if self.last_frame is not None:
+            audio = np.concatenate((self.last_frame, audio), axis=0)
+
+        positions = np.arange(self.position, len(audio) - 1, self.step)
+        indices = positions.astype(np.int64)
+        fractions = (positions - indices)[:, np.newaxis].astype(np.float32)
+        resampled = audio[indices] * (1.0 - fractions) + audio[indices + 1] * fractions
+
+        # continue from the last frame with the next chunk
+        next_position = positions[-1] + self.step if len(positions) else self.position
+        self.position = next_position - (len(audio) - 1)
+        self.last_frame = audio[-1:]
+
+        return resampled
+
+
+class MixerSource:
+    """Handle to a sound that is played by the AudioMixer.
+
+    Use it to change the volume while playing, to feed more audio (streaming) or to stop it.
+    """
+
+    def __init__(
+        self,
+        mixer: "AudioMixer",
+        sample_rate: int,
+        volume: list[float] | float = 1.0,
+        priority: int = PRIORITY_VOICE,
+        on_finished: Optional[Callable[[], None]] = None,
+    ):
+        self.mixer = mixer
+        self.sample_rate = sample_rate
+        self.volume = volume
+        """A float or a list with one float that can be changed while playing."""
+        self.priority = priority
+        self.on_finished = on_finished
+        self.finished = threading.Event()
+
+        self.is_closed = False
+        self.is_stopped = False
+        self.chunks: deque[np.ndarray] = deque()
+        self.offset = 0
+        self.resampler = StreamResampler(sample_rate, mixer.sample_rate)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished.is_set()
+
+    def get_volume(self) -> float:
+        return self.volume[0] if isinstance(self.volume, list) else self.volume
+
+    def append_clip(self, audio: np.ndarray, sample_rate: int):
+        """Appends a complete clip in any format, e.g. a beep before or after streamed audio."""
+        self.chunks.append(
+            convert_audio(audio, sample_rate, self.mixer.sample_rate, self.mixer.channels)
+        )
+
+    def append(self, audio: np.ndarray, channels: int = 1):
+        """Feeds more audio to a streaming source.
+
+        Args:
+            audio (np.ndarray): Float samples, either interleaved or shaped (frames, channels).
+            channels (int): The number of channels if the samples are interleaved.
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.ndim == 1:
+            audio = audio.reshape(-1, channels)
+        audio = self.resampler.process(audio)
+        self.chunks.append(_convert_channels(audio, self.mixer.channels))
+
+    def close(self):
+        """Signals that no more audio will be appended. The source finishes once everything is played."""
+        self.is_closed = True
+
+    def stop(self):
+        """Stops the source immediately."""
+        self.is_stopped = True
+
+    def read(self, frames: int, out: np.ndarray) -> int:
+        """Copies up to `frames` frames into `out` and returns the number of frames copied."""
+        copied = 0
+        while copied < frames and self.chunks:
+            chunk = self.chunks[0]
+            count = min(frames - copied, len(chunk) - self.offset)
+            out[copied : copied + count] = chunk[self.offset : self.offset + count]
+            copied += count
+            self.offset += count
+            if self.offset >= len(chunk):
+                self.chunks.popleft()
+                self.offset = 0
+        return copied
+
+    def is_done(self) -> bool:
+        return self.is_stopped or (self.is_closed and not self.chunks)
+
+    def finish(self):
+        self.finished.set()
+        if callable(self.on_finished):
+            self.on_finished()
+
+
+class AudioMixer:
+    """Keeps one output stream per device open and mixes all sounds that are currently playing into it.
+
+    This avoids the latency of opening a stream per playback and lets responses, fillers and library sounds overlap.
+    """
+
+    def __init__(
+        self,
+        device: Optional[int] = None,
+        blocksize: Optional[int] = None,
+        latency: Optional[float | str] = None,
+    ):
+        try:
+            device_info = sd.query_devices(device, "output")
+            self.sample_rate = int(device_info["default_samplerate"])
+            self.channels = max(1, min(2, int(device_info["max_output_channels"])))
+        except (ValueError, sd.PortAudioError):
+            self.sample_rate = DEFAULT_SAMPLE_RATE
+            self.channels = 2
+
+        self.sources: list[MixerSource] = []
+        self.lock = threading.Lock()
+        self.mix_buffer = np.zeros((1024, self.channels), dtype=np.float32)
+        self.stream = sd.OutputStream(
+            device=device,
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="float32",
+            blocksize=blocksize or 0,
+            latency=latency or "low",
+            callback=self.__callback,
+        )
+        self.stream.start()
+
+    def create_source(
+        self,
+        sample_rate: int,
+        volume: list[float] | float = 1.0,
+        priority: int = PRIORITY_VOICE,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> MixerSource:
+        """Creates a source that is played once it's passed to add_source.
+
+        Feed it with MixerSource.append (streaming) or append_clip and end it with MixerSource.close.
+        """
+        return MixerSource(self, sample_rate, volume, priority, on_finished)
+
+    def add_source(self, source: MixerSource):
+        """Starts playing the given source."""
+        with self.lock:
+            self.sources.append(source)
+
+    def play(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        volume: list[float] | float = 1.0,
+        priority: int = PRIORITY_VOICE,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> MixerSource:
+        """Plays a complete clip and returns its handle immediately."""
+        source = self.create_source(sample_rate, volume, priority, on_finished)
+        source.append_clip(audio, sample_rate)
+        source.close()
+        self.add_source(source)
+        return source
+
+    def stop_all(self):
+        with self.lock:
+            sources = list(self.sources)
+        for source in sources:
+            source.stop()
+
+    def close(self):
+        """Stops all sources and closes the output stream."""
+        self.stream.stop()
+        self.stream.close()
+        with self.lock:
+            sources = self.sources
+            self.sources = []
+        for source in sources:
+            source.finish()
+
+    def __callback(self, outdata, frames, _time, _status):
+        outdata.fill(0.0)
+
+        with self.lock:
+            sources = list(self.sources)
+        if not sources:
+            return
+
+        if len(self.mix_buffer) < frames:
+            self.mix_buffer = np.zeros((frames, self.channels), dtype=np.float32)
+
+        top_priority = max(source.priority for source in sources)
+        finished_sources = []
+        for source in sources:
+            if not source.is_stopped:
+                count = source.read(frames, self.mix_buffer)
+                if count:
+                    volume = source.get_volume()
+                    if source.priority < top_priority:
+                        volume *= DUCKING_VOLUME
+                    outdata[:count] += self.mix_buffer[:count] * volume
+            if source.is_done():
+                finished_sources.append(source)
+
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+        if finished_sources:
+            with self.lock:
+                self.sources = [s for s in self.sources if s not in finished_sources]
+            for source in finished_sources:
+                source.finish()
+
+
+output_mixers: dict[Optional[int], AudioMixer] = {}
+output_mixers_lock = threading.Lock()
+output_settings = {"blocksize": None, "latency": None}
+
+
+def get_output_mixer(device: Optional[int] = None) -> AudioMixer:
+    """Returns the always-open mixer of the given (or default) output device."""
+    if device is None:
+        device = sd.default.device[1]
+        if device is not None and device < 0:
+            device = None
+
+    with output_mixers_lock:
+        mixer = output_mixers.get(device)
+        if mixer is None:
+            mixer = AudioMixer(
+                device=device,
+                blocksize=output_settings["blocksize"],
+                latency=output_settings["latency"],
+            )
+            output_mixers[device] = mixer
+        return mixer
+
+
+def configure_output_mixers(
+    blocksize: Optional[int] = None, latency: Optional[float | str] = None
+):
+    """Sets the block size and latency of the output streams. Open mixers are reopened on next use."""
+    if output_settings["blocksize"] == blocksize and output_settings["latency"] == latency:
+        return
+    output_settings["blocksize"] = blocksize
+    output_settings["latency"] = latency
+    close_output_mixers()
+
+
+def close_output_mixers():
+    """Closes all output streams, e.g. after the output device changed."""
+    with output_mixers_lock:
+        mixers = list(output_mixers.values())
+        output_mixers.clear()
+    for mixer in mixers:
+        mixer.close()
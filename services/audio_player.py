@@ -1,21 +1,39 @@
 import asyncio
+from contextvars import ContextVar
 import io
-import wave
 from os import path
-from threading import Thread
-from typing import Callable
+from typing import Any, Callable, Optional
 import numpy as np
 import soundfile as sf
-import sounddevice as sd
-from scipy.signal import resample
 from api.enums import SoundEffect
 from api.interface import SoundConfig
+from services.audio_mixer import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_VOICE,
+    MixerSource,
+    StreamResampler,
+    get_output_mixer,
+)
+from services.runtime import Runtime
+from services.sample_cache import SampleCache
+from services.tts_cache import TtsCache, pending_cache_key
 from services.pub_sub import PubSub
+from services.ring_buffer import PcmRingBuffer
 from services.sound_effects import (
     get_additional_layer_file,
     get_azure_workaround_gain_boost,
-    get_sound_effects,
+    compile_sound_effects,
+    get_sample_files,
+)
+
+previous_playback: ContextVar[Optional[asyncio.Future]] = ContextVar(
+    "previous_playback", default=None
 )
+"""Set while speaking a sentence that must not cut off the previous one, e.g. in streamed LLM responses.
+The audio is synthesized right away, but its playback waits until the given (previous) playback has finished."""
+
+STREAM_EVENT_SAMPLE_RATE = 16000
+"""The "audio" stream event always carries 16-bit mono PCM at this rate, no matter what the TTS provider sends (e.g. for ESP32 devices)."""
 
 class AudioPlayer:
     def __init__(
@@ -27,8 +45,7 @@ class AudioPlayer:
         self.is_playing = False
         self.event_queue = event_queue
         self.event_loop = None
-        self.stream = None
-        self.raw_stream = None
+        self.source: MixerSource = None
         self.wingman_name = ""
         self.playback_events = PubSub()
         self.stream_event = PubSub()
@@ -37,6 +54,7 @@ class AudioPlayer:
         self.sample_dir = path.join(
             path.abspath(path.dirname(__file__)), "../audio_samples"
         )
+        self.sample_cache = SampleCache()
 
     def set_event_loop(self, loop: asyncio.AbstractEventLoop):
         self.event_loop = loop
@@ -45,95 +63,42 @@ class AudioPlayer:
         self,
         audio,
         sample_rate,
-        channels,
-        finished_callback,
-        volume: list[float] | float,
-    ):
-        def callback(outdata, frames, time, status):
-            # this is a super hacky way to update volume while the playback is running
-            local_volume = volume[0] if isinstance(volume, list) else volume
-            nonlocal playhead
-            chunksize = frames * channels
-
-            # If we are at the end of the audio buffer, stop playback
-            if playhead >= len(audio):
-                if np.issubdtype(outdata.dtype, np.floating):
-                    outdata.fill(0.0)  # Fill with zero for floats
-                else:
-                    outdata[:] = bytes(
-                        len(outdata)
-                    )  # Fill with zeros for buffer of int types
-                raise sd.CallbackStop
-
-            # Define the end of the current chunk
-            end = min(playhead + chunksize, len(audio))
-            current_chunk = audio[playhead:end]
-
-            # Handle multi-channel conversion if necessary
-            if channels > 1 and current_chunk.ndim == 1:
-                current_chunk = np.tile(current_chunk[:, np.newaxis], (1, channels))
-
-            # Flatten the chunk
-            current_chunk = current_chunk.ravel()
-
-            required_length = chunksize
-
-            # Ensure current_chunk has the required length
-            if len(current_chunk) < required_length:
-                padding_length = required_length - len(current_chunk)
-                current_chunk = np.pad(current_chunk, (0, padding_length), "constant")
-            else:
-                current_chunk = current_chunk[:required_length]
-
-            # Reshape current_chunk to match outdata's shape, only if size matches
-            try:
-                current_chunk = current_chunk.reshape((frames, channels))
-                current_chunk = current_chunk * local_volume
-                if np.issubdtype(outdata.dtype, np.floating):
-                    outdata[:] = current_chunk.astype(outdata.dtype)
-                else:
-                    outdata_bytes = current_chunk.astype(outdata.dtype).tobytes()
-                    outdata_flat = np.frombuffer(outdata_bytes, dtype=outdata.dtype)
-                    outdata[:] = outdata_flat.reshape(outdata.shape)
-            except ValueError as e:
-                print(f"Reshape error: {e}")
-                outdata.fill(
-                    0.0 if np.issubdtype(outdata.dtype, np.floating) else 0
-                )  # Safely fill zero to avoid noise
-
-            # Update playhead
-            playhead += frames
-
-            # Check if playback should stop (end of audio)
-            if playhead >= len(audio):
-                if np.issubdtype(outdata.dtype, np.floating):
-                    outdata.fill(0.0)  # Fill with zero for floats
-                else:
-                    outdata[:] = bytes(len(outdata))
-                raise sd.CallbackStop
-
-        # Initial playhead position
-        playhead = 0
-        self.is_playing = True
-
-        # Create and start the audio stream
-        self.stream = sd.OutputStream(
-            samplerate=sample_rate,
-            channels=channels,
-            callback=callback,
-            finished_callback=finished_callback,
+        finished_callback: Callable[[], None] = None,
+        volume: list[float] | float = 1.0,
+        priority: int = PRIORITY_VOICE,
+    ) -> MixerSource:
+        """Starts playing the audio on the output mixer without blocking.
+
+        Returns:
+            MixerSource: A handle to change the volume or stop the playback.
+        """
+        mixer = get_output_mixer()
+        source = mixer.create_source(
+            sample_rate=sample_rate,
+            volume=volume,
+            priority=priority,
+            on_finished=finished_callback,
         )
-        self.stream.start()
-        sd.sleep(int(len(audio) / sample_rate * 1000))
+        source.append_clip(audio, sample_rate)
+        source.close()
+        self.source = source
+        mixer.add_source(source)
+        return source
+
+    async def wait_for_playback_turn(self):
+        """Waits until the playback set in previous_playback has finished. Returns immediately if there is none."""
+        previous = previous_playback.get()
+        if previous is None:
+            return
+        # it returns once its playback started (or finished, if streamed)
+        await asyncio.wait([previous])
+        while self.is_playing:
+            await asyncio.sleep(0.05)
 
     async def stop_playback(self):
-        if self.stream is not None:
-            self.stream.stop()
-            self.stream = None
-
-        if self.raw_stream is not None:
-            self.raw_stream.stop()
-            self.raw_stream = None
+        if self.source is not None:
+            self.source.stop()
+            self.source = None
 
         self.is_playing = False
         await self.notify_playback_finished(self.wingman_name)
@@ -152,13 +117,15 @@ class AudioPlayer:
         else:
             raise TypeError("Invalid input type for stream_with_effects")
 
+        await self.wait_for_playback_turn()
         if self.is_playing:
             await self.stop_playback()
 
-        sound_effects = get_sound_effects(config)
+        self.__store_in_tts_cache(audio, sample_rate)
 
-        for sound_effect in sound_effects:
-            audio = sound_effect(audio, sample_rate)
+        with compile_sound_effects(config).chain() as effects_chain:
+            if effects_chain:
+                audio = effects_chain(audio, sample_rate)
 
         mixed_layer_file = None
         for effect in config.effects:
@@ -179,30 +146,49 @@ class AudioPlayer:
         elif config.play_beep_apollo:
             audio = self._add_wav_effect(audio, sample_rate, "Apollo_Beep.wav")
 
-        channels = audio.shape[1] if audio.ndim > 1 else 1
+        source: MixerSource = None
 
         def finished_callback():
-            if self.stream is not None:
-                self.stream.close()
-                self.stream = None
-            self.is_playing = False
+            if self.source is source:
+                self.source = None
+                self.is_playing = False
+            # stop_playback notifies on its own
+            if source.is_stopped:
+                return
             if self.event_queue is not None and callable(self.on_playback_finished):
                 finished_event = (self.on_playback_finished, wingman_name)
                 coroutine = self.event_queue.put(finished_event)
                 if self.event_loop:
                     asyncio.run_coroutine_threadsafe(coroutine, self.event_loop)
 
-        playback_thread = Thread(
-            target=self.start_playback,
-            args=(audio, sample_rate, channels, finished_callback, config.volume),
-        )
-        playback_thread.start()
-
         self.is_playing = True
         self.wingman_name = wingman_name
+        source = self.start_playback(
+            audio, sample_rate, finished_callback, config.volume
+        )
 
         await self.notify_playback_started(wingman_name)
 
+    def __to_stream_event_pcm(
+        self, audio: np.ndarray, channels: int, resampler: StreamResampler
+    ) -> bytes:
+        """Converts normalized float samples to the 16-bit mono PCM of the stream event."""
+        frames = audio.reshape(-1, channels)
+        if channels > 1:
+            frames = frames.mean(axis=1, keepdims=True)
+        frames = resampler.process(frames)
+        return (
+            (np.clip(frames, -1.0, 1.0) * np.iinfo(np.int16).max)
+            .astype(np.int16)
+            .tobytes()
+        )
+
+    def __store_in_tts_cache(self, audio: np.ndarray, sample_rate: int):
+        """Stores the raw (effect-free) speech if a cacheable text is being synthesized."""
+        cache_key = pending_cache_key.get()
+        if cache_key:
+            Runtime().run(TtsCache().store, cache_key, audio, sample_rate)
+
     async def notify_playback_started(
         self, wingman_name: str, publish_event: bool = True
     ):
@@ -219,19 +205,29 @@ class AudioPlayer:
         if callable(self.on_playback_finished):
             await self.on_playback_finished(wingman_name)
 
-    def play_wav_sample(self, audio_sample_file: str, volume: float):
-        file_path = path.join(self.sample_dir, audio_sample_file)
-        self.play_wav(file_path, volume)
-
-    def play_wav(self, audio_file: str, volume: list[float] | float):
+    def play_wav_sample(
+        self, audio_sample_file: str, volume: float, wait: bool = False
+    ) -> MixerSource:
+        audio, sample_rate = self.get_audio_from_sample(audio_sample_file)
+        source = self.start_playback(audio, sample_rate, volume=volume)
+        if wait:
+            source.finished.wait()
+        return source
+
+    def play_wav(
+        self, audio_file: str, volume: list[float] | float, wait: bool = False
+    ) -> MixerSource:
+        """Plays a WAV file without waiting for it. If wait is True, this blocks until the playback has finished."""
         audio, sample_rate = self.get_audio_from_file(audio_file)
-        with wave.open(audio_file, "rb") as audio_file:
-            num_channels = audio_file.getnchannels()
-        self.start_playback(audio, sample_rate, num_channels, None, volume)
+        source = self.start_playback(audio, sample_rate, volume=volume)
+        if wait:
+            source.finished.wait()
+        return source
 
-    def play_mp3(self, audio_sample_file: str, volume: list[float] | float):
-        audio, sample_rate = self.get_audio_from_file(audio_sample_file)
-        self.start_playback(audio, sample_rate, 2, None, volume)
+    def play_mp3(
+        self, audio_sample_file: str, volume: list[float] | float, wait: bool = False
+    ) -> MixerSource:
+        return self.play_wav(audio_sample_file, volume, wait)
 
     async def play_audio_file(
         self,
@@ -241,16 +237,54 @@ class AudioPlayer:
         publish_event: bool = True,
     ):
         await self.notify_playback_started(wingman_name, publish_event)
-        if filename.endswith(".mp3"):
-            self.play_mp3(filename, volume)
-        elif filename.endswith(".wav"):
-            self.play_wav(filename, volume)
-        await self.notify_playback_finished(wingman_name, publish_event)
+        if not filename.endswith((".mp3", ".wav")):
+            await self.notify_playback_finished(wingman_name, publish_event)
+            return
+
+        audio, sample_rate = self.get_audio_from_file(filename)
+        self.is_playing = True
+        self.wingman_name = wingman_name
+        source = self.start_playback(
+            audio, sample_rate, volume=volume, priority=PRIORITY_BACKGROUND
+        )
+        while not source.is_finished:
+            await asyncio.sleep(0.05)
+
+        # stop_playback notifies on its own
+        if not source.is_stopped:
+            self.is_playing = False
+            await self.notify_playback_finished(wingman_name, publish_event)
 
     def get_audio_from_file(self, filename: str) -> tuple:
         audio, sample_rate = sf.read(filename, dtype="float32")
         return audio, sample_rate
 
+    def get_audio_from_sample(self, audio_sample_file: str) -> tuple:
+        """Returns a cached sample, already converted to the format of the output mixer."""
+        mixer = get_output_mixer()
+        return self.sample_cache.get(
+            audio_sample_file, mixer.sample_rate, mixer.channels
+        )
+
+    async def prepare_sound(self, config: SoundConfig):
+        """Compiles the effects and loads the samples of a sound config, so that the first playback doesn't have to."""
+        # compile the effects before the first playback needs them
+        compile_sound_effects(config)
+
+        audio_sample_files = get_sample_files(config)
+        if not audio_sample_files:
+            return
+
+        def preload():
+            mixer = get_output_mixer()
+            self.sample_cache.preload(
+                audio_sample_files,
+                # mixer output (beeps) and the default rate of streamed TTS (noise layers)
+                formats=[(mixer.sample_rate, mixer.channels), (16000, 1)],
+            )
+
+        await asyncio.to_thread(preload)
+
     def _get_audio_from_stream(self, stream: bytes) -> tuple:
         audio, sample_rate = sf.read(io.BytesIO(stream), dtype="float32")
         return audio, sample_rate
@@ -258,13 +292,7 @@ class AudioPlayer:
     def _add_wav_effect(
         self, audio: np.ndarray, sample_rate: int, audio_sample_file: str
     ) -> np.ndarray:
-        beep_audio, beep_sample_rate = self.get_audio_from_file(
-            path.join(self.sample_dir, audio_sample_file)
-        )
-
-        # Resample the beep sound if necessary to match the sample rate of 'audio'
-        if beep_sample_rate != sample_rate:
-            beep_audio = self._resample_audio(beep_audio, beep_sample_rate, sample_rate)
+        beep_audio, _ = self.sample_cache.get(audio_sample_file, sample_rate)
 
         # Ensure beep_audio has the same number of channels as 'audio'
         if beep_audio.ndim == 1 and audio.ndim == 2:
@@ -278,19 +306,6 @@ class AudioPlayer:
 
         return audio_with_beeps
 
-    def _resample_audio(
-        self, audio: np.ndarray, original_sample_rate: int, target_sample_rate: int
-    ) -> np.ndarray:
-        # Calculate the number of samples after resampling
-        num_original_samples = audio.shape[0]
-        num_target_samples = int(
-            round(num_original_samples * target_sample_rate / original_sample_rate)
-        )
-        # Use scipy.signal resample method to resample the audio to the target sample rate
-        resampled_audio = resample(audio, num_target_samples)
-
-        return resampled_audio
-
     def _mix_in_layer(
         self,
         audio: np.ndarray,
@@ -298,14 +313,7 @@ class AudioPlayer:
         mix_layer_file: str,
         mix_layer_gain_boost_db: float = 0.0,
     ) -> np.ndarray:
-        noise_audio, noise_sample_rate = self.get_audio_from_file(
-            path.join(self.sample_dir, mix_layer_file)
-        )
-
-        if noise_sample_rate != sample_rate:
-            noise_audio = self._resample_audio(
-                noise_audio, noise_sample_rate, sample_rate
-            )
+        noise_audio, _ = self.sample_cache.get(mix_layer_file, sample_rate)
 
         # Ensure both audio and noise_audio have compatible shapes for addition
         if noise_audio.ndim == 1:
@@ -343,9 +351,6 @@ class AudioPlayer:
         dtype="int16",
         use_gain_boost=False,
     ):
-        buffer = bytearray()
-        stream_finished = False
-        data_received = False
         mixed_pos = 0
 
         mix_layer_file = None
@@ -357,20 +362,18 @@ class AudioPlayer:
                     mix_layer_gain_boost_db += get_azure_workaround_gain_boost(effect)
 
         if mix_layer_file:
-            noise_audio, noise_sample_rate = self.get_audio_from_file(
-                path.join(self.sample_dir, mix_layer_file)
+            noise_audio, _ = self.sample_cache.get(
+                mix_layer_file, sample_rate, channels
             )
-            if noise_sample_rate != sample_rate:
-                noise_audio = self._resample_audio(
-                    noise_audio, noise_sample_rate, sample_rate
-                )
-            if channels > 1 and noise_audio.ndim == 1:
-                noise_audio = np.tile(noise_audio[:, None], (1, channels))
-            noise_audio = noise_audio.flatten()
+            # interleaved, like the streamed samples
+            noise_audio = noise_audio.ravel()
+
+        # reused for every chunk, the streamed chunks never exceed the buffer size
+        mixed_chunk = np.zeros(buffer_size, dtype=np.float32)
 
         def get_mixed_chunk(length):
             nonlocal mixed_pos, noise_audio
-            chunk = np.zeros(length, dtype=np.float32)
+            chunk = mixed_chunk[:length]
             remaining = length
             while remaining > 0:
                 if mixed_pos >= len(noise_audio):
@@ -388,107 +391,155 @@ class AudioPlayer:
                 mixed_pos = mixed_pos + num_samples_to_copy
             return chunk
 
-        def callback(outdata, frames, time, status):
-            nonlocal buffer, stream_finished, data_received, mixed_pos
-            if data_received and len(buffer) == 0:
-                stream_finished = True
-                outdata[:] = bytes(len(outdata))  # Fill the buffer with zeros
-                return
+        # the provider already streams into its buffer meanwhile
+        await self.wait_for_playback_turn()
+        if self.is_playing:
+            await self.stop_playback()
 
-            if len(buffer) > 0:
-                num_elements = frames * channels
-                byte_size = np.dtype(dtype).itemsize
-                data_chunk = np.frombuffer(
-                    buffer[: num_elements * byte_size], dtype=dtype
-                ).astype(np.float32)
+        mixer = get_output_mixer()
+        source = mixer.create_source(sample_rate=sample_rate, volume=config.volume)
+        self.source = source
+        self.is_playing = True
+        self.wingman_name = wingman_name
 
-                if len(data_chunk) < num_elements:
-                    data_chunk = np.pad(
-                        data_chunk, (0, num_elements - len(data_chunk)), "constant"
-                    )
+        contains_high_end_radio = SoundEffect.HIGH_END_RADIO in config.effects
+        if config.play_beep:
+            source.append_clip(*self.get_audio_from_sample("beep.wav"))
+        elif config.play_beep_apollo:
+            source.append_clip(*self.get_audio_from_sample("Apollo_Beep.wav"))
+        if contains_high_end_radio:
+            source.append_clip(*self.get_audio_from_sample("Radio_Static_Beep.wav"))
 
-                if channels > 1 and data_chunk.ndim == 1:
-                    data_chunk = np.tile(data_chunk[:, None], (1, channels)).flatten()
+        mixer.add_source(source)
+        await self.notify_playback_started(wingman_name)
+
+        sound_effects = compile_sound_effects(config, use_gain_boost)
+        # the mixer works with normalized float samples
+        scale = (
+            1.0 / np.iinfo(dtype).max
+            if np.issubdtype(np.dtype(dtype), np.integer)
+            else 1.0
+        )
+        effects_chain = sound_effects.acquire()
+        cache_chunks = [] if pending_cache_key.get() else None
+        stream_event_resampler = StreamResampler(sample_rate, STREAM_EVENT_SAMPLE_RATE)
+        try:
+            item_size = np.dtype(dtype).itemsize
+            # Convert gain boost from dB to amplitude factor
+            amplitude_factor = 10 ** (mix_layer_gain_boost_db / 20)
+            audio_buffer = bytearray(buffer_size)
+            # the buffer callback blocks until the provider delivered the next chunk
+            filled_size = await asyncio.to_thread(buffer_callback, audio_buffer)
+            while filled_size > 0 and not source.is_stopped:
+                # a view on the filled part, the only copy is the conversion to float
+                data_in_numpy = np.frombuffer(
+                    audio_buffer, dtype=dtype, count=filled_size // item_size
+                ).astype(np.float32)
+                if cache_chunks is not None:
+                    cache_chunks.append(data_in_numpy * scale)
 
-                data_chunk = data_chunk[: frames * channels]
+                if effects_chain:
+                    data_in_numpy = effects_chain(data_in_numpy, sample_rate, reset=False)
 
                 if mix_layer_file:
-                    mix_chunk = get_mixed_chunk(len(data_chunk))
-                    # Convert gain boost from dB to amplitude factor
-                    amplitude_factor = 10 ** (mix_layer_gain_boost_db / 20)
-                    data_chunk = (
-                        data_chunk + mix_chunk[: len(data_chunk)] * amplitude_factor
+                    noise_chunk = get_mixed_chunk(len(data_in_numpy))
+                    noise_chunk *= amplitude_factor
+                    data_in_numpy += noise_chunk
+
+                source.append(data_in_numpy * scale, channels)
+                if self.stream_event.subscribers.get("audio"):
+                    processed_buffer = self.__to_stream_event_pcm(
+                        data_in_numpy * (scale * config.volume),
+                        channels,
+                        stream_event_resampler,
                     )
-
-                data_chunk = data_chunk.flatten()
-                data_chunk = data_chunk * config.volume
-                data_chunk_bytes = data_chunk.astype(dtype).tobytes()
-                outdata[: len(data_chunk_bytes)] = data_chunk_bytes[: len(outdata)]
-                buffer = buffer[num_elements * byte_size :]
-
-        with sd.RawOutputStream(
-            samplerate=sample_rate,
-            channels=channels,
-            dtype=dtype,
-            callback=callback,
-        ) as stream:
-            if self.is_playing:
+                    await self.stream_event.publish("audio", processed_buffer)
+                filled_size = await asyncio.to_thread(buffer_callback, audio_buffer)
+        except asyncio.CancelledError:
+            # the turn was superseded, so the rest of the speech is dropped
+            if self.source is source:
                 await self.stop_playback()
+            else:
+                source.stop()
+            raise
+        finally:
+            sound_effects.release(effects_chain)
+
+        if cache_chunks and not source.is_stopped:
+            self.__store_in_tts_cache(
+                np.concatenate(cache_chunks).reshape(-1, channels), sample_rate
+            )
 
-            self.raw_stream = stream
-            self.is_playing = True
-            await self.notify_playback_started(wingman_name)
-
-            if config.play_beep:
-                self.play_wav_sample("beep.wav", config.volume)
-            elif config.play_beep_apollo:
-                self.play_wav_sample("Apollo_Beep.wav", config.volume)
-
-            contains_high_end_radio = SoundEffect.HIGH_END_RADIO in config.effects
-            if contains_high_end_radio:
-                self.play_wav_sample("Radio_Static_Beep.wav", config.volume)
-
-            self.raw_stream.start()
+        if contains_high_end_radio:
+            source.append_clip(*self.get_audio_from_sample("Radio_Static_Beep.wav"))
+        if config.play_beep:
+            source.append_clip(*self.get_audio_from_sample("beep.wav"))
+        elif config.play_beep_apollo:
+            source.append_clip(*self.get_audio_from_sample("Apollo_Beep.wav"))
+        source.close()
 
-            sound_effects = get_sound_effects(
-                config=config, use_gain_boost=use_gain_boost
-            )
-            audio_buffer = bytearray(buffer_size)
-            filled_size = buffer_callback(audio_buffer)
-            while filled_size > 0:
-                data_in_numpy = np.frombuffer(
-                    audio_buffer[:filled_size], dtype=dtype
-                ).astype(np.float32)
+        while not source.is_finished:
+            await asyncio.sleep(0.05)
 
-                for sound_effect in sound_effects:
-                    data_in_numpy = sound_effect(
-                        data_in_numpy, sample_rate, reset=False
-                    )
+        # stop_playback notifies on its own
+        if not source.is_stopped:
+            if self.source is source:
+                self.source = None
+                self.is_playing = False
+            await self.notify_playback_finished(wingman_name)
 
-                if mix_layer_file:
-                    noise_chunk = get_mixed_chunk(len(data_in_numpy))
-                    # Convert gain boost from dB to amplitude factor
-                    amplitude_factor = 10 ** (mix_layer_gain_boost_db / 20)
-                    data_in_numpy = data_in_numpy + noise_chunk * amplitude_factor
+    async def stream_from_producer(
+        self,
+        producer: Callable[[PcmRingBuffer], Any],
+        config: SoundConfig,
+        wingman_name: str,
+        use_gain_boost=False,
+        sample_rate=16000,
+        channels=1,
+        dtype="int16",
+    ):
+        """Streams PCM that a blocking producer writes into a ring buffer, e.g. from a network stream.
 
-                data_in_numpy = data_in_numpy * config.volume
-                processed_buffer = data_in_numpy.astype(dtype).tobytes()
-                buffer.extend(processed_buffer)
-                await self.stream_event.publish("audio", processed_buffer)
-                filled_size = buffer_callback(audio_buffer)
+        The producer runs while the audio is played, so it can read ahead until the ring buffer is full.
+        Blocking producers run in a worker thread. Async producers run on the event loop
+        and must write with `await asyncio.to_thread(ring_buffer.write, data)`.
+        Producers should stop writing once write() returns less than it was given (playback stopped).
+        """
+        ring_buffer = PcmRingBuffer(frame_size=np.dtype(dtype).itemsize * channels)
 
-            data_received = True
-            while not stream_finished:
-                sd.sleep(100)
+        if asyncio.iscoroutinefunction(producer):
 
-            contains_high_end_radio = SoundEffect.HIGH_END_RADIO in config.effects
-            if contains_high_end_radio:
-                self.play_wav_sample("Radio_Static_Beep.wav", config.volume)
+            async def produce():
+                try:
+                    await producer(ring_buffer)
+                finally:
+                    ring_buffer.close()
 
-            if config.play_beep:
-                self.play_wav_sample("beep.wav", config.volume)
-            elif config.play_beep_apollo:
-                self.play_wav_sample("Apollo_Beep.wav", config.volume)
+            production = asyncio.ensure_future(produce())
+        else:
 
-            self.is_playing = False
-            await self.notify_playback_finished(wingman_name)
+            def produce():
+                try:
+                    producer(ring_buffer)
+                finally:
+                    ring_buffer.close()
+
+            production = asyncio.ensure_future(asyncio.to_thread(produce))
+        try:
+            await self.stream_with_effects(
+                buffer_callback=ring_buffer.readinto,
+                config=config,
+                wingman_name=wingman_name,
+                sample_rate=sample_rate,
+                channels=channels,
+                dtype=dtype,
+                use_gain_boost=use_gain_boost,
+            )
+        except asyncio.CancelledError:
+            production.cancel()
+            raise
+        finally:
+            # unblocks the producer if the playback stopped early
+            ring_buffer.abort()
+        # surfaces errors of the producer, e.g. HTTP errors
+        await production
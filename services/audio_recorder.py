@@ -1,39 +1,46 @@
-from os import path
 from threading import Lock
 import time
 from typing import Callable
-import io
 import numpy
 import sounddevice
-import soundfile
 import speech_recognition as sr
 from speech_recognition import AudioData
 from scipy.signal import butter, filtfilt
 from api.enums import CommandTag, LogType
 from api.interface import VoiceActivationSettings
 from services.printr import Printr
-from services.file import get_writable_dir
+from services.recorded_audio import RecordedAudio
+from services.ring_buffer import AudioRingBuffer
 
 
 RECORDING_PATH = "audio_output"
 RECORDING_FILE: str = "recording.wav"
 CONTINUOUS_RECORDING_FILE: str = "continuous_recording.wav"
 
+DEFAULT_PRE_ROLL = 0.3
+"""Seconds of audio before the push-to-talk key press that are added to the recording."""
+MAX_RECORDING_LENGTH = 120
+"""Push-to-talk recordings longer than this (in seconds) are cut at the start."""
+
 
 class AudioRecorder:
     def __init__(
         self,
-        on_speech_recorded: Callable[[str], None],
+        on_speech_recorded: Callable[[RecordedAudio], None],
         samplerate: int = 16000,
         channels: int = 1,
+        pre_roll: float = DEFAULT_PRE_ROLL,
     ):
         self.printr = Printr()
         self.on_speech_recorded = on_speech_recorded
-        self.file_path = path.join(get_writable_dir(RECORDING_PATH), RECORDING_FILE)
         self.samplerate = samplerate
         self.channels = channels
         self.is_recording = False
-        self.recording_data = None
+        self.pre_roll = pre_roll
+        self.recording_start = 0
+        self.ring_buffer = self.__create_ring_buffer()
+        self.ring_buffer_lock = Lock()
+        """Held by the input stream callback while writing, so the ring buffer can be swapped safely."""
         self.recstream = None
         self.va_settings: VoiceActivationSettings = None
 
@@ -50,16 +57,37 @@ class AudioRecorder:
         self.valid_mic = True
         self.valid_mic = self.update_input_stream()
 
+    def __create_ring_buffer(self) -> AudioRingBuffer:
+        return AudioRingBuffer(
+            capacity=int((MAX_RECORDING_LENGTH + self.pre_roll) * self.samplerate),
+            channels=self.channels,
+        )
+
+    def set_pre_roll(self, pre_roll: float):
+        with self.ring_buffer_lock:
+            if pre_roll == self.pre_roll or self.is_recording:
+                return
+            self.pre_roll = pre_roll
+            ring_buffer = self.__create_ring_buffer()
+            # keep the latest audio, so the next recording has its pre-roll right away
+            ring_buffer.write(
+                self.ring_buffer.read(self.ring_buffer.position - ring_buffer.capacity)
+            )
+            self.ring_buffer = ring_buffer
+
     def update_input_stream(self) -> bool:
         if self.recstream is not None:
             self.recstream.close()
 
         try:
+            # the stream is always open so that recordings start instantly and can include the pre-roll
             self.recstream = sounddevice.InputStream(
                 callback=self.__handle_input_stream,
                 channels=self.channels,
                 samplerate=self.samplerate,
+                dtype="float32",
             )
+            self.recstream.start()
             self.microphone = sr.Microphone(
                 sample_rate=self.samplerate,
                 device_index=sounddevice.default.device[0], # default input device
@@ -73,11 +101,8 @@ class AudioRecorder:
             return False
 
     def __handle_input_stream(self, indata, _frames, _time, _status):
-        if self.is_recording:
-            if self.recording_data is None:
-                self.recording_data = indata.copy()
-            else:
-                self.recording_data = numpy.concatenate((self.recording_data, indata))
+        with self.ring_buffer_lock:
+            self.ring_buffer.write(indata)
 
     # Push to talk:
 
@@ -85,27 +110,32 @@ class AudioRecorder:
         if self.is_recording or not self.recstream:
             return
 
-        self.recstream.start()
-        self.is_recording = True
+        with self.ring_buffer_lock:
+            self.recording_start = self.ring_buffer.position
+            self.is_recording = True
         self.printr.print(
             f"Recording started ({wingman_name})",
             source_name=wingman_name,
             command_tag=CommandTag.RECORDING_STARTED,
         )
 
-    def stop_recording(self, wingman_name) -> None | str:
-        if not self.recstream:
+    def stop_recording(self, wingman_name) -> None | RecordedAudio:
+        if not self.recstream or not self.is_recording:
             return None
 
-        self.recstream.stop()
-        self.is_recording = False
+        with self.ring_buffer_lock:
+            self.is_recording = False
+            recording_length = self.ring_buffer.position - self.recording_start
+            recording_data = self.ring_buffer.read(
+                self.recording_start - int(self.pre_roll * self.samplerate)
+            )
         self.printr.print(
             f"Recording stopped ({wingman_name})",
             source_name=wingman_name,
             command_tag=CommandTag.RECORDING_STOPPED,
         )
 
-        if self.recording_data is None:
+        if len(recording_data) == 0:
             self.printr.print(
                 f"Ignored empty recording ({wingman_name})",
                 color=LogType.WARNING,
@@ -113,7 +143,7 @@ class AudioRecorder:
                 command_tag=CommandTag.IGNORED_RECORDING,
             )
             return None
-        if (len(self.recording_data) / self.samplerate) < 0.15:
+        if (recording_length / self.samplerate) < 0.15:
             self.printr.print(
                 f"Recording was too short to be handled by {wingman_name}",
                 color=LogType.WARNING,
@@ -122,22 +152,13 @@ class AudioRecorder:
             )
             return None
 
-        try:
-            soundfile.write(self.file_path, self.recording_data, self.samplerate)
-            self.recording_data = None
-            return self.file_path
-        except IndexError:
-            self.printr.print(
-                "Ignored empty recording",
-                color=LogType.WARNING,
-                source_name=wingman_name,
-                command_tag=CommandTag.IGNORED_RECORDING,
-            )
-            return None
+        return RecordedAudio.from_array(
+            recording_data, self.samplerate, name=RECORDING_FILE
+        )
 
     # Continuous listening:
 
-    def contains_speech(self, audio_bytes: bytes, energy_threshold: float):
+    def contains_speech(self, recording: RecordedAudio, energy_threshold: float):
         def butter_bandpass(lowcut: int, highcut: int, sample_rate, order):
             nyq = 0.5 * sample_rate
             low = lowcut / nyq
@@ -154,10 +175,9 @@ class AudioRecorder:
             y = filtfilt(b, a, audio_data)
             return y
 
-        audio_data, sample_rate = soundfile.read(io.BytesIO(audio_bytes))
         filtered_audio = butter_bandpass_filter(
-            audio_data=audio_data,
-            sample_rate=sample_rate,
+            audio_data=recording.get_mono_samples(),
+            sample_rate=recording.sample_rate,
             lowcut=85,
             highcut=500,
             order=5,
@@ -169,11 +189,16 @@ class AudioRecorder:
         return False, rms_energy
 
     def __handle_continuous_listening(self, _recognizer, audio: AudioData):
-        audio_bytes = audio.get_wav_data()
+        recording = RecordedAudio(
+            pcm=audio.get_raw_data(),
+            sample_rate=audio.sample_rate,
+            sample_width=audio.sample_width,
+            name=CONTINUOUS_RECORDING_FILE,
+        )
 
         # skip early if the recording is just noise
         contains_speech, recorded_energy = self.contains_speech(
-            audio_bytes=audio_bytes, energy_threshold=self.va_settings.energy_threshold
+            recording=recording, energy_threshold=self.va_settings.energy_threshold
         )
         if not contains_speech:
             self.printr.print(
@@ -182,14 +207,8 @@ class AudioRecorder:
             )
             return
 
-        file_path = path.join(
-            get_writable_dir(RECORDING_PATH), CONTINUOUS_RECORDING_FILE
-        )
-        with open(file_path, "wb") as audio_file:
-            audio_file.write(audio_bytes)
-
         if callable(self.on_speech_recorded):
-            self.on_speech_recorded(file_path)
+            self.on_speech_recorded(recording)
 
     def adjust_for_ambient_noise(self):
         with self.lock:
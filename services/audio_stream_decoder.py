@@ -0,0 +1,54 @@
+import io
+from typing import Optional
+import numpy as np
+import soundfile as sf
+
+FIRST_DECODE_SIZE = 4096
+"""Bytes of compressed audio needed before the first samples are decoded (~0.7s of 48 kbit/s mp3)."""
+HOLDBACK_FRAMES = 2048
+"""Decoded frames at the end that are kept back until more data arrived, because the last (partial) mp3 frames aren't final yet."""
+
+
+class AudioStreamDecoder:
+    """Decodes a compressed audio stream (e.g. mp3) in memory while it's still being received.
+
+    Compressed frames depend on their neighbours, so the received data is decoded from the start every time and
+    only the new samples are returned. The decoding happens whenever the data doubled in size,
+    which keeps the total work below twice a single decoding of the whole stream.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.emitted_frames = 0
+        self.next_decode_size = FIRST_DECODE_SIZE
+        self.sample_rate: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> Optional[np.ndarray]:
+        """Adds received data. Returns the newly decoded float32 samples, if any."""
+        self.data += chunk
+        if len(self.data) < self.next_decode_size:
+            return None
+        self.next_decode_size = len(self.data) * 2
+        return self.__decode(final=False)
+
+    def finish(self) -> Optional[np.ndarray]:
+        """Returns the remaining samples once the stream is complete."""
+        if not self.data:
+            return None
+        return self.__decode(final=True)
+
+    def __decode(self, final: bool) -> Optional[np.ndarray]:
+        try:
+            audio, self.sample_rate = sf.read(io.BytesIO(self.data), dtype="float32")
+        except sf.LibsndfileError:
+            if final:
+                raise
+            # e.g. not even the header is complete yet
+            return None
+
+        end = len(audio) if final else len(audio) - HOLDBACK_FRAMES
+        if end <= self.emitted_frames:
+            return None
+        samples = audio[self.emitted_frames : end]
+        self.emitted_frames = end
+        return samples
@@ -0,0 +1,179 @@
+import copy
+import hashlib
+import os
+import pickle
+import time
+from os import path
+from typing import Any, Callable, Optional
+from api.enums import LogType
+from services.printr import Printr
+from services.system_manager import LOCAL_VERSION
+
+CACHE_FORMAT = 1
+"""Bump this if the structure of the cached data changes."""
+UNSTABLE_MTIME_SECONDS = 2
+"""Files modified more recently than this are always hashed, because a quick re-write may keep the same mtime and size."""
+
+printr = Printr()
+
+
+class ConfigCache:
+    """Compiled snapshot of the config files, persisted as pickle between launches.
+
+    Files are identified by a content hash. The hash is only recomputed if the mtime or size of a file changed,
+    so unchanged files are neither read nor parsed again. Besides the parsed YAML files, the cache stores the
+    validated and merged Wingman configs together with the hashes of all files they were built from
+    (the Wingman file, defaults.yaml and the default configs of its skills).
+
+    Everything returned is a copy, so callers can modify it without corrupting the cache.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.signatures: dict[str, tuple[int, int, str]] = {}
+        """file path -> (mtime_ns, size, digest)"""
+        self.parsed: dict[str, tuple[str, Any]] = {}
+        """file path -> (digest, parsed content)"""
+        self.compiled: dict[str, tuple[dict[str, str], Any]] = {}
+        """key -> (digests of the dependencies by file path, compiled object)"""
+        self.is_dirty = False
+        self.__load()
+
+    def get_digest(self, file_path: str) -> Optional[str]:
+        """Returns the content hash of a file or None if it doesn't exist."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            self.signatures.pop(file_path, None)
+            return None
+
+        signature = self.signatures.get(file_path)
+        is_stable = time.time() - stat.st_mtime > UNSTABLE_MTIME_SECONDS
+        if (
+            signature
+            and is_stable
+            and signature[0] == stat.st_mtime_ns
+            and signature[1] == stat.st_size
+        ):
+            return signature[2]
+
+        try:
+            with open(file_path, "rb") as file:
+                digest = hashlib.sha1(file.read()).hexdigest()
+        except OSError:
+            return None
+
+        if is_stable:
+            self.signatures[file_path] = (stat.st_mtime_ns, stat.st_size, digest)
+            self.is_dirty = True
+        return digest
+
+    def read(self, file_path: str, parse: Callable[[str], Any]) -> Any:
+        """Returns the parsed content of a file. The file is only parsed again if its content changed.
+
+        Results of None (e.g. parse errors) aren't cached, so they are reported again.
+        """
+        digest = self.get_digest(file_path)
+        cached = self.parsed.get(file_path)
+        if digest and cached and cached[0] == digest:
+            return copy.deepcopy(cached[1])
+
+        parsed = parse(file_path)
+        if digest and parsed is not None:
+            self.parsed[file_path] = (digest, copy.deepcopy(parsed))
+            self.is_dirty = True
+        return parsed
+
+    def get_compiled(self, key: str) -> Any:
+        """Returns a copy of a compiled object if none of the files it was built from changed."""
+        cached = self.compiled.get(key)
+        if not cached:
+            return None
+
+        dependencies, compiled = cached
+        for file_path, digest in dependencies.items():
+            if self.get_digest(file_path) != digest:
+                return None
+        return copy.deepcopy(compiled)
+
+    def get_dependencies(self, key: str) -> list[str]:
+        """Returns the paths of the files a compiled object was built from."""
+        cached = self.compiled.get(key)
+        return list(cached[0].keys()) if cached else []
+
+    def set_compiled(self, key: str, compiled: Any, file_paths: list[str]):
+        """Stores a compiled object along with the files it was built from."""
+        dependencies = {}
+        for file_path in file_paths:
+            digest = self.get_digest(file_path)
+            if digest is None:
+                # don't cache things built from files that are gone
+                return
+            dependencies[file_path] = digest
+
+        self.compiled[key] = (dependencies, copy.deepcopy(compiled))
+        self.is_dirty = True
+
+    def save(self):
+        """Persists the cache if it changed. Files that no longer exist are dropped."""
+        if not self.is_dirty:
+            return
+
+        self.signatures = {
+            file_path: signature
+            for file_path, signature in self.signatures.items()
+            if path.exists(file_path)
+        }
+        self.parsed = {
+            file_path: parsed
+            for file_path, parsed in self.parsed.items()
+            if file_path in self.signatures
+        }
+        self.compiled = {
+            key: compiled
+            for key, compiled in self.compiled.items()
+            if all(file_path in self.signatures for file_path in compiled[0])
+        }
+
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                pickle.dump(
+                    {
+                        "version": LOCAL_VERSION,
+                        "format": CACHE_FORMAT,
+                        "signatures": self.signatures,
+                        "parsed": self.parsed,
+                        "compiled": self.compiled,
+                    },
+                    file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_path, self.cache_path)
+            self.is_dirty = False
+        except Exception as e:
+            printr.print(
+                f"Could not write the config cache: {str(e)}",
+                color=LogType.WARNING,
+                server_only=True,
+            )
+
+    def __load(self):
+        if not path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "rb") as file:
+                data = pickle.load(file)
+            if (
+                data.get("version") != LOCAL_VERSION
+                or data.get("format") != CACHE_FORMAT
+            ):
+                return
+            self.signatures = data["signatures"]
+            self.parsed = data["parsed"]
+            self.compiled = data["compiled"]
+        except Exception:
+            # an outdated or corrupt cache is simply rebuilt
+            self.signatures = {}
+            self.parsed = {}
+            self.compiled = {}
@@ -1,7 +1,8 @@
 import base64
 from enum import Enum
 import json
-from os import makedirs, path, remove, walk
+import hashlib
+from os import makedirs, path, remove, scandir, walk
 import copy
 import shutil
 from typing import Optional, Tuple
@@ -17,8 +18,10 @@ from api.interface import (
     WingmanConfig,
     WingmanConfigFileInfo,
 )
+from services.config_cache import ConfigCache
 from services.file import get_writable_dir
 from services.printr import Printr
+from services.system_manager import LOCAL_VERSION
 
 TEMPLATES_DIR = "templates"
 CONFIGS_DIR = "configs"
@@ -29,6 +32,8 @@ DEFAULT_CONFIG_FILE = "defaults.yaml"
 SECRETS_FILE = "secrets.yaml"
 DEFAULT_WINGMAN_AVATAR = "default-wingman-avatar.png"
 DEFAULT_SKILLS_CONFIG = "default_config.yaml"
+TEMPLATES_MANIFEST_FILE = "templates_manifest.json"
+CONFIG_CACHE_FILE = "config_cache.pickle"
 
 DELETED_PREFIX = "."
 DEFAULT_PREFIX = "_"
@@ -42,6 +47,9 @@ class ConfigManager:
         self.templates_dir = path.join(app_root_path, TEMPLATES_DIR)
         self.config_dir = get_writable_dir(CONFIGS_DIR)
         self.skills_dir = get_writable_dir(SKILLS_DIR)
+        self.config_cache = ConfigCache(
+            path.join(get_writable_dir(), CONFIG_CACHE_FILE)
+        )
 
         self.copy_templates()
 
@@ -122,71 +130,187 @@ class ConfigManager:
         )
 
     def copy_templates(self, force: bool = False):
-        for root, dirs, files in walk(self.templates_dir):
-            relative_path = path.relpath(root, self.templates_dir)
-            if relative_path != ".":
-                config_dir_name = (
-                    relative_path.replace(DELETED_PREFIX, "", 1)
-                    .replace(DEFAULT_PREFIX, "", 1)
-                    .replace(f"{CONFIGS_DIR}{path.sep}", "", 1)
-                    .replace("/", path.sep)
+        """Creates the files from the templates that don't exist in the user directory yet.
+
+        The templates are synced in independent parts (e.g. "configs/defaults.yaml", "skills/timer" or "migration/1_6_0").
+        A manifest with a hash of each part is stored next to the configs. If it was written by the running version
+        and all parts still exist, the templates aren't walked at all. Otherwise only new or changed parts
+        and parts whose target is missing are synced.
+        """
+        manifest_path = path.join(get_writable_dir(), TEMPLATES_MANIFEST_FILE)
+        manifest = self.__load_templates_manifest(manifest_path)
+        known_hashes: dict[str, str] = manifest.get("templates", {})
+        config_names = {config.name for config in self.get_config_dirs()}
+
+        if (
+            not force
+            and manifest.get("version") == LOCAL_VERSION
+            and all(
+                self.__template_part_exists(part, config_names)
+                for part in known_hashes
+            )
+        ):
+            return
+
+        hashes = {}
+        for part in self.__get_template_parts():
+            hashes[part] = self.__hash_template_part(part)
+            if (
+                force
+                or known_hashes.get(part) != hashes[part]
+                or not self.__template_part_exists(part, config_names)
+            ):
+                self.__sync_template_part(part, config_names, force)
+
+        try:
+            with open(manifest_path, "w", encoding="UTF-8") as file:
+                json.dump({"version": LOCAL_VERSION, "templates": hashes}, file)
+        except OSError as e:
+            self.printr.print(
+                f"Could not write the templates manifest: {str(e)}",
+                color=LogType.WARNING,
+                server_only=True,
+                source=LogSource.SYSTEM,
+                source_name=self.log_source_name,
+            )
+
+    def __load_templates_manifest(self, manifest_path: str) -> dict:
+        if not path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, "r", encoding="UTF-8") as file:
+                manifest = json.load(file)
+            return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def __get_template_parts(self) -> list[str]:
+        """Gets the parts of the templates that are synced independently: everything one level below the top-level directories."""
+        parts = []
+        for entry in sorted(scandir(self.templates_dir), key=lambda e: e.name):
+            if entry.name == ".DS_Store":
+                continue
+            if not entry.is_dir():
+                parts.append(entry.name)
+                continue
+            for child in sorted(scandir(entry.path), key=lambda e: e.name):
+                if child.name != ".DS_Store":
+                    parts.append(f"{entry.name}/{child.name}")
+        return parts
+
+    def __hash_template_part(self, part: str) -> str:
+        """Hashes the paths and sizes of the files in a template part.
+
+        Existing files are never overwritten (unless forced), so only added and removed files matter for the sync.
+        """
+        part_path = path.join(self.templates_dir, *part.split("/"))
+        digest = hashlib.sha1()
+        if path.isfile(part_path):
+            digest.update(f"{part}:{path.getsize(part_path)}".encode())
+            return digest.hexdigest()
+
+        for root, dirs, files in walk(part_path):
+            dirs.sort()
+            for filename in sorted(files):
+                file_path = path.join(root, filename)
+                relative_path = path.relpath(file_path, self.templates_dir)
+                digest.update(
+                    f"{relative_path.replace(path.sep, '/')}:{path.getsize(file_path)}\n".encode()
                 )
-                config_dir = self.get_config_dir(config_dir_name)
-                if not force and config_dir:
-                    # skip logically deleted and default (renamed) config dirs
-                    continue
-
-            # Create the same relative path in the target directory
-            target_path = get_writable_dir(
-                relative_path if relative_path != "." else ""
+        return digest.hexdigest()
+
+    def __get_template_config_name(self, relative_path: str) -> str:
+        return (
+            relative_path.replace(DELETED_PREFIX, "", 1)
+            .replace(DEFAULT_PREFIX, "", 1)
+            .replace(f"{CONFIGS_DIR}{path.sep}", "", 1)
+            .replace("/", path.sep)
+        )
+
+    def __template_part_exists(self, part: str, config_names: set[str]) -> bool:
+        """Checks if the target of a template part exists in the user directory."""
+        relative_path = path.join(*part.split("/"))
+        template_path = path.join(self.templates_dir, relative_path)
+        target_path = path.join(get_writable_dir(), relative_path)
+
+        if path.isdir(template_path):
+            if self.__get_template_config_name(relative_path) in config_names:
+                # logically deleted and default (renamed) config dirs count as well
+                return True
+            return path.exists(target_path)
+
+        if target_path.endswith(".yaml"):
+            target_dir, filename = path.split(target_path.replace(".template", ""))
+            return path.exists(path.join(target_dir, filename)) or path.exists(
+                path.join(target_dir, f"{DELETED_PREFIX}{filename}")
             )
+        return path.exists(target_path)
 
-            if not path.exists(target_path):
-                makedirs(target_path)
+    def __sync_template_part(self, part: str, config_names: set[str], force: bool):
+        part_path = path.join(self.templates_dir, *part.split("/"))
+        if path.isfile(part_path):
+            root, filename = path.split(part_path)
+            self.__copy_template_files(root, [filename], force)
+            return
 
-            for filename in files:
-                # yaml files
-                if filename == ".DS_Store":
-                    continue
+        for root, _, files in walk(part_path):
+            relative_path = path.relpath(root, self.templates_dir)
+            if (
+                not force
+                and self.__get_template_config_name(relative_path) in config_names
+            ):
+                # skip logically deleted and default (renamed) config dirs
+                continue
+            self.__copy_template_files(root, files, force)
 
-                if filename.endswith(".yaml"):
-                    new_filename = filename.replace(".template", "")
-                    new_filepath = path.join(target_path, new_filename)
-                    already_exists = path.exists(new_filepath)
-                    # don't recreate Wingmen configs starting with "." (logical deleted)
-                    logical_deleted = path.exists(
-                        path.join(target_path, f".{new_filename}")
+    def __copy_template_files(self, root: str, files: list[str], force: bool):
+        relative_path = path.relpath(root, self.templates_dir)
+        # Create the same relative path in the target directory
+        target_path = get_writable_dir(relative_path if relative_path != "." else "")
+
+        for filename in files:
+            # yaml files
+            if filename == ".DS_Store":
+                continue
+
+            if filename.endswith(".yaml"):
+                new_filename = filename.replace(".template", "")
+                new_filepath = path.join(target_path, new_filename)
+                already_exists = path.exists(new_filepath)
+                # don't recreate Wingmen configs starting with "." (logical deleted)
+                logical_deleted = path.exists(
+                    path.join(target_path, f".{new_filename}")
+                )
+                if logical_deleted:
+                    self.printr.print(
+                        f"Skipping creation of {new_filepath} because it is marked as deleted.",
+                        color=LogType.WARNING,
+                        server_only=True,
+                        source=LogSource.SYSTEM,
+                        source_name=self.log_source_name,
                     )
-                    if logical_deleted:
-                        self.printr.print(
-                            f"Skipping creation of {new_filepath} because it is marked as deleted.",
-                            color=LogType.WARNING,
-                            server_only=True,
-                            source=LogSource.SYSTEM,
-                            source_name=self.log_source_name,
-                        )
 
-                    if force or (not already_exists and not logical_deleted):
-                        shutil.copyfile(path.join(root, filename), new_filepath)
-                        self.printr.print(
-                            f"Created config {new_filepath} from template.",
-                            color=LogType.INFO,
-                            server_only=True,
-                            source=LogSource.SYSTEM,
-                            source_name=self.log_source_name,
-                        )
-                else:
-                    new_filepath = path.join(target_path, filename)
-                    already_exists = path.exists(new_filepath)
-                    if force or not already_exists:
-                        shutil.copyfile(path.join(root, filename), new_filepath)
-                        self.printr.print(
-                            f"Created file {new_filepath} from template.",
-                            color=LogType.INFO,
-                            server_only=True,
-                            source=LogSource.SYSTEM,
-                            source_name=self.log_source_name,
-                        )
+                if force or (not already_exists and not logical_deleted):
+                    shutil.copyfile(path.join(root, filename), new_filepath)
+                    self.printr.print(
+                        f"Created config {new_filepath} from template.",
+                        color=LogType.INFO,
+                        server_only=True,
+                        source=LogSource.SYSTEM,
+                        source_name=self.log_source_name,
+                    )
+            else:
+                new_filepath = path.join(target_path, filename)
+                already_exists = path.exists(new_filepath)
+                if force or not already_exists:
+                    shutil.copyfile(path.join(root, filename), new_filepath)
+                    self.printr.print(
+                        f"Created file {new_filepath} from template.",
+                        color=LogType.INFO,
+                        server_only=True,
+                        source=LogSource.SYSTEM,
+                        source_name=self.log_source_name,
+                    )
 
     def get_config_dirs(self) -> list[ConfigDirInfo]:
         """Gets all config dirs."""
@@ -289,26 +413,53 @@ class ConfigManager:
     def parse_config(
         self, config_dir: Optional[ConfigDirInfo] = None
     ) -> Tuple[ConfigDirInfo, Config]:
-        """Loads and validates a config. If no config_dir is given, the default config is loaded."""
+        """Loads and validates a config. If no config_dir is given, the default config is loaded.
+
+        Merged and validated configs are taken from the config cache, so only changed Wingman files are parsed and validated again.
+        """
         if not config_dir:
             config_dir = self.find_default_config()
 
         config_path = path.join(self.config_dir, config_dir.directory)
-        default_config = self.read_default_config()
+        wingman_files = [
+            path.join(root, filename)
+            for root, _, files in walk(config_path)
+            for filename in files
+            if filename.endswith(".yaml") and not filename.startswith(".")
+        ]
+        # adding or removing a Wingman changes the key
+        snapshot_key = f"config:{config_path}:{'|'.join(wingman_files)}"
+        validated_config = self.config_cache.get_compiled(snapshot_key)
+        if validated_config:
+            return config_dir, validated_config
 
-        for root, _, files in walk(config_path):
-            for filename in files:
-                if filename.endswith(".yaml") and not filename.startswith("."):
-                    wingman_config = self.read_config(path.join(root, filename))
-                    merged_config = self.merge_configs(default_config, wingman_config)
-                    default_config["wingmen"][
-                        filename.replace(".yaml", "")
-                    ] = merged_config
+        default_config = self.read_default_config()
+        dependencies = [self.default_config_path]
+        for file_path in wingman_files:
+            merged_config = self.config_cache.get_compiled(file_path)
+            if merged_config:
+                dependencies.extend(self.config_cache.get_dependencies(file_path))
+            else:
+                wingman_config = self.config_cache.read(file_path, self.read_config)
+                merged_config = self.merge_configs(default_config, wingman_config)
+                wingman_dependencies = [file_path, self.default_config_path] + [
+                    self.__get_skill_default_config_path(skill["module"])
+                    for skill in wingman_config.get("skills") or []
+                ]
+                self.config_cache.set_compiled(
+                    file_path, merged_config, wingman_dependencies
+                )
+                dependencies.extend(wingman_dependencies)
+            default_config["wingmen"][
+                path.basename(file_path).replace(".yaml", "")
+            ] = merged_config
 
         validated_config = Config(**default_config)
         # not catching ValidationExceptions here, because we can't recover from it
         # TODO: Notify the client about the error somehow
 
+        self.config_cache.set_compiled(snapshot_key, validated_config, dependencies)
+        self.config_cache.save()
         return config_dir, validated_config
 
     def rename_config(self, config_dir: ConfigDirInfo, new_name: str):
@@ -655,7 +806,7 @@ class ConfigManager:
         return False
 
     def read_default_config(self):
-        config = self.read_config(self.default_config_path)
+        config = self.config_cache.read(self.default_config_path, self.read_config)
         config["wingmen"] = {}
         return config
 
@@ -932,6 +1083,10 @@ class ConfigManager:
         # Convert merged commands back to a list since that's the expected format
         return list(merged_commands.values())
 
+    def __get_skill_default_config_path(self, module: str) -> str:
+        skill_dir = module.replace(".main", "").replace(".", "/").split("/")[1]
+        return path.join(self.skills_dir, skill_dir, DEFAULT_SKILLS_CONFIG)
+
     def merge_configs(self, default: Config, wingman):
         """Merge general settings with a specific wingman's overrides, including commands."""
         # Start with a copy of the wingman's specific config to keep it intact.
@@ -957,10 +1112,14 @@ class ConfigManager:
             "perplexity",
         ]:
             if key in default:
-                # Use copy.deepcopy to ensure a full deep copy is made and original is untouched.
-                merged[key] = self.__deep_merge(
-                    copy.deepcopy(default[key]), wingman.get(key, {})
-                )
+                if wingman.get(key):
+                    # Use copy.deepcopy to ensure a full deep copy is made and original is untouched.
+                    merged[key] = self.__deep_merge(
+                        copy.deepcopy(default[key]), wingman[key]
+                    )
+                else:
+                    # the validation creates new models, so untouched defaults can be shared by all Wingmen
+                    merged[key] = default[key]
 
         # Commands
         if "commands" in default and "commands" in wingman:
@@ -975,17 +1134,12 @@ class ConfigManager:
         if "skills" in wingman:
             merged_skills = []
             for skill_config_wingman in wingman["skills"]:
-                skill_dir = (
-                    skill_config_wingman["module"]
-                    .replace(".main", "")
-                    .replace(".", "/")
-                    .split("/")[1]
-                )
-
-                skill_default_config_path = path.join(
-                    self.skills_dir, skill_dir, DEFAULT_SKILLS_CONFIG
+                skill_config = self.config_cache.read(
+                    self.__get_skill_default_config_path(
+                        skill_config_wingman["module"]
+                    ),
+                    self.read_config,
                 )
-                skill_config = self.read_config(skill_default_config_path)
                 skill_config = self.__deep_merge(skill_config, skill_config_wingman)
 
                 merged_skills.append(skill_config)
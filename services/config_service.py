@@ -311,6 +311,7 @@ class ConfigService:
         updated = await wingman.update_config(
             config=wingman_config, validate=validate, update_skills=update_skills
         )
+        self.tower.index_record_keys()
 
         if not updated:
             self.printr.toast_error(
@@ -371,6 +372,7 @@ class ConfigService:
             wingman_config.azure.tts.voice = basic_config.voice
 
         updated = await wingman.update_config(config=wingman_config, validate=validate)
+        self.tower.index_record_keys()
 
         if not updated:
             self.printr.toast_error(
@@ -0,0 +1,316 @@
+from collections import deque
+from collections.abc import Mapping
+from typing import Iterator, Optional
+from pydantic import BaseModel
+from services.token_estimator import estimate_message_tokens
+
+
+def get_message_role(message) -> Optional[str]:
+    """Returns the role of a message regardless of its type (dict or ChatCompletionMessage)."""
+    if isinstance(message, Mapping):
+        return message.get("role")
+    elif hasattr(message, "role"):
+        return message.role
+    else:
+        raise TypeError(
+            f"Message is neither a mapping nor has a 'role' attribute: {message}"
+        )
+
+
+class ConversationEntry:
+    """A message in the conversation history, linked to its neighbours."""
+
+    __slots__ = (
+        "message",
+        "role",
+        "tool_call_id",
+        "serialized",
+        "tokens",
+        "assistant",
+        "pending",
+        "pending_tool_calls",
+        "removed",
+        "prev",
+        "next",
+    )
+
+    def __init__(self, message):
+        self.message = message
+        self.role = get_message_role(message)
+        self.tool_call_id: Optional[str] = (
+            message.get("tool_call_id") if self.role == "tool" else None
+        )
+        self.serialized: Optional[dict] = None
+        self.tokens = estimate_message_tokens(self.serialize())
+        self.assistant: Optional[ConversationEntry] = None
+        """For tool responses: the assistant message that made the tool call."""
+        self.pending = False
+        """For tool responses: whether it's still a dummy response."""
+        self.pending_tool_calls = 0
+        """For assistant messages: the number of their tool responses that are still pending."""
+        self.removed = False
+        self.prev: Optional[ConversationEntry] = None
+        self.next: Optional[ConversationEntry] = None
+
+    def serialize(self) -> dict:
+        """Returns the message as dict like the LLM providers expect it. Models are only dumped once."""
+        if self.serialized is None:
+            if isinstance(self.message, BaseModel):
+                # just like the OpenAI SDK serializes models
+                self.serialized = self.message.model_dump(exclude_unset=True)
+            else:
+                self.serialized = self.message
+        return self.serialized
+
+
+class ConversationStore:
+    """The conversation history of a Wingman.
+
+    A linked list of messages with an index of the tool responses by their tool_call_id,
+    so appending, trimming old messages, updating tool responses and moving completed tool call blocks
+    don't get slower as the conversation grows. The serialized messages and their estimated tokens are cached for the LLM calls.
+    """
+
+    def __init__(self):
+        self.head: Optional[ConversationEntry] = None
+        self.tail: Optional[ConversationEntry] = None
+        self.length = 0
+        self.user_message_count = 0
+        self.token_count = 0
+        """The estimated tokens of all messages."""
+        self.last_user: Optional[ConversationEntry] = None
+        self.tool_responses: dict[str, ConversationEntry] = {}
+        self.pending_tool_calls: set[str] = set()
+        self.last_assistant: Optional[ConversationEntry] = None
+        self.__serialized: Optional[deque[dict]] = deque()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator:
+        entry = self.head
+        while entry:
+            yield entry.message
+            entry = entry.next
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("conversation index out of range")
+
+        # walk from the nearer end, so the first and last messages are found right away
+        if index < self.length // 2:
+            entry = self.head
+            for _ in range(index):
+                entry = entry.next
+        else:
+            entry = self.tail
+            for _ in range(self.length - 1 - index):
+                entry = entry.prev
+        return entry.message
+
+    def append(self, message) -> ConversationEntry:
+        """Adds a message (dict or ChatCompletionMessage) to the end of the conversation."""
+        entry = ConversationEntry(message)
+        self.__link_tail(entry)
+        self.length += 1
+        self.token_count += entry.tokens
+
+        if entry.role == "user":
+            self.user_message_count += 1
+            self.last_user = entry
+        elif entry.role == "assistant":
+            self.last_assistant = entry
+        elif entry.role == "tool":
+            entry.assistant = self.last_assistant
+            if entry.tool_call_id:
+                self.tool_responses[entry.tool_call_id] = entry
+
+        if self.__serialized is not None:
+            self.__serialized.append(entry.serialize())
+        return entry
+
+    def add_tool_response(self, message: dict, pending: bool = False):
+        """Adds a tool response. Pending (dummy) responses are completed later with update_tool_response."""
+        entry = self.append(message)
+        if pending and entry.tool_call_id:
+            entry.pending = True
+            self.pending_tool_calls.add(entry.tool_call_id)
+            if entry.assistant:
+                entry.assistant.pending_tool_calls += 1
+
+    def update_tool_response(self, tool_call_id: str, content: str) -> tuple[bool, bool]:
+        """Sets the content of a tool response.
+
+        Once all tool responses of an assistant message are complete, the whole block
+        (triggering user messages, the assistant message and its tool responses) is moved to the end of the conversation.
+
+        Returns:
+            tuple[bool, bool]: Whether the tool response was found and whether its block was moved.
+        """
+        entry = self.tool_responses.get(tool_call_id)
+        if not entry:
+            return False, False
+
+        # dict messages are serialized as they are, so the cache stays valid
+        entry.message["content"] = content
+        tokens = estimate_message_tokens(entry.serialize())
+        self.token_count += tokens - entry.tokens
+        entry.tokens = tokens
+        if not entry.pending:
+            return True, False
+
+        entry.pending = False
+        self.pending_tool_calls.discard(tool_call_id)
+        assistant = entry.assistant
+        if not assistant or assistant.removed:
+            return True, False
+
+        assistant.pending_tool_calls -= 1
+        if assistant.pending_tool_calls > 0:
+            return True, False
+
+        return True, self.__move_block_to_end(assistant)
+
+    def trim(self, remember_user_messages: int) -> tuple[int, list[str]]:
+        """Removes the oldest messages so that only the last remember_user_messages - 1 user messages remain,
+        leaving room for the next one.
+
+        Returns:
+            tuple[int, list[str]]: The number of deleted messages and the ids of pending tool calls that were dropped.
+        """
+        deleted = 0
+        dropped_tool_calls = []
+        while self.head and self.user_message_count >= remember_user_messages:
+            entry = self.__remove_head()
+            deleted += 1
+            if entry.pending:
+                dropped_tool_calls.append(entry.tool_call_id)
+
+        # tool responses can't be sent without the assistant message that made the tool call
+        while self.head and self.head.role == "tool":
+            entry = self.__remove_head()
+            deleted += 1
+            if entry.pending:
+                dropped_tool_calls.append(entry.tool_call_id)
+
+        return deleted, dropped_tool_calls
+
+    def trim_to_budget(self, max_tokens: int) -> tuple[int, list[str]]:
+        """Removes the oldest messages until the estimated tokens fit into max_tokens.
+
+        Tool calls are never separated from their responses and the latest user message (and everything after it) is always kept.
+
+        Returns:
+            tuple[int, list[str]]: The number of deleted messages and the ids of pending tool calls that were dropped.
+        """
+        deleted = 0
+        dropped_tool_calls = []
+        while (
+            self.head
+            and self.head is not self.last_user
+            and (self.token_count > max_tokens or self.head.role == "tool")
+        ):
+            entry = self.__remove_head()
+            deleted += 1
+            if entry.pending:
+                dropped_tool_calls.append(entry.tool_call_id)
+
+        return deleted, dropped_tool_calls
+
+    def clear(self):
+        entry = self.head
+        while entry:
+            entry.removed = True
+            entry = entry.next
+        self.__init__()
+
+    def get_messages(self) -> list[dict]:
+        """Returns a new list of the serialized messages that can be extended with context and passed to the LLM.
+
+        The messages themselves are shared with the history and must not be modified.
+        """
+        if self.__serialized is None:
+            self.__serialized = deque()
+            entry = self.head
+            while entry:
+                self.__serialized.append(entry.serialize())
+                entry = entry.next
+        return list(self.__serialized)
+
+    def __move_block_to_end(self, assistant: ConversationEntry) -> bool:
+        # the block starts with the user message(s) right before the assistant message
+        start = assistant
+        while start.prev and start.prev.role == "user":
+            start = start.prev
+
+        # and ends before the next user message after the tool responses
+        end = assistant
+        reached_tool_call = False
+        while end.next:
+            if end.next.role == "tool":
+                reached_tool_call = True
+            elif reached_tool_call and end.next.role == "user":
+                break
+            end = end.next
+
+        if end is self.tail:
+            return False
+
+        # cut the block out and append it
+        if start.prev:
+            start.prev.next = end.next
+        else:
+            self.head = end.next
+        end.next.prev = start.prev
+        start.prev = self.tail
+        self.tail.next = start
+        end.next = None
+        self.tail = end
+
+        self.__serialized = None
+        return True
+
+    def __remove_head(self) -> ConversationEntry:
+        entry = self.head
+        self.__unlink(entry)
+        self.length -= 1
+        self.token_count -= entry.tokens
+        entry.removed = True
+        if self.__serialized is not None:
+            # the head is always the first serialized message
+            self.__serialized.popleft()
+
+        if entry is self.last_user:
+            self.last_user = None
+        if entry is self.last_assistant:
+            self.last_assistant = None
+
+        if entry.role == "user":
+            self.user_message_count -= 1
+        elif entry.tool_call_id:
+            if self.tool_responses.get(entry.tool_call_id) is entry:
+                del self.tool_responses[entry.tool_call_id]
+            self.pending_tool_calls.discard(entry.tool_call_id)
+        return entry
+
+    def __link_tail(self, entry: ConversationEntry):
+        entry.prev = self.tail
+        if self.tail:
+            self.tail.next = entry
+        else:
+            self.head = entry
+        self.tail = entry
+
+    def __unlink(self, entry: ConversationEntry):
+        if entry.prev:
+            entry.prev.next = entry.next
+        else:
+            self.head = entry.next
+        if entry.next:
+            entry.next.prev = entry.prev
+        else:
+            self.tail = entry.prev
+        entry.prev = None
+        entry.next = None
@@ -1,11 +1,9 @@
 import asyncio
 import json
-from os import path
-import wave
 
 from fastapi import WebSocket, WebSocketDisconnect
 
-from services.file import get_writable_dir
+from services.recorded_audio import RecordedAudio
 from wingman_core import WingmanCore
 
 
@@ -14,11 +12,7 @@ class Esp32Handler:
         self.to_device = asyncio.Queue()
         self.core = core
         self.wait_for_response = False
-        self.recording_path = "audio_output"
         self.recording_file = "client_recording.wav"
-        self.recording_file_path = path.join(
-            get_writable_dir(self.recording_path), self.recording_file
-        )
 
         core.audio_player.stream_event.subscribe("audio", self.handle_stream_playback)
         core.audio_player.playback_events.subscribe("started", self.handle_start)
@@ -54,17 +48,17 @@ class Esp32Handler:
                             if "start" in data:
                                 byte_string = b''
                             elif "end" in data:
-                                # Set the parameters for the WAV file
-                                nchannels = 1  # Mono audio
-                                sampwidth = 2  # 2 bytes per sample for 16-bit audio
-                                framerate = 16000  # Sample rate
+                                # the device sends 16-bit mono PCM at 16 kHz
+                                recording = RecordedAudio(
+                                    pcm=byte_string,
+                                    sample_rate=16000,
+                                    channels=1,
+                                    sample_width=2,
+                                    name=self.recording_file,
+                                )
 
-                                # Save the received stream of bytes as a WAV file
-                                loop = asyncio.get_event_loop()
-                                await loop.run_in_executor(None, self.save_wav, byte_string, nchannels, sampwidth, framerate)
-                                
                                 self.wait_for_response = True
-                                self.core.on_audio_recorder_speech_recorded(self.recording_file_path)
+                                self.core.on_audio_recorder_speech_recorded(recording)
 
                     except json.JSONDecodeError:
                         pass  # data is not JSON, leave it as is
@@ -92,13 +86,6 @@ class Esp32Handler:
                 await self.to_device.put(message)
                 raise
 
-    def save_wav(self, data, nchannels, sampwidth, framerate):
-        with wave.open(self.recording_file_path, "wb") as wf:
-            wf.setnchannels(nchannels)
-            wf.setsampwidth(sampwidth)
-            wf.setframerate(framerate)
-            wf.writeframes(data)
-
     def direct_stream(self, audio_bytes):
         chunk_size = 2048
 
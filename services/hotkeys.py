@@ -0,0 +1,71 @@
+from collections import defaultdict
+from functools import lru_cache
+from typing import Generic, Optional, TypeVar
+import keyboard.keyboard as keyboard
+from api.enums import LogType
+from services.printr import Printr
+
+printr = Printr()
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=256)
+def parse_hotkey(hotkey: str) -> frozenset[int]:
+    """Returns the scan codes of all keys of a hotkey string like 'ctrl+shift+a'."""
+    hotkey_codes = keyboard.parse_hotkey(hotkey)
+    return frozenset(item[0] for step in hotkey_codes for item in step)
+
+
+def get_hotkey_codes(hotkey: list[int] | str) -> frozenset[int]:
+    """Returns the scan codes of a hotkey given as string or as list of scan codes."""
+    if isinstance(hotkey, str):
+        return parse_hotkey(hotkey)
+    if isinstance(hotkey, list):
+        return frozenset(hotkey)
+    return frozenset()
+
+
+class HotkeyIndex(Generic[T]):
+    """Dispatch table that maps hotkeys to values (e.g. Wingmen).
+
+    Hotkeys are parsed once when added and indexed by each of their scan codes,
+    so a key event only checks the few hotkeys that contain the pressed key.
+    """
+
+    def __init__(self):
+        self.hotkeys_by_code: dict[int, list[tuple[int, frozenset[int], T]]] = (
+            defaultdict(list)
+        )
+        self.count = 0
+
+    def add(self, hotkey: list[int] | str, value: T):
+        try:
+            codes = get_hotkey_codes(hotkey)
+        except ValueError as e:
+            printr.print(
+                f"Invalid hotkey '{hotkey}': {e}",
+                color=LogType.WARNING,
+                server_only=True,
+            )
+            return
+        if not codes:
+            return
+
+        entry = (self.count, codes, value)
+        self.count += 1
+        for code in codes:
+            self.hotkeys_by_code[code].append(entry)
+
+    def find(self, scan_code: int, pressed_codes: dict | set) -> Optional[T]:
+        """Returns the value of the hotkey that was completed by pressing scan_code.
+
+        If several hotkeys match, the one added last wins.
+        """
+        match = None
+        for order, codes, value in self.hotkeys_by_code.get(scan_code, ()):
+            if (match is None or order > match[0]) and all(
+                code in pressed_codes for code in codes
+            ):
+                match = (order, value)
+        return match[1] if match else None
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from typing import Optional
+from weakref import WeakKeyDictionary
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_CONNECTIONS = 100
+"""The maximum number of open connections of the async client, across all hosts."""
+MAX_CONNECTIONS_PER_HOST = 10
+"""The maximum number of kept-alive connections to a single host."""
+MAX_HOSTS = 20
+"""The number of hosts the blocking session keeps a connection pool for."""
+KEEPALIVE_EXPIRY = 60
+"""Idle connections are closed after this many seconds."""
+DEFAULT_TIMEOUT = 120
+
+
+class HttpClients:
+    """Singleton registry of the shared HTTP clients, so that providers and skills reuse warm connections
+    instead of paying DNS, TCP and TLS setup for every request.
+
+    - get_async_client(): an httpx.AsyncClient per event loop, e.g. for providers and the OpenAI SDK.
+    - get_session(): a requests.Session with a connection pool per host, for blocking calls (e.g. in skills or worker threads).
+
+    Pass the timeout per request. Don't close the returned clients, they are closed on shutdown.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(HttpClients, cls).__new__(cls)
+            cls._instance.lock = threading.Lock()
+            cls._instance.async_clients = WeakKeyDictionary()
+            cls._instance.session = None
+            cls._instance.max_connections = MAX_CONNECTIONS
+            cls._instance.max_connections_per_host = MAX_CONNECTIONS_PER_HOST
+            cls._instance.keepalive_expiry = KEEPALIVE_EXPIRY
+        return cls._instance
+
+    def configure(
+        self,
+        max_connections: Optional[int] = None,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+    ):
+        """Changes the connection limits. Clients created from now on use them, existing ones are kept until they are closed."""
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if max_connections_per_host is not None:
+            self.max_connections_per_host = max_connections_per_host
+        if keepalive_expiry is not None:
+            self.keepalive_expiry = keepalive_expiry
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """Returns the async client of the running event loop. Async clients can't be shared across loops."""
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            client = self.async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(
+                    timeout=DEFAULT_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections_per_host,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                )
+                self.async_clients[loop] = client
+            return client
+
+    def get_session(self) -> requests.Session:
+        """Returns the shared blocking session. It's safe to use from several threads as long as you don't change its state (headers, cookies)."""
+        with self.lock:
+            if self.session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=MAX_HOSTS,
+                    pool_maxsize=self.max_connections_per_host,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.session = session
+            return self.session
+
+    async def close(self):
+        """Closes all clients. They are re-created on the next use."""
+        with self.lock:
+            async_clients = list(self.async_clients.items())
+            self.async_clients = WeakKeyDictionary()
+            session = self.session
+            self.session = None
+
+        running_loop = asyncio.get_running_loop()
+        for loop, client in async_clients:
+            if loop is running_loop:
+                await client.aclose()
+            elif not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        if session:
+            session.close()
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    return HttpClients().get_async_client()
+
+
+def get_http_session() -> requests.Session:
+    return HttpClients().get_session()
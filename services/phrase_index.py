@@ -0,0 +1,111 @@
+from collections import defaultdict
+from difflib import SequenceMatcher
+import re
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+NORMALIZE_PATTERN = re.compile(r"[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_phrase(phrase: str) -> str:
+    """Lowercases the phrase and removes punctuation and redundant whitespace."""
+    phrase = NORMALIZE_PATTERN.sub(" ", phrase.lower())
+    return WHITESPACE_PATTERN.sub(" ", phrase).strip()
+
+
+def get_trigrams(phrase: str) -> set[str]:
+    # pad so that short phrases and word borders produce trigrams, too
+    padded = f"  {phrase} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PhraseIndex(Generic[T]):
+    """Maps phrases to values and finds the best match for a spoken text.
+
+    Built once, then looked up in this order:
+    1. exact (case-insensitive) match
+    2. normalized match (punctuation and whitespace ignored)
+    3. fuzzy match: candidates that share trigrams with the text are scored by their trigram overlap
+       and only the best ones are verified with difflib's similarity ratio.
+    """
+
+    def __init__(self, max_candidates: int = 5):
+        self.max_candidates = max_candidates
+        self.exact: dict[str, list[T]] = {}
+        self.normalized: dict[str, list[T]] = {}
+        self.trigrams: dict[str, list[str]] = defaultdict(list)
+        """Maps trigrams to the normalized phrases that contain them."""
+        self.trigram_counts: dict[str, int] = {}
+
+    def add(self, phrase: str, value: T):
+        self.exact.setdefault(phrase.lower(), []).append(value)
+
+        normalized = normalize_phrase(phrase)
+        if normalized not in self.normalized:
+            self.normalized[normalized] = []
+            trigrams = get_trigrams(normalized)
+            self.trigram_counts[normalized] = len(trigrams)
+            for trigram in trigrams:
+                self.trigrams[trigram].append(normalized)
+        self.normalized[normalized].append(value)
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def find(self, text: str, cutoff: float = 0.8) -> Optional[list[T]]:
+        """Returns the values of the best matching phrase or None if no phrase is similar enough.
+
+        Args:
+            text (str): The text to match, e.g. a transcript.
+            cutoff (float): The minimum similarity ratio (0.0 - 1.0) for fuzzy matches.
+        """
+        values = self.exact.get(text.lower())
+        if values:
+            return values
+
+        normalized = normalize_phrase(text)
+        values = self.normalized.get(normalized)
+        if values:
+            return values
+
+        best_phrase = self.__find_fuzzy(normalized, cutoff)
+        return self.normalized[best_phrase] if best_phrase else None
+
+    def __find_fuzzy(self, normalized: str, cutoff: float) -> Optional[str]:
+        if not normalized or not self.normalized:
+            return None
+
+        trigrams = get_trigrams(normalized)
+        shared: dict[str, int] = defaultdict(int)
+        for trigram in trigrams:
+            for phrase in self.trigrams.get(trigram, ()):
+                shared[phrase] += 1
+        if not shared:
+            return None
+
+        # rank by Dice coefficient of the trigram sets
+        def get_trigram_score(phrase: str) -> float:
+            return 2 * shared[phrase] / (len(trigrams) + self.trigram_counts[phrase])
+
+        candidates = sorted(shared, key=get_trigram_score, reverse=True)[
+            : self.max_candidates
+        ]
+
+        best_phrase = None
+        best_ratio = cutoff
+        matcher = SequenceMatcher()
+        matcher.set_seq2(normalized)
+        for phrase in candidates:
+            # the ratio can't reach the cutoff if the lengths differ too much
+            if 2 * min(len(phrase), len(normalized)) < cutoff * (
+                len(phrase) + len(normalized)
+            ):
+                continue
+            matcher.set_seq1(phrase)
+            ratio = matcher.ratio()
+            if ratio >= best_ratio:
+                best_phrase = phrase
+                best_ratio = ratio
+        return best_phrase
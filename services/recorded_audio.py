@@ -0,0 +1,134 @@
+import io
+import wave
+import numpy as np
+import soundfile
+
+
+class RecordedAudio:
+    """Recorded speech that is passed from the capture to the STT providers in memory, without touching the disk.
+
+    Holds raw PCM with its format or an encoded audio file (e.g. uploaded by a client). Conversions are done lazily and only once.
+    """
+
+    def __init__(
+        self,
+        pcm: bytes = None,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        sample_width: int = 2,
+        file_data: bytes = None,
+        name: str = "recording.wav",
+    ):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        """Bytes per sample, e.g. 2 for 16-bit audio."""
+        self.file_data = file_data
+        self.name = name
+        """The file name reported to the STT providers. Some use its extension to detect the format."""
+
+    @classmethod
+    def from_array(
+        cls, audio: np.ndarray, sample_rate: int, name: str = "recording.wav"
+    ) -> "RecordedAudio":
+        """Creates 16-bit PCM audio from float samples (-1.0 - 1.0) of shape (frames,) or (frames, channels)."""
+        audio = np.asarray(audio)
+        channels = 1 if audio.ndim == 1 else audio.shape[1]
+        if audio.dtype != np.int16:
+            audio = (np.clip(audio, -1.0, 1.0) * np.iinfo(np.int16).max).astype(
+                np.int16
+            )
+        return cls(
+            pcm=audio.tobytes(),
+            sample_rate=sample_rate,
+            channels=channels,
+            sample_width=2,
+            name=name,
+        )
+
+    @classmethod
+    def from_file_data(
+        cls, file_data: bytes, name: str = "recording.wav"
+    ) -> "RecordedAudio":
+        """Wraps an encoded audio file. PCM WAV files are unpacked right away, other formats when the PCM is needed."""
+        try:
+            with wave.open(io.BytesIO(file_data), "rb") as wav_file:
+                return cls(
+                    pcm=wav_file.readframes(wav_file.getnframes()),
+                    sample_rate=wav_file.getframerate(),
+                    channels=wav_file.getnchannels(),
+                    sample_width=wav_file.getsampwidth(),
+                    file_data=file_data,
+                    name=name,
+                )
+        except (wave.Error, EOFError):
+            return cls(file_data=file_data, name=name)
+
+    def concatenate(self, other: "RecordedAudio") -> "RecordedAudio | None":
+        """Returns a new recording with the other one appended or None if they can't be joined without decoding (different formats)."""
+        if (
+            self.pcm is None
+            or other.pcm is None
+            or self.sample_rate != other.sample_rate
+            or self.channels != other.channels
+            or self.sample_width != other.sample_width
+        ):
+            return None
+        return RecordedAudio(
+            pcm=self.pcm + other.pcm,
+            sample_rate=self.sample_rate,
+            channels=self.channels,
+            sample_width=self.sample_width,
+            name=self.name,
+        )
+
+    @property
+    def duration(self) -> float:
+        """The length in seconds."""
+        pcm = self.get_pcm()
+        return len(pcm) / (self.sample_rate * self.channels * self.sample_width)
+
+    def get_pcm(self) -> bytes:
+        """Returns the raw PCM. Check the format attributes only after calling this."""
+        if self.pcm is None:
+            audio, self.sample_rate = soundfile.read(
+                io.BytesIO(self.file_data), dtype="int16"
+            )
+            self.channels = 1 if audio.ndim == 1 else audio.shape[1]
+            self.sample_width = 2
+            self.pcm = audio.tobytes()
+        return self.pcm
+
+    def get_file_data(self) -> bytes:
+        """Returns the audio as file, in WAV format unless it was passed in another format."""
+        if self.file_data is None:
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as wav_file:
+                wav_file.setnchannels(self.channels)
+                wav_file.setsampwidth(self.sample_width)
+                wav_file.setframerate(self.sample_rate)
+                wav_file.writeframes(self.pcm)
+            self.file_data = buffer.getvalue()
+        return self.file_data
+
+    def get_upload(self) -> tuple[str, bytes]:
+        """Returns the (file name, content) tuple that HTTP clients and the OpenAI SDK accept as file upload."""
+        return self.name, self.get_file_data()
+
+    def get_mono_samples(self) -> np.ndarray:
+        """Returns the audio as mono float samples (-1.0 - 1.0)."""
+        pcm = self.get_pcm()
+        if self.sample_width == 2:
+            audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+            audio = audio.reshape(-1, self.channels)
+        else:
+            audio, _ = soundfile.read(
+                io.BytesIO(self.get_file_data()), dtype="float32", always_2d=True
+            )
+        return audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+
+    def save(self, file_path: str):
+        """Writes the audio to a file, e.g. for debugging."""
+        with open(file_path, "wb") as audio_file:
+            audio_file.write(self.get_file_data())
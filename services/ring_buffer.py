@@ -0,0 +1,158 @@
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Preallocated ring buffer for audio frames of shape (frames, channels).
+
+    Frames are addressed by their absolute position since the buffer was created.
+    Every block is stored twice (mirrored), so any window of up to `capacity` frames can be returned
+    as a contiguous view without copying, no matter where it wraps around.
+
+    Writing is meant for a single producer (e.g. an audio callback). Views returned by read() stay valid
+    until the producer has written `capacity` more frames.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1, dtype="float32"):
+        self.capacity = capacity
+        self.channels = channels
+        self.buffer = np.zeros((capacity * 2, channels), dtype=dtype)
+        self.position = 0
+        """The absolute position of the next frame to be written."""
+
+    def write(self, frames: np.ndarray):
+        count = len(frames)
+        if count == 0:
+            return
+        if count > self.capacity:
+            # only the newest frames fit
+            self.position += count - self.capacity
+            frames = frames[-self.capacity :]
+            count = self.capacity
+
+        start = self.position % self.capacity
+        first = min(count, self.capacity - start)
+        # main copy
+        self.buffer[start : start + first] = frames[:first]
+        self.buffer[: count - first] = frames[first:]
+        # mirrored copy
+        self.buffer[self.capacity + start : self.capacity + start + first] = frames[
+            :first
+        ]
+        if count > first:
+            self.buffer[self.capacity : self.capacity + count - first] = frames[first:]
+
+        self.position += count
+
+    def get_oldest_position(self) -> int:
+        return max(0, self.position - self.capacity)
+
+    def read(self, start: int, end: int = None) -> np.ndarray:
+        """Returns the frames from the absolute position start (inclusive) to end (exclusive) as a contiguous view.
+
+        The range is clamped to the frames that are still in the buffer.
+        """
+        end = self.position if end is None else min(end, self.position)
+        start = max(start, self.get_oldest_position())
+        if start >= end:
+            return self.buffer[:0]
+
+        offset = start % self.capacity
+        return self.buffer[offset : offset + (end - start)]
+
+    def clear(self):
+        self.position = 0
+
+
+class PcmRingBuffer:
+    """Fixed-capacity byte ring buffer between a streaming TTS producer and the playback.
+
+    The producer (e.g. a worker thread reading from a network stream) calls write() and blocks while the buffer is full,
+    so memory stays bounded no matter how long the stream is. The consumer calls readinto() with its own
+    preallocated buffer and only ever gets whole frames, so partial samples never reach the decoder.
+
+    Meant for a single producer and a single consumer thread.
+    """
+
+    def __init__(self, capacity: int = 64 * 1024, frame_size: int = 2):
+        self.capacity = capacity - capacity % frame_size
+        self.frame_size = frame_size
+        self.buffer = bytearray(self.capacity)
+        self.view = memoryview(self.buffer)
+        self.read_position = 0
+        self.size = 0
+        self.is_closed = False
+        """The producer won't write any more data."""
+        self.is_aborted = False
+        """The consumer won't read any more data."""
+        self.condition = threading.Condition()
+
+    def write(self, data) -> int:
+        """Copies a bytes-like object into the buffer, blocking while it's full.
+
+        Returns the number of bytes written, which is less than len(data) if the consumer aborted.
+        """
+        data = memoryview(data).cast("B")
+        written = 0
+        while written < len(data):
+            with self.condition:
+                while self.size == self.capacity and not self.is_aborted:
+                    self.condition.wait()
+                if self.is_aborted:
+                    break
+
+                write_position = (self.read_position + self.size) % self.capacity
+                count = min(
+                    len(data) - written,
+                    self.capacity - self.size,
+                    self.capacity - write_position,
+                )
+                self.view[write_position : write_position + count] = data[
+                    written : written + count
+                ]
+                self.size += count
+                written += count
+                self.condition.notify_all()
+        return written
+
+    def readinto(self, buffer) -> int:
+        """Fills a writable bytes-like object with whole frames, blocking until data is available.
+
+        Returns the number of bytes read or 0 once the producer closed the buffer and everything was read.
+        A trailing partial frame at the end of the stream is dropped.
+        """
+        target = memoryview(buffer).cast("B")
+        max_count = len(target) - len(target) % self.frame_size
+        with self.condition:
+            while (
+                self.size < self.frame_size
+                and not self.is_closed
+                and not self.is_aborted
+            ):
+                self.condition.wait()
+            if self.is_aborted:
+                return 0
+
+            count = min(max_count, self.size - self.size % self.frame_size)
+            first = min(count, self.capacity - self.read_position)
+            target[:first] = self.view[
+                self.read_position : self.read_position + first
+            ]
+            target[first:count] = self.view[: count - first]
+
+            self.read_position = (self.read_position + count) % self.capacity
+            self.size -= count
+            self.condition.notify_all()
+            return count
+
+    def close(self):
+        """Called by the producer at the end of the stream."""
+        with self.condition:
+            self.is_closed = True
+            self.condition.notify_all()
+
+    def abort(self):
+        """Called by the consumer to stop reading. Unblocks a waiting producer."""
+        with self.condition:
+            self.is_aborted = True
+            self.condition.notify_all()
@@ -0,0 +1,124 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import threading
+import traceback
+from typing import Callable
+from api.enums import LogType
+from services.printr import Printr
+
+printr = Printr()
+
+CORE_GROUP = "core"
+
+
+class Runtime:
+    """Singleton that runs all background work of Wingman AI Core.
+
+    Coroutines are scheduled on the main event loop and blocking functions on a bounded worker pool,
+    so we never create a thread and event loop per request.
+    Every job belongs to a named task group (usually the name of a Wingman) that can be cancelled as a whole.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Runtime, cls).__new__(cls)
+            cls._instance.loop = None
+            cls._instance.executor = ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) + 4),
+                thread_name_prefix="wingman-worker",
+            )
+            cls._instance.task_groups = {}
+            cls._instance.lock = threading.Lock()
+            cls._instance.is_shutting_down = False
+        return cls._instance
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Binds the runtime to the main event loop. Must be called once on startup."""
+        self.loop = loop
+
+    def run(
+        self, function: Callable, *args, group: str = CORE_GROUP, **kwargs
+    ) -> Future | None:
+        """Runs a coroutine function on the main loop or a blocking function on the worker pool.
+
+        Safe to call from any thread, e.g. keyboard hooks or audio callbacks.
+        Coroutines share the loop with the API server and all Wingmen, so they must wrap blocking calls in asyncio.to_thread.
+
+        Args:
+            function (Callable): The (async) function to execute.
+            *args: The arguments to pass to the function.
+            **kwargs: The keyword arguments to pass to the function.
+            group (str): The task group the job belongs to.
+
+        Returns:
+            Future | None: A thread-safe future of the result or None if the runtime is shutting down.
+        """
+        if self.is_shutting_down:
+            return None
+
+        if asyncio.iscoroutinefunction(function):
+            if not self.loop:
+                raise RuntimeError("The runtime has not been started yet.")
+            future = asyncio.run_coroutine_threadsafe(
+                function(*args, **kwargs), self.loop
+            )
+        else:
+            future = self.executor.submit(function, *args, **kwargs)
+
+        with self.lock:
+            self.task_groups.setdefault(group, set()).add(future)
+        future.add_done_callback(lambda f: self.__on_done(group, f))
+        return future
+
+    def cancel_group(self, group: str):
+        """Cancels all pending and running coroutines of a task group.
+
+        Blocking functions that are already running can't be interrupted and will run to completion.
+        """
+        with self.lock:
+            futures = list(self.task_groups.get(group, []))
+        for future in futures:
+            future.cancel()
+
+    def get_group_size(self, group: str) -> int:
+        with self.lock:
+            return len(self.task_groups.get(group, []))
+
+    async def shutdown(self, timeout: float = 5.0):
+        """Cancels all task groups, waits for them to finish and stops the worker pool."""
+        self.is_shutting_down = True
+
+        with self.lock:
+            futures = [future for group in self.task_groups.values() for future in group]
+        for future in futures:
+            future.cancel()
+
+        if futures:
+            await asyncio.wait(
+                [asyncio.wrap_future(future) for future in futures], timeout=timeout
+            )
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __on_done(self, group: str, future: Future):
+        with self.lock:
+            jobs = self.task_groups.get(group)
+            if jobs is not None:
+                jobs.discard(future)
+                if not jobs:
+                    del self.task_groups[group]
+
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error:
+            printr.print(
+                f"Unhandled error in task group '{group}': {error}\n"
+                + "".join(traceback.format_exception(error)),
+                color=LogType.ERROR,
+                server_only=True,
+            )
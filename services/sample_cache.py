@@ -0,0 +1,104 @@
+from os import path
+import threading
+from typing import Optional
+import numpy as np
+import soundfile as sf
+from services.audio_mixer import convert_audio, resample_audio
+
+SAMPLE_DIR = path.join(path.abspath(path.dirname(__file__)), "../audio_samples")
+
+
+class SampleCache:
+    """Singleton that keeps decoded audio samples (beeps, noise layers) in memory.
+
+    Every sample is read from disk only once and converted only once per sample rate and channel layout in use.
+    The returned arrays are read-only and shared, so never modify them in place.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SampleCache, cls).__new__(cls)
+            cls._instance.decoded = {}
+            cls._instance.converted = {}
+            cls._instance.lock = threading.Lock()
+        return cls._instance
+
+    def get(
+        self,
+        audio_sample_file: str,
+        sample_rate: Optional[int] = None,
+        channels: Optional[int] = None,
+    ) -> tuple[np.ndarray, int]:
+        """Returns the sample in the given format.
+
+        Args:
+            audio_sample_file (str): The file name in the audio_samples directory.
+            sample_rate (int, optional): The target sample rate. Keeps the original rate if omitted.
+            channels (int, optional): The target channel count. Keeps the original layout if omitted.
+
+        Returns:
+            tuple[np.ndarray, int]: The float32 audio and its sample rate.
+        """
+        audio, original_sample_rate = self.__get_decoded(audio_sample_file)
+        sample_rate = sample_rate or original_sample_rate
+        if sample_rate == original_sample_rate and channels is None:
+            return audio, sample_rate
+
+        key = (audio_sample_file, sample_rate, channels)
+        with self.lock:
+            converted = self.converted.get(key)
+        if converted is None:
+            converted = self.__convert(
+                audio, original_sample_rate, sample_rate, channels
+            )
+            with self.lock:
+                self.converted[key] = converted
+        return converted, sample_rate
+
+    def preload(
+        self,
+        audio_sample_files: list[str],
+        formats: Optional[list[tuple[int, Optional[int]]]] = None,
+    ):
+        """Decodes the given samples and converts them to the given (sample_rate, channels) formats.
+
+        This is blocking, so run it in a worker thread."""
+        for audio_sample_file in audio_sample_files:
+            self.get(audio_sample_file)
+            for sample_rate, channels in formats or []:
+                self.get(audio_sample_file, sample_rate, channels)
+
+    def clear(self):
+        with self.lock:
+            self.decoded.clear()
+            self.converted.clear()
+
+    def __get_decoded(self, audio_sample_file: str) -> tuple[np.ndarray, int]:
+        with self.lock:
+            decoded = self.decoded.get(audio_sample_file)
+        if decoded is None:
+            audio, sample_rate = sf.read(
+                path.join(SAMPLE_DIR, audio_sample_file), dtype="float32"
+            )
+            audio.flags.writeable = False
+            decoded = (audio, sample_rate)
+            with self.lock:
+                self.decoded[audio_sample_file] = decoded
+        return decoded
+
+    def __convert(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        target_sample_rate: int,
+        channels: Optional[int],
+    ) -> np.ndarray:
+        if channels is None:
+            audio = resample_audio(audio, sample_rate, target_sample_rate)
+        else:
+            audio = convert_audio(audio, sample_rate, target_sample_rate, channels)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        audio.flags.writeable = False
+        return audio
@@ -0,0 +1,43 @@
+import re
+
+# a sentence ends with punctuation (optionally followed by closing quotes/brackets) and whitespace, or with a line break
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?…;:。！？])[\"'”’)\]]*\s+|\n+")
+CODE_FENCE = "```"
+
+
+class SentenceSplitter:
+    """Cuts a stream of text tokens into complete sentences so that they can be synthesized while the rest is still arriving.
+
+    Sentences shorter than min_length are merged with the following one to avoid choppy TTS output.
+    Text inside Markdown code fences is never split because it gets removed before TTS anyway.
+    """
+
+    def __init__(self, min_length: int = 20):
+        self.min_length = min_length
+        self.buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Adds a text chunk and returns all sentences that are complete now."""
+        self.buffer += text
+        sentences = []
+
+        # wait for the code block to be closed
+        if self.buffer.count(CODE_FENCE) % 2 == 1:
+            return sentences
+
+        start = 0
+        for match in SENTENCE_END_PATTERN.finditer(self.buffer):
+            end = match.end()
+            if len(self.buffer[start:end].strip()) < self.min_length:
+                continue
+            sentences.append(self.buffer[start:end].strip())
+            start = end
+
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> str | None:
+        """Returns the remaining text once the stream has ended."""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return rest or None
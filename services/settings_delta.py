@@ -0,0 +1,41 @@
+from typing import Any, Iterator
+from api.interface import SettingsConfig
+
+
+class SettingsDelta:
+    """The changes between two versions of the user settings.
+
+    Changed values are addressed by their dotted path, e.g. "voice_activation.energy_threshold",
+    so components can check if something they depend on changed and skip reloading otherwise.
+    """
+
+    def __init__(self, old: SettingsConfig, new: SettingsConfig):
+        self.old = old
+        self.new = new
+        self.changed_keys = frozenset(
+            _get_changed_keys(old.model_dump(), new.model_dump())
+        )
+
+    def changed(self, *keys: str) -> bool:
+        """Checks if one of the given keys or anything below them changed, e.g. changed("voice_activation") or changed("audio.input")."""
+        return any(
+            changed_key == key or changed_key.startswith(f"{key}.")
+            for key in keys
+            for changed_key in self.changed_keys
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.changed_keys)
+
+    def __repr__(self) -> str:
+        return f"SettingsDelta({', '.join(sorted(self.changed_keys))})"
+
+
+def _get_changed_keys(old: Any, new: Any, key: str = "") -> Iterator[str]:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for name in old.keys() | new.keys():
+            yield from _get_changed_keys(
+                old.get(name), new.get(name), f"{key}.{name}" if key else name
+            )
+    elif old != new:
+        yield key
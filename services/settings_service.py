@@ -1,3 +1,4 @@
+import asyncio
 from copy import deepcopy
 from typing import Optional
 from fastapi import APIRouter
@@ -14,6 +15,10 @@ from services.config_manager import ConfigManager
 from services.config_service import ConfigService
 from services.printr import Printr
 from services.pub_sub import PubSub
+from services.settings_delta import SettingsDelta
+
+AUDIO_STREAM_SETTINGS = {"output_blocksize", "output_latency", "input_pre_roll"}
+"""Audio settings that are not device selections."""
 
 
 class SettingsService:
@@ -66,29 +71,39 @@ class SettingsService:
     # POST /settings
     async def save_settings(self, settings: SettingsConfig):
         old = deepcopy(self.config_manager.settings_config)
+        delta = SettingsDelta(old=old, new=settings)
+        if not delta:
+            return
 
         # audio devices
-        if (
-            (settings.audio is not None and old.audio is None)
-            or (settings.audio is None and old.audio is not None)
-            or (
-                settings.audio is not None
-                and old.audio is not None
-                and (
-                    settings.audio.input != old.audio.input
-                    or settings.audio.output != old.audio.output
-                )
-            )
+        if delta.changed("audio.input", "audio.output") or (
+            (settings.audio is None) != (old.audio is None)
         ):
             await self._set_audio_devices(settings.audio.input, settings.audio.output)
 
+        if settings.audio is not None:
+            audio = self.config_manager.settings_config.audio or AudioSettings()
+            audio = audio.model_copy(
+                update=settings.audio.model_dump(include=AUDIO_STREAM_SETTINGS)
+            )
+            self.config_manager.settings_config.audio = audio
+            if old.audio is None or delta.changed(
+                *[f"audio.{key}" for key in AUDIO_STREAM_SETTINGS]
+            ):
+                await self.settings_events.publish("audio_settings_changed", audio)
+
         # whispercpp
         if not self.whispercpp:
             self.printr.toast_error(
                 "Whispercpp is not initialized. Please run SettingsService.initialize()",
             )
             return
-        self.whispercpp.update_settings(settings=settings.voice_activation.whispercpp)
+        if delta.changed("voice_activation.whispercpp"):
+            # may restart the server or load a model, which blocks
+            await asyncio.to_thread(
+                self.whispercpp.update_settings,
+                settings=settings.voice_activation.whispercpp,
+            )
 
         # XVASynth
         if not self.xvasynth:
@@ -96,13 +111,16 @@ class SettingsService:
                 "XVASynth is not initialized. Please run SettingsService.initialize()",
             )
             return
-        self.xvasynth.update_settings(settings=settings.xvasynth)
+        if delta.changed("xvasynth"):
+            await asyncio.to_thread(
+                self.xvasynth.update_settings, settings=settings.xvasynth
+            )
         self.config_manager.settings_config.xvasynth = settings.xvasynth
 
         # voice activation
         self.config_manager.settings_config.voice_activation = settings.voice_activation
 
-        if settings.voice_activation.enabled != old.voice_activation.enabled:
+        if delta.changed("voice_activation.enabled"):
             await self.settings_events.publish(
                 "voice_activation_changed", settings.voice_activation.enabled
             )
@@ -111,11 +129,8 @@ class SettingsService:
                 server_only=True,
             )
 
-        if (
-            settings.voice_activation.energy_threshold
-            != old.voice_activation.energy_threshold
-            or settings.voice_activation.stt_provider
-            != old.voice_activation.stt_provider
+        if delta.changed(
+            "voice_activation.energy_threshold", "voice_activation.stt_provider"
         ):
             await self.settings_events.publish(
                 "va_settings_changed", settings.voice_activation
@@ -125,13 +140,18 @@ class SettingsService:
         # rest
         self.config_manager.settings_config.wingman_pro = settings.wingman_pro
         self.config_manager.settings_config.debug_mode = settings.debug_mode
+        self.config_manager.settings_config.debug_save_recordings = (
+            settings.debug_save_recordings
+        )
 
         # save the config file
         self.config_manager.save_settings_config()
 
-        # update running wingmen
+        # update running wingmen, they decide on their own what they have to reload
         for wingman in self.config_service.tower.wingmen:
-            await wingman.update_settings(settings=self.config_manager.settings_config)
+            await wingman.update_settings(
+                settings=self.config_manager.settings_config, delta=delta
+            )
 
     async def _set_audio_devices(
         self, input_device: Optional[int] = None, output_device: Optional[int] = None
@@ -155,9 +175,8 @@ class SettingsService:
                 hostapi=device["hostapi"],
             )
 
-        self.config_manager.settings_config.audio = AudioSettings(
-            input=input_settings,
-            output=output_settings,
+        self.config_manager.settings_config.audio = self.__get_audio_settings(
+            input_settings, output_settings
         )
 
         await self.settings_events.publish(
@@ -345,9 +364,22 @@ class SettingsService:
                 input_settings_orig != input_settings
                 or output_settings_orig != output_settings
             ):
-                self.config_manager.settings_config.audio = AudioSettings(
-                    input=input_settings, output=output_settings
+                self.config_manager.settings_config.audio = self.__get_audio_settings(
+                    input_settings, output_settings
                 )
                 self.config_manager.save_settings_config()
                 self.printr.print("Audio settings updated.", server_only=True)
-        return AudioSettings(input=input_device, output=output_device)
+        return self.__get_audio_settings(input_device, output_device)
+
+    def __get_audio_settings(
+        self,
+        input_device: Optional[int | AudioDeviceSettings],
+        output_device: Optional[int | AudioDeviceSettings],
+    ) -> AudioSettings:
+        """Returns audio settings with the given devices and the current stream settings."""
+        audio = self.config_manager.settings_config.audio
+        return AudioSettings(
+            input=input_device,
+            output=output_device,
+            **(audio.model_dump(include=AUDIO_STREAM_SETTINGS) if audio else {}),
+        )
@@ -1,5 +1,8 @@
-from enum import Enum
+from contextlib import contextmanager
+import threading
+from typing import Callable, Iterator, Optional
 from pedalboard import (
+    Plugin,
     HighpassFilter,
     LowpassFilter,
     Pedalboard,
@@ -26,166 +29,198 @@ def get_azure_workaround_gain_boost(effect: SoundEffect):
     return 0.0
 
 
+def _radio_plugins(
+    drive_db: float,
+    highpass_hz: float,
+    lowpass_hz: float,
+    resample_rate: int,
+    room_size: float,
+    gain_db: float,
+    compressor: bool = False,
+) -> list[Plugin]:
+    plugins = [
+        Distortion(drive_db=drive_db),
+        HighpassFilter(cutoff_frequency_hz=highpass_hz),
+        LowpassFilter(cutoff_frequency_hz=lowpass_hz),
+        Resample(target_sample_rate=resample_rate),  # Lower resample rate for tinny effect
+        Reverb(room_size=room_size, damping=0.3, wet_level=0.1, dry_level=0.9),
+    ]
+    if compressor:
+        plugins.append(Compressor(threshold_db=-18, ratio=4))
+    plugins.append(Gain(gain_db=gain_db))
+    return plugins
+
+
+def _high_end_radio_plugins(gain_db: float) -> list[Plugin]:
+    return [
+        HighpassFilter(cutoff_frequency_hz=100),
+        LowpassFilter(cutoff_frequency_hz=8000),  # Adjust cutoff to avoid conflicts
+        Compressor(threshold_db=-10, ratio=2),
+        Reverb(room_size=0.001, damping=0.3, wet_level=0.1, dry_level=0.9),
+        Resample(target_sample_rate=44100),
+        Gain(gain_db=gain_db),
+    ]
+
+
+def _interior_plugins(
+    delay_seconds: float, delay_mix: float, room_size: float, damping: float, width: float
+) -> list[Plugin]:
+    return [
+        Delay(
+            delay_seconds=delay_seconds, mix=delay_mix
+        ),  # Subtle delay to simulate room reflections
+        Reverb(
+            room_size=room_size,
+            damping=damping,
+            dry_level=0.7,
+            wet_level=0.3,
+            width=width,
+        ),  # Reverb to enhance room effect
+        Gain(gain_db=-3),  # Slight reduction in gain to prevent clipping
+    ]
+
+
 # Credits to our community members @JaydiCodes and @Thaendril!
-class SoundEffects(Enum):
-    AI = Pedalboard(
-        [
-            Bitcrush(
-                bit_depth=12
-            ),  # Moderate bitcrusher effect for subtle digital tone
-            Chorus(
-                rate_hz=1.5, depth=0.6, mix=0.4, centre_delay_ms=10, feedback=0.2
-            ),  # Smooth chorus for subtle modulation
-            Reverb(
-                room_size=0.1, dry_level=0.8, wet_level=0.2, freeze_mode=0.0, width=0.3
-            ),  # Light reverb for slight spatial enhancement
-            Delay(
-                delay_seconds=0.01, feedback=0.1, mix=0.1
-            ),  # Very subtle delay for slight echo
-            Gain(
-                gain_db=-1
-            ),  # Careful with gain, it adds presence but can cause peaking.
-        ]
-    )
-
-    LOW_QUALITY_RADIO = Pedalboard(
-        [
-            Distortion(drive_db=30),
-            HighpassFilter(cutoff_frequency_hz=800),
-            LowpassFilter(cutoff_frequency_hz=3400),
-            Resample(target_sample_rate=8000),  # Lower resample rate for tinny effect
-            Reverb(room_size=0.1, damping=0.3, wet_level=0.1, dry_level=0.9),
-            Gain(gain_db=-17),
-        ]
-    )
-    MEDIUM_QUALITY_RADIO = Pedalboard(
-        [
-            Distortion(drive_db=15),
-            HighpassFilter(cutoff_frequency_hz=300),
-            LowpassFilter(cutoff_frequency_hz=5000),
-            Resample(target_sample_rate=16000),
-            Reverb(room_size=0.01, damping=0.3, wet_level=0.1, dry_level=0.9),
-            Compressor(threshold_db=-18, ratio=4),
-            Gain(gain_db=4),
-        ]
-    )
-    HIGH_END_RADIO = Pedalboard(
-        [
-            HighpassFilter(cutoff_frequency_hz=100),
-            LowpassFilter(cutoff_frequency_hz=8000),  # Adjust cutoff to avoid conflicts
-            Compressor(threshold_db=-10, ratio=2),
-            Reverb(room_size=0.001, damping=0.3, wet_level=0.1, dry_level=0.9),
-            Resample(target_sample_rate=44100),
-            Gain(gain_db=2),
-        ]
-    )
+EFFECT_PLUGINS: dict[str, Callable[[], list[Plugin]]] = {
+    SoundEffect.AI.value: lambda: [
+        Bitcrush(bit_depth=12),  # Moderate bitcrusher effect for subtle digital tone
+        Chorus(
+            rate_hz=1.5, depth=0.6, mix=0.4, centre_delay_ms=10, feedback=0.2
+        ),  # Smooth chorus for subtle modulation
+        Reverb(
+            room_size=0.1, dry_level=0.8, wet_level=0.2, freeze_mode=0.0, width=0.3
+        ),  # Light reverb for slight spatial enhancement
+        Delay(
+            delay_seconds=0.01, feedback=0.1, mix=0.1
+        ),  # Very subtle delay for slight echo
+        Gain(gain_db=-1),  # Careful with gain, it adds presence but can cause peaking.
+    ],
+    SoundEffect.LOW_QUALITY_RADIO.value: lambda: _radio_plugins(
+        drive_db=30,
+        highpass_hz=800,
+        lowpass_hz=3400,
+        resample_rate=8000,
+        room_size=0.1,
+        gain_db=-17,
+    ),
+    SoundEffect.MEDIUM_QUALITY_RADIO.value: lambda: _radio_plugins(
+        drive_db=15,
+        highpass_hz=300,
+        lowpass_hz=5000,
+        resample_rate=16000,
+        room_size=0.01,
+        gain_db=4,
+        compressor=True,
+    ),
+    SoundEffect.HIGH_END_RADIO.value: lambda: _high_end_radio_plugins(gain_db=2),
     # Azure streaming workaround
-    LOW_QUALITY_RADIO_GAIN_BOOST = Pedalboard(
-        [
-            Distortion(drive_db=-65),
-            HighpassFilter(cutoff_frequency_hz=800),
-            LowpassFilter(cutoff_frequency_hz=3400),
-            Resample(target_sample_rate=8000),  # Lower resample rate for tinny effect
-            Reverb(room_size=0.1, damping=0.3, wet_level=0.1, dry_level=0.9),
-            Gain(
-                gain_db=get_azure_workaround_gain_boost(SoundEffect.LOW_QUALITY_RADIO)
-            ),
-        ]
-    )
+    f"{SoundEffect.LOW_QUALITY_RADIO.value}_GAIN_BOOST": lambda: _radio_plugins(
+        drive_db=-65,
+        highpass_hz=800,
+        lowpass_hz=3400,
+        resample_rate=8000,
+        room_size=0.1,
+        gain_db=get_azure_workaround_gain_boost(SoundEffect.LOW_QUALITY_RADIO),
+    ),
     # Azure streaming workaround
-    MEDIUM_QUALITY_RADIO_GAIN_BOOST = Pedalboard(
-        [
-            Distortion(drive_db=-74),
-            HighpassFilter(cutoff_frequency_hz=300),
-            LowpassFilter(cutoff_frequency_hz=5000),
-            Resample(target_sample_rate=16000),
-            Reverb(room_size=0.01, damping=0.3, wet_level=0.1, dry_level=0.9),
-            Compressor(threshold_db=-18, ratio=4),
-            Gain(
-                gain_db=get_azure_workaround_gain_boost(
-                    SoundEffect.MEDIUM_QUALITY_RADIO
-                )
-            ),
-        ]
-    )
+    f"{SoundEffect.MEDIUM_QUALITY_RADIO.value}_GAIN_BOOST": lambda: _radio_plugins(
+        drive_db=-74,
+        highpass_hz=300,
+        lowpass_hz=5000,
+        resample_rate=16000,
+        room_size=0.01,
+        gain_db=get_azure_workaround_gain_boost(SoundEffect.MEDIUM_QUALITY_RADIO),
+        compressor=True,
+    ),
     # Azure streaming workaround
-    HIGH_END_RADIO_GAIN_BOOST = Pedalboard(
-        [
-            HighpassFilter(cutoff_frequency_hz=100),
-            LowpassFilter(cutoff_frequency_hz=8000),  # Adjust cutoff to avoid conflicts
-            Compressor(threshold_db=-10, ratio=2),
-            Reverb(room_size=0.001, damping=0.3, wet_level=0.1, dry_level=0.9),
-            Resample(target_sample_rate=44100),
-            Gain(gain_db=get_azure_workaround_gain_boost(SoundEffect.HIGH_END_RADIO)),
-        ]
-    )
-
-    INTERIOR_SMALL = Pedalboard(
-        [
-            Delay(
-                delay_seconds=0.03, mix=0.05
-            ),  # Subtle delay to simulate room reflections
-            Reverb(
-                room_size=0.03, damping=0.7, dry_level=0.7, wet_level=0.3, width=0.1
-            ),  # Reverb to enhance room effect
-            Gain(gain_db=-3),  # Reduced to solve clipping
-        ]
-    )
-    INTERIOR_MEDIUM = Pedalboard(
-        [
-            Delay(
-                delay_seconds=0.05, mix=0.05
-            ),  # Subtle delay to simulate room reflections
-            Reverb(
-                room_size=0.5, damping=0.5, dry_level=0.7, wet_level=0.3, width=0.5
-            ),  # Reverb to enhance room effect
-            Gain(gain_db=-3),  # Slight reduction in gain to prevent clipping
-        ]
-    )
-    INTERIOR_LARGE = Pedalboard(
-        [
-            Delay(
-                delay_seconds=0.07, mix=0.1
-            ),  # Subtle delay to simulate large room reflections
-            Reverb(
-                room_size=0.7, damping=0.5, dry_level=0.7, wet_level=0.3, width=0.8
-            ),  # Reverb to enhance large room effect
-            Gain(gain_db=-3),  # Slight reduction in gain to prevent clipping
-        ]
-    )
-
-
-def get_sound_effects(config: SoundConfig, use_gain_boost: bool = False):
-    if config is None or not config.effects or len(config.effects) == 0:
-        return []
+    f"{SoundEffect.HIGH_END_RADIO.value}_GAIN_BOOST": lambda: _high_end_radio_plugins(
+        gain_db=get_azure_workaround_gain_boost(SoundEffect.HIGH_END_RADIO)
+    ),
+    SoundEffect.INTERIOR_SMALL.value: lambda: _interior_plugins(
+        delay_seconds=0.03, delay_mix=0.05, room_size=0.03, damping=0.7, width=0.1
+    ),
+    SoundEffect.INTERIOR_MEDIUM.value: lambda: _interior_plugins(
+        delay_seconds=0.05, delay_mix=0.05, room_size=0.5, damping=0.5, width=0.5
+    ),
+    SoundEffect.INTERIOR_LARGE.value: lambda: _interior_plugins(
+        delay_seconds=0.07, delay_mix=0.1, room_size=0.7, damping=0.5, width=0.8
+    ),
+}
+"""Builds the plugins of an effect. Every call returns new instances with their own DSP state."""
+
+
+class SoundEffectsEngine:
+    """All effects of a sound config, compiled into a single Pedalboard chain.
+
+    Stateful effects like Reverb and Delay must not be shared between playbacks that run at the same time,
+    so every playback checks out its own chain from a pool and returns it (reset) afterwards.
+    """
+
+    def __init__(self, effects: list[SoundEffect], use_gain_boost: bool = False):
+        self.effect_names: list[str] = []
+        for effect in effects or []:
+            effect_name = effect.value
+            if use_gain_boost and f"{effect_name}_GAIN_BOOST" in EFFECT_PLUGINS:
+                effect_name += "_GAIN_BOOST"
+            if effect_name in EFFECT_PLUGINS:
+                self.effect_names.append(effect_name)
+
+        self.pool: list[Pedalboard] = []
+        self.lock = threading.Lock()
+        if self.effect_names:
+            self.pool.append(self.__compile())
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.effect_names
 
-    sound_effects = []
-
-    mapping = {
-        SoundEffect.AI.value: SoundEffects.AI.value,
-        SoundEffect.LOW_QUALITY_RADIO.value: SoundEffects.LOW_QUALITY_RADIO.value,
-        SoundEffect.MEDIUM_QUALITY_RADIO.value: SoundEffects.MEDIUM_QUALITY_RADIO.value,
-        SoundEffect.HIGH_END_RADIO.value: SoundEffects.HIGH_END_RADIO.value,
-        SoundEffect.LOW_QUALITY_RADIO.value
-        + "_GAIN_BOOST": SoundEffects.LOW_QUALITY_RADIO_GAIN_BOOST.value,
-        SoundEffect.MEDIUM_QUALITY_RADIO.value
-        + "_GAIN_BOOST": SoundEffects.MEDIUM_QUALITY_RADIO_GAIN_BOOST.value,
-        SoundEffect.HIGH_END_RADIO.value
-        + "_GAIN_BOOST": SoundEffects.HIGH_END_RADIO_GAIN_BOOST.value,
-        SoundEffect.INTERIOR_SMALL.value: SoundEffects.INTERIOR_SMALL.value,
-        SoundEffect.INTERIOR_MEDIUM.value: SoundEffects.INTERIOR_MEDIUM.value,
-        SoundEffect.INTERIOR_LARGE.value: SoundEffects.INTERIOR_LARGE.value,
-    }
-
-    for effect in config.effects:
-        effect_name = effect.value
-        if use_gain_boost and f"{effect_name}_GAIN_BOOST" in mapping:
-            effect_name += "_GAIN_BOOST"
-        effect = mapping.get(effect_name)
-        if effect:
-            sound_effects.append(effect)
-
-    return sound_effects
+    def acquire(self) -> Optional[Pedalboard]:
+        """Returns a chain for exclusive use or None if there are no effects. Pass it to release() when done."""
+        if self.is_empty:
+            return None
+        with self.lock:
+            if self.pool:
+                return self.pool.pop()
+        return self.__compile()
+
+    def release(self, chain: Optional[Pedalboard]):
+        if chain is None:
+            return
+        chain.reset()
+        with self.lock:
+            self.pool.append(chain)
+
+    @contextmanager
+    def chain(self) -> Iterator[Optional[Pedalboard]]:
+        chain = self.acquire()
+        try:
+            yield chain
+        finally:
+            self.release(chain)
+
+    def __compile(self) -> Pedalboard:
+        plugins = []
+        for effect_name in self.effect_names:
+            plugins.extend(EFFECT_PLUGINS[effect_name]())
+        return Pedalboard(plugins)
+
+
+compiled_sound_effects: dict[tuple, SoundEffectsEngine] = {}
+compiled_sound_effects_lock = threading.Lock()
+
+
+def compile_sound_effects(
+    config: SoundConfig, use_gain_boost: bool = False
+) -> SoundEffectsEngine:
+    """Returns the compiled effects engine of a sound config. Engines are cached per effect list."""
+    effects = tuple(config.effects) if config and config.effects else ()
+    key = (effects, use_gain_boost)
+    with compiled_sound_effects_lock:
+        engine = compiled_sound_effects.get(key)
+        if engine is None:
+            engine = SoundEffectsEngine(list(effects), use_gain_boost)
+            compiled_sound_effects[key] = engine
+        return engine
 
 
 def get_additional_layer_file(effect: SoundEffect):
@@ -194,3 +229,27 @@ def get_additional_layer_file(effect: SoundEffect):
     elif effect == SoundEffect.MEDIUM_QUALITY_RADIO:
         return "Radio_Static.wav"
     return None
+
+
+def get_sample_files(config: SoundConfig) -> list[str]:
+    """Returns all audio samples (beeps and mixed-in layers) that are played with the given sound config."""
+    if config is None:
+        return []
+
+    sample_files = []
+    if config.play_beep:
+        sample_files.append("beep.wav")
+    elif config.play_beep_apollo:
+        sample_files.append("Apollo_Beep.wav")
+
+    for effect in config.effects or []:
+        layer_file = get_additional_layer_file(effect)
+        if layer_file and layer_file not in sample_files:
+            sample_files.append(layer_file)
+        if (
+            effect == SoundEffect.HIGH_END_RADIO
+            and "Radio_Static_Beep.wav" not in sample_files
+        ):
+            sample_files.append("Radio_Static_Beep.wav")
+
+    return sample_files
@@ -0,0 +1,153 @@
+import asyncio
+from contextvars import ContextVar
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class StartupStep:
+    """A unit of work during startup, e.g. instantiating a Wingman or preparing one of its skills."""
+
+    def __init__(
+        self,
+        name: str,
+        dependencies: list[str],
+        timeout: Optional[float],
+        parent: Optional["StartupStep"],
+    ):
+        self.name = name
+        self.dependencies = dependencies
+        self.timeout = timeout
+        self.parent = parent
+        """The step that was running when this one was added."""
+        self.children: list[StartupStep] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+current_step: ContextVar[Optional[StartupStep]] = ContextVar(
+    "current_startup_step", default=None
+)
+
+
+class StartupScheduler:
+    """Runs the steps of the startup concurrently, each as soon as the steps it depends on are done.
+
+    Steps can be added while others are running. A step added from within a running step becomes its child,
+    e.g. the skills of a Wingman, so the report can tell which part of the slowest Wingman took the longest.
+    """
+
+    def __init__(self):
+        self.steps: dict[str, StartupStep] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.created_at = time.perf_counter()
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[T]],
+        dependencies: Optional[list[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> "asyncio.Task[T]":
+        """Schedules a step and returns its task.
+
+        The step starts once all its dependencies are done, even if they failed. It's cancelled after timeout seconds.
+        """
+        parent = current_step.get()
+        step = StartupStep(
+            name=name,
+            dependencies=dependencies or [],
+            timeout=timeout,
+            parent=parent,
+        )
+        if parent:
+            parent.children.append(step)
+        self.steps[name] = step
+        task = asyncio.create_task(self.__run(step, fn))
+        self.tasks[name] = task
+        return task
+
+    async def wait(self):
+        """Waits for all steps, including the ones added in the meantime.
+
+        Errors of the steps don't raise here, they are kept on the steps and in their tasks.
+        """
+        while pending := [task for task in self.tasks.values() if not task.done()]:
+            await asyncio.wait(pending)
+        for task in self.tasks.values():
+            # mark as retrieved, so asyncio doesn't log steps nobody awaited
+            if not task.cancelled():
+                task.exception()
+
+    def get_critical_path(self) -> list[StartupStep]:
+        """Returns the chain of steps that determined the total startup time."""
+        return self.__get_critical_path(
+            [step for step in self.steps.values() if step.parent is None]
+        )
+
+    def get_report(self) -> str:
+        top_level = [step for step in self.steps.values() if step.parent is None]
+        finished = [step.finished_at for step in top_level if step.finished_at]
+        if not finished:
+            return "Nothing was started."
+
+        elapsed = max(finished) - self.created_at
+        total = sum(step.duration for step in top_level)
+        path = " > ".join(
+            f"{step.name} ({step.duration:.1f}s{', failed' if step.error else ''})"
+            for step in self.get_critical_path()
+        )
+        return f"Startup took {elapsed:.1f}s for {total:.1f}s of work. Critical path: {path}"
+
+    async def __run(self, step: StartupStep, fn: Callable[[], Awaitable[T]]) -> T:
+        dependencies = [
+            self.tasks[name] for name in step.dependencies if name in self.tasks
+        ]
+        if dependencies:
+            await asyncio.wait(dependencies)
+
+        current_step.set(step)
+        step.started_at = time.perf_counter()
+        try:
+            return await asyncio.wait_for(fn(), timeout=step.timeout)
+        except asyncio.TimeoutError as e:
+            step.error = TimeoutError(
+                f"'{step.name}' timed out after {step.timeout} seconds."
+            )
+            raise step.error from e
+        except Exception as e:
+            step.error = e
+            raise
+        finally:
+            step.finished_at = time.perf_counter()
+
+    def __get_critical_path(self, steps: list[StartupStep]) -> list[StartupStep]:
+        finished = [step for step in steps if step.finished_at is not None]
+        if not finished:
+            return []
+
+        # the step that finished last and the dependencies it waited for
+        chain = [max(finished, key=lambda step: step.finished_at)]
+        while True:
+            dependencies = [
+                self.steps[name]
+                for name in chain[0].dependencies
+                if name in self.steps and self.steps[name].finished_at is not None
+            ]
+            if not dependencies:
+                break
+            chain.insert(0, max(dependencies, key=lambda step: step.finished_at))
+
+        path = []
+        for step in chain:
+            path.append(step)
+            path.extend(self.__get_critical_path(step.children))
+        return path
@@ -3,6 +3,7 @@ from fastapi import APIRouter
 import requests
 from packaging import version
 from api.interface import SystemCore, SystemInfo
+from services.http_client import get_http_session
 
 LOCAL_VERSION = "1.6.2"
 VERSION_ENDPOINT = "https://wingman-ai.com/api/version"
@@ -25,7 +26,7 @@ class SystemManager:
 
     def check_version(self):
         try:
-            response = requests.get(VERSION_ENDPOINT, timeout=10)
+            response = get_http_session().get(VERSION_ENDPOINT, timeout=10)
             response.raise_for_status()
 
             remote_version_str = response.json().get("version", None)
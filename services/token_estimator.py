@@ -0,0 +1,66 @@
+import json
+import re
+
+TOKENS_PER_MESSAGE = 4
+"""Every message is wrapped in a few special tokens (role, separators)."""
+TOKENS_PER_TOOL = 8
+"""The wrapping of each tool definition in the prompt."""
+CHARACTERS_PER_TOKEN = 4
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Estimates the number of tokens of a text without calling a tokenizer.
+
+    Words are counted as one token per started 4 letters, numbers per 3 digits and every other symbol as one token.
+    This errs on the high side for English, so the budget is rather met than exceeded.
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        if piece[0].isascii() and piece[0].isalpha():
+            tokens += -(-len(piece) // CHARACTERS_PER_TOKEN)
+        elif piece[0].isdigit():
+            tokens += -(-len(piece) // 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_message_tokens(message: dict) -> int:
+    """Estimates the tokens of a serialized message, including its tool calls."""
+    tokens = TOKENS_PER_MESSAGE
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += estimate_text_tokens(content)
+    elif content:
+        # e.g. multi-part content
+        tokens += estimate_text_tokens(json.dumps(content, default=str))
+
+    if message.get("name"):
+        tokens += estimate_text_tokens(message["name"])
+
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        arguments = function.get("arguments")
+        if not isinstance(arguments, str):
+            # Mistral returns a dict
+            arguments = json.dumps(arguments, default=str)
+        tokens += TOKENS_PER_MESSAGE + estimate_text_tokens(
+            f"{function.get('name', '')} {arguments}"
+        )
+    return tokens
+
+
+def estimate_tools_tokens(tools: list[dict] | None) -> int:
+    """Estimates the tokens the tool definitions add to the prompt."""
+    if not tools:
+        return 0
+    return sum(
+        TOKENS_PER_TOOL + estimate_text_tokens(json.dumps(tool, default=str))
+        for tool in tools
+    )
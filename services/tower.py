@@ -1,3 +1,5 @@
+from functools import partial
+from typing import Optional
 from api.enums import LogSource, LogType, WingmanInitializationErrorType
 from api.interface import (
     Config,
@@ -9,14 +11,40 @@ from providers.whispercpp import Whispercpp
 from providers.xvasynth import XVASynth
 from services.audio_player import AudioPlayer
 from services.audio_library import AudioLibrary
+from services.hotkeys import HotkeyIndex
 from services.module_manager import ModuleManager
 from services.printr import Printr
+from services.startup_scheduler import StartupScheduler
 from wingmen.open_ai_wingman import OpenAiWingman
 from wingmen.wingman import Wingman
 
 
 printr = Printr()
 
+PROVIDER_FEATURES = [
+    "conversation_provider",
+    "tts_provider",
+    "stt_provider",
+    "image_generation_provider",
+]
+"""Changing one of these rebuilds a Wingman, because it needs other clients."""
+PROVIDER_SECTIONS = [
+    "openai",
+    "mistral",
+    "groq",
+    "cerebras",
+    "google",
+    "openrouter",
+    "local_llm",
+    "elevenlabs",
+    "azure",
+    "xvasynth",
+    "whispercpp",
+    "wingman_pro",
+    "perplexity",
+]
+"""Changing one of these re-validates a Wingman in place, which re-creates its clients."""
+
 
 class Tower:
     def __init__(
@@ -31,6 +59,7 @@ class Tower:
         self.audio_library = audio_library
         self.config = config
         self.mouse_wingman_dict: dict[str, Wingman] = {}
+        self.key_wingman_index: HotkeyIndex[Wingman] = HotkeyIndex()
         self.wingmen: list[Wingman] = []
         self.disabled_wingmen: list[WingmanConfig] = []
         self.log_source_name = "Tower"
@@ -43,6 +72,7 @@ class Tower:
         if not self.config.wingmen:
             return errors
 
+        scheduler = StartupScheduler()
         for wingman_name, wingman_config in self.config.wingmen.items():
             if wingman_config.disabled is True:
                 self.disabled_wingmen.append(wingman_config)
@@ -55,13 +85,22 @@ class Tower:
                 )
                 continue
 
-            _wingman = await self.__instantiate_wingman(
-                wingman_name=wingman_name,
-                wingman_config=wingman_config,
-                settings=settings,
-                errors=errors,
+            # all Wingmen start at once, so the startup takes as long as the slowest one
+            scheduler.add(
+                wingman_name,
+                partial(
+                    self.__instantiate_wingman,
+                    wingman_name=wingman_name,
+                    wingman_config=wingman_config,
+                    settings=settings,
+                    errors=errors,
+                    scheduler=scheduler,
+                ),
             )
 
+        await scheduler.wait()
+        self.__sort_wingmen()
+
         printr.print(
             f"Instantiated wingmen: {', '.join([w.name for w in self.wingmen])}.",
             color=LogType.INFO,
@@ -69,14 +108,132 @@ class Tower:
             source_name=self.log_source_name,
             source=LogSource.SYSTEM,
         )
+        printr.print(
+            scheduler.get_report(),
+            server_only=True,
+            source_name=self.log_source_name,
+            source=LogSource.SYSTEM,
+        )
+        return errors
+
+    async def reconcile(
+        self, config: Config, settings: SettingsConfig
+    ) -> list[WingmanInitializationError]:
+        """Applies a reloaded config to the running Wingmen instead of rebuilding all of them.
+
+        Wingmen whose identity, providers or skills changed are rebuilt, new and re-enabled ones are instantiated
+        and removed or disabled ones are unloaded. All others keep their clients, skills and conversation history
+        and only get the new config.
+        """
+        errors: list[WingmanInitializationError] = []
+        running = {wingman.name: wingman for wingman in self.wingmen}
+        self.config = config
+        self.disabled_wingmen = []
+
+        for wingman_name, wingman_config in (config.wingmen or {}).items():
+            wingman = running.pop(wingman_name, None)
+
+            if wingman_config.disabled is True:
+                if wingman:
+                    await self.__unload_wingman(wingman)
+                self.disabled_wingmen.append(wingman_config)
+                continue
+
+            if wingman:
+                if wingman.config == wingman_config:
+                    continue
+
+                rebuild_reason = self.__get_rebuild_reason(
+                    wingman.config, wingman_config
+                )
+                if not rebuild_reason and await self.__update_wingman(
+                    wingman, wingman_config
+                ):
+                    printr.print(
+                        f"Updated wingman {wingman_name} in place.",
+                        server_only=True,
+                        source_name=self.log_source_name,
+                        source=LogSource.SYSTEM,
+                    )
+                    continue
+
+                printr.print(
+                    f"Rebuilding wingman {wingman_name} because its {rebuild_reason or 'config'} changed.",
+                    server_only=True,
+                    source_name=self.log_source_name,
+                    source=LogSource.SYSTEM,
+                )
+                await self.__unload_wingman(wingman)
+
+            await self.__instantiate_wingman(
+                wingman_name=wingman_name,
+                wingman_config=wingman_config,
+                settings=settings,
+                errors=errors,
+            )
+
+        # Wingmen that were removed from the config
+        for wingman in running.values():
+            await self.__unload_wingman(wingman)
+
+        self.__sort_wingmen()
         return errors
 
+    def __sort_wingmen(self):
+        # keep the order of the config, the first Wingman wins in get_wingman_from_text
+        order = list((self.config.wingmen or {}).keys())
+        self.wingmen.sort(key=lambda w: order.index(w.name))
+        self.index_record_keys()
+
+    def __get_rebuild_reason(
+        self, old_config: WingmanConfig, new_config: WingmanConfig
+    ) -> str | None:
+        """Returns what changed if a Wingman can't be updated in place."""
+        if old_config.name != new_config.name or (
+            old_config.custom_class != new_config.custom_class
+        ):
+            return "identity"
+        if any(
+            getattr(old_config.features, provider)
+            != getattr(new_config.features, provider)
+            for provider in PROVIDER_FEATURES
+        ):
+            return "providers"
+        if old_config.skills != new_config.skills:
+            return "skills"
+        return None
+
+    async def __update_wingman(
+        self, wingman: Wingman, wingman_config: WingmanConfig
+    ) -> bool:
+        # only re-create the clients if a provider block changed (e.g. an endpoint)
+        validate = any(
+            getattr(wingman.config, section) != getattr(wingman_config, section)
+            for section in PROVIDER_SECTIONS
+        )
+        generate_instant_responses = (
+            wingman_config.features.use_generic_instant_responses
+            and not wingman.config.features.use_generic_instant_responses
+        )
+        if not await wingman.update_config(wingman_config, validate=validate):
+            return False
+
+        if generate_instant_responses:
+            await wingman.prepare()
+        await self.audio_player.prepare_sound(wingman_config.sound)
+        return True
+
+    async def __unload_wingman(self, wingman: Wingman):
+        await wingman.unload()
+        self.wingmen.remove(wingman)
+
     async def __instantiate_wingman(
         self,
         wingman_name: str,
         wingman_config: WingmanConfig,
         settings: SettingsConfig,
         errors: list[WingmanInitializationError],
+        scheduler: Optional[StartupScheduler] = None,
     ):
         wingman = None
         try:
@@ -129,18 +286,38 @@ class Tower:
             errors.extend(validation_errors)
 
             # init and validate skills
-            skill_errors = await wingman.init_skills()
+            skill_errors = await wingman.init_skills(scheduler=scheduler)
 
-            if not errors or len(errors) == 0:
+            # only this Wingman's errors count, the others are starting concurrently
+            if not validation_errors:
                 await wingman.prepare()
+                await self.audio_player.prepare_sound(wingman.config.sound)
                 self.wingmen.append(wingman)
+                self.index_record_keys()
+
+        return wingman
 
-            # Mouse
+    def index_record_keys(self):
+        """(Re-)builds the lookups of the push-to-talk keys and mouse buttons. Call this whenever a record key changes."""
+        key_wingman_index: HotkeyIndex[Wingman] = HotkeyIndex()
+        mouse_wingman_dict: dict[str, Wingman] = {}
+        for wingman in self.wingmen:
+            record_key = wingman.get_record_key()
+            if record_key:
+                key_wingman_index.add(record_key, wingman)
             button = wingman.get_record_button()
             if button:
-                self.mouse_wingman_dict[button] = wingman
+                mouse_wingman_dict[button] = wingman
 
-        return wingman
+        # swap, as the keyboard hook reads them from another thread
+        self.key_wingman_index = key_wingman_index
+        self.mouse_wingman_dict = mouse_wingman_dict
+
+    def get_wingman_from_key(
+        self, scan_code: int, pressed_codes: dict | set
+    ) -> Wingman | None:
+        """Returns the Wingman whose record key was completed by pressing the given key."""
+        return self.key_wingman_index.find(scan_code, pressed_codes)
 
     def get_wingman_from_mouse(self, mouse: any) -> Wingman | None:  # type: ignore
         wingman = self.mouse_wingman_dict.get(mouse, None)
@@ -204,6 +381,7 @@ class Tower:
                 wingman.config.disabled = True
                 self.disabled_wingmen.append(wingman.config)
                 self.wingmen.remove(wingman)
+                self.index_record_keys()
                 printr.print(
                     f"Disabled wingman {wingman_name}.",
                     color=LogType.INFO,
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Optional
+import numpy as np
+import soundfile as sf
+from api.enums import LogType
+from services.file import get_writable_dir
+from services.printr import Printr
+
+printr = Printr()
+
+TTS_CACHE_PATH = "tts_cache"
+CACHE_FILE_EXTENSION = ".flac"
+MAX_CACHE_SIZE = 200 * 1024 * 1024
+"""The cache evicts the least recently played audio once it grows beyond this (in bytes)."""
+MAX_TEXT_LENGTH = 300
+"""Longer texts are usually unique LLM responses that are never played again, so they are not cached."""
+
+pending_cache_key: ContextVar[Optional[str]] = ContextVar(
+    "pending_cache_key", default=None
+)
+"""Set while a TTS provider synthesizes a cacheable text. The AudioPlayer stores the audio it plays under this key."""
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TtsCache:
+    """Singleton LRU cache of synthesized speech, stored as FLAC files in the tts_cache directory.
+
+    Entries are addressed by a hash of the TTS provider, its voice settings and the normalized text,
+    so repeated phrases like instant responses are played without calling the provider again.
+    The raw audio is stored, sound effects are applied on playback.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TtsCache, cls).__new__(cls)
+            cls._instance.directory = get_writable_dir(TTS_CACHE_PATH)
+            cls._instance.entries = OrderedDict()
+            cls._instance.size = 0
+            cls._instance.lock = threading.Lock()
+            cls._instance.__load_index()
+        return cls._instance
+
+    def get_key(self, provider: str, voice_settings: dict, text: str) -> Optional[str]:
+        """Returns the cache key of a text or None if the text should not be cached."""
+        text = normalize_text(text)
+        if not text or len(text) > MAX_TEXT_LENGTH:
+            return None
+
+        content = json.dumps(
+            [provider, voice_settings, text], sort_keys=True, default=str
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        with self.lock:
+            return key in self.entries
+
+    def load(self, key: str) -> Optional[tuple[np.ndarray, int]]:
+        """Returns the cached (audio, sample_rate) or None. This is blocking, so run it in a worker thread."""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+
+        file_path = self.__get_file_path(key)
+        try:
+            audio, sample_rate = sf.read(file_path, dtype="float32")
+            # remember the recency across restarts
+            os.utime(file_path)
+            return audio, sample_rate
+        except (OSError, RuntimeError):
+            self.__remove(key)
+            return None
+
+    def store(self, key: str, audio: np.ndarray, sample_rate: int):
+        """Stores the audio and evicts the least recently used entries if needed. This is blocking, so run it in a worker thread."""
+        if self.contains(key):
+            return
+
+        file_path = self.__get_file_path(key)
+        try:
+            sf.write(file_path, audio, sample_rate, format="FLAC", subtype="PCM_16")
+        except (OSError, RuntimeError) as e:
+            printr.print(
+                f"Could not write TTS cache entry: {e}",
+                color=LogType.WARNING,
+                server_only=True,
+            )
+            return
+
+        file_size = os.path.getsize(file_path)
+        with self.lock:
+            self.entries[key] = file_size
+            self.size += file_size
+            evicted = []
+            while self.size > MAX_CACHE_SIZE and len(self.entries) > 1:
+                evicted_key, evicted_size = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                evicted.append(evicted_key)
+
+        for evicted_key in evicted:
+            self.__delete_file(evicted_key)
+
+    def clear(self):
+        with self.lock:
+            keys = list(self.entries.keys())
+            self.entries.clear()
+            self.size = 0
+        for key in keys:
+            self.__delete_file(key)
+
+    def __load_index(self):
+        files = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            stat = os.stat(os.path.join(self.directory, file_name))
+            files.append((stat.st_mtime, file_name[: -len(CACHE_FILE_EXTENSION)], stat.st_size))
+
+        # oldest first, just like the LRU order
+        for _mtime, key, file_size in sorted(files):
+            self.entries[key] = file_size
+            self.size += file_size
+
+    def __remove(self, key: str):
+        with self.lock:
+            file_size = self.entries.pop(key, None)
+            if file_size is not None:
+                self.size -= file_size
+        self.__delete_file(key)
+
+    def __delete_file(self, key: str):
+        try:
+            os.remove(self.__get_file_path(key))
+        except OSError:
+            pass
+
+    def __get_file_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
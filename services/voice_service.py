@@ -1,5 +1,4 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter
 from api.enums import AzureRegion, OpenAiTtsVoice
 from api.interface import (
@@ -121,12 +120,8 @@ class VoiceService:
     async def get_elevenlabs_voices(self, api_key: str) -> list[VoiceInfo]:
         elevenlabs = ElevenLabs(api_key=api_key, wingman_name="")
         try:
-            # Run the synchronous method in a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as pool:
-                voices = await loop.run_in_executor(
-                    pool, elevenlabs.get_available_voices
-                )
+            # Run the synchronous method on the worker pool
+            voices = await asyncio.to_thread(elevenlabs.get_available_voices)
 
             convert = lambda voice: VoiceInfo(id=voice.voiceID, name=voice.name)
             result = [convert(voice) for voice in voices]
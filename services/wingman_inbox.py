@@ -0,0 +1,116 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Future
+import traceback
+from typing import TYPE_CHECKING, Optional
+from api.enums import LogType, RequestPolicy
+from services.printr import Printr
+from services.recorded_audio import RecordedAudio
+from services.runtime import Runtime
+
+if TYPE_CHECKING:
+    from wingmen.wingman import Wingman
+
+printr = Printr()
+
+MAX_PENDING_REQUESTS = 10
+"""With the 'queue' policy, the oldest waiting requests are dropped beyond this."""
+
+
+class WingmanRequest:
+    """A user input for a Wingman: a recording to transcribe or an already transcribed text."""
+
+    def __init__(self, recording: RecordedAudio = None, transcript: str = None):
+        self.recording = recording
+        self.transcript = transcript
+
+    def merge(self, newer: "WingmanRequest") -> "WingmanRequest":
+        """Coalesces a newer request into this one. Falls back to the newer request if they can't be joined."""
+        if self.transcript and newer.transcript:
+            return WingmanRequest(transcript=f"{self.transcript} {newer.transcript}")
+        if self.recording and newer.recording:
+            recording = self.recording.concatenate(newer.recording)
+            if recording:
+                return WingmanRequest(recording=recording)
+        return newer
+
+
+class WingmanInbox:
+    """Serializes the requests of a Wingman.
+
+    Inputs from key releases, voice activation (any STT provider, including ESP32 devices) or the API are put into the inbox from any thread
+    and a single consumer processes them one after another, so the conversation history and the audio player
+    are never used by two requests at once. The Wingman's request_policy decides what happens to inputs that arrive while it's busy.
+    """
+
+    def __init__(self, wingman: "Wingman"):
+        self.wingman = wingman
+        self.pending: deque[WingmanRequest] = deque()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.consumer: Optional[Future] = None
+
+    def submit(
+        self, recording: RecordedAudio = None, transcript: str = None
+    ) -> Future | None:
+        """Adds a request to the inbox. Safe to call from any thread."""
+        return Runtime().run(
+            self.put,
+            WingmanRequest(recording=recording, transcript=transcript),
+            group=self.wingman.name,
+        )
+
+    async def put(self, request: WingmanRequest):
+        """Adds a request to the inbox. Must be called on the main event loop."""
+        policy = self.wingman.config.features.request_policy or RequestPolicy.REPLACE
+
+        if policy == RequestPolicy.REPLACE:
+            self.pending.clear()
+            self.pending.append(request)
+            # a newer input supersedes the request that is still in progress
+            self.wingman.cancel_turn()
+        elif policy == RequestPolicy.COALESCE and self.pending:
+            self.pending.append(self.pending.pop().merge(request))
+        else:
+            if len(self.pending) >= MAX_PENDING_REQUESTS:
+                self.pending.popleft()
+                await printr.print_async(
+                    f"{self.wingman.name} is too busy, dropped the oldest waiting request.",
+                    color=LogType.WARNING,
+                )
+            self.pending.append(request)
+
+        if self.wakeup is None:
+            self.wakeup = asyncio.Event()
+        self.wakeup.set()
+
+        if self.consumer is None or self.consumer.done():
+            self.consumer = Runtime().run(self.__consume, group=self.wingman.name)
+
+    async def __consume(self):
+        while True:
+            while not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+
+            request = self.pending.popleft()
+            # each request runs in its own task, so it can be cancelled without stopping the consumer
+            turn = asyncio.create_task(
+                self.wingman.process(
+                    recording=request.recording, transcript=request.transcript
+                )
+            )
+            self.wingman.current_turn = turn
+            try:
+                await asyncio.wait([turn])
+            except asyncio.CancelledError:
+                turn.cancel()
+                raise
+
+            if not turn.cancelled() and turn.exception():
+                error = turn.exception()
+                printr.print(
+                    f"Error while processing a request for {self.wingman.name}: {error}\n"
+                    + "".join(traceback.format_exception(error)),
+                    color=LogType.ERROR,
+                    server_only=True,
+                )
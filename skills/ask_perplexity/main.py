@@ -58,7 +58,7 @@ class AskPerplexity(Skill):
                 self.start_execution_benchmark()
 
             if tool_name == "ask_perplexity" and "question" in parameters:
-                function_response = self.ask_perplexity(parameters["question"])
+                function_response = await self.ask_perplexity(parameters["question"])
                 if self.instant_response:
                     instant_response = function_response
 
@@ -70,10 +70,10 @@ class AskPerplexity(Skill):
 
         return function_response, instant_response
 
-    def ask_perplexity(self, question: str) -> str:
+    async def ask_perplexity(self, question: str) -> str:
         """Uses the Perplexity API to answer a question."""
 
-        completion = self.wingman.perplexity.ask(
+        completion = await self.wingman.perplexity.ask(
             messages=[{"role": "user", "content": question}],
             model=self.wingman.config.perplexity.conversation_model.value,
         )
@@ -1,5 +1,5 @@
 import os
-import time
+import asyncio
 from pathlib import Path
 from typing import TYPE_CHECKING
 import pygetwindow as gw
@@ -131,7 +131,7 @@ class ControlWindows(Skill):
                     window.restore()
                     # Temporarily maximize it, let windows do the work of what maximize means based on the user's setup
                     window.maximize()
-                    time.sleep(0.5)
+                    await asyncio.sleep(0.5)
                 except:
                     pass
                 # Assume that maximize is a proxy for the appropriate full size of a window in this setup, use that to calculate resize
@@ -164,20 +164,26 @@ class ControlWindows(Skill):
                     if (monitor_width, monitor_height) == window.size:
                         # Try last ditch manual move if moving to left or right
                         if "left" in command:
-                            mouse.move(int(monitor_width * 0.5), 10, duration=1.0)
-                            time.sleep(0.1)
+                            await asyncio.to_thread(
+                                mouse.move, int(monitor_width * 0.5), 10, duration=1.0
+                            )
+                            await asyncio.sleep(0.1)
                             mouse.press(button="left")
-                            mouse.move(20, 10, duration=1.0)
-                            time.sleep(0.1)
+                            await asyncio.to_thread(mouse.move, 20, 10, duration=1.0)
+                            await asyncio.sleep(0.1)
                             mouse.release(button="left")
                             return True
 
                         elif "right" in command:
-                            mouse.move(int(monitor_width * 0.5), 10, duration=1.0)
-                            time.sleep(0.1)
+                            await asyncio.to_thread(
+                                mouse.move, int(monitor_width * 0.5), 10, duration=1.0
+                            )
+                            await asyncio.sleep(0.1)
                             mouse.press(button="left")
-                            mouse.move(monitor_width - 20, 10, duration=1.0)
-                            time.sleep(0.1)
+                            await asyncio.to_thread(
+                                mouse.move, monitor_width - 20, 10, duration=1.0
+                            )
+                            await asyncio.sleep(0.1)
                             mouse.release(button="left")
                             return True
                         # Return False as failed if could not move through any method
@@ -270,6 +276,10 @@ class ControlWindows(Skill):
         ]
         return tools
 
+    async def is_tool_exclusive(self, tool_name: str) -> bool:
+        # window focus and key presses must not be interleaved with other inputs
+        return True
+
     async def execute_tool(
         self, tool_name: str, parameters: dict[str, any]
     ) -> tuple[str, str]:
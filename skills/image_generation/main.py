@@ -1,9 +1,10 @@
+import asyncio
 from os import path
 import datetime
-import requests
 from typing import TYPE_CHECKING
 from api.enums import LogSource, LogType
 from api.interface import SettingsConfig, SkillConfig, WingmanInitializationError
+from services.http_client import get_http_session
 from skills.skill_base import Skill
 from services.file import get_writable_dir
 
@@ -58,7 +59,9 @@ class ImageGeneration(Skill):
                         self.image_path,
                         f"{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{prompt[:40]}.png"
                     )
-                    image_response = requests.get(image)
+                    image_response = await asyncio.to_thread(
+                        get_http_session().get, image
+                    )
 
                     if image_response.status_code == 200:
                         with open(image_path, 'wb') as file:
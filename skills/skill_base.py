@@ -1,4 +1,4 @@
-import threading
+from concurrent.futures import Future
 import time
 from typing import TYPE_CHECKING
 from api.enums import LogType, WingmanInitializationErrorType
@@ -9,10 +9,14 @@ from api.interface import (
 )
 from services.printr import Printr
 from services.secret_keeper import SecretKeeper
+from services.settings_delta import SettingsDelta
 
 if TYPE_CHECKING:
     from wingmen.open_ai_wingman import OpenAiWingman
 
+STARTUP_TIMEOUT = 60
+"""Validation includes waiting for the user to enter missing secrets, prepare() might warm up caches over the network."""
+
 
 class Skill:
     """DO NOT cache wingman.config or other wingman properties in your skill! Access them when needed using self.wingman.config.property_name."""
@@ -38,6 +42,16 @@ class Skill:
         """Called when a secret is changed."""
         pass
 
+    async def update_settings(
+        self, settings: SettingsConfig, delta: SettingsDelta
+    ) -> bool:
+        """Called when the user settings changed. Return True if the skill has to be reloaded (unloaded, validated and prepared again) to apply the changes.
+
+        Settings like debug_mode are read when they are needed, so by default the skill just takes the new settings.
+        """
+        self.settings = settings
+        return False
+
     async def validate(self) -> list[WingmanInitializationError]:
         """Validates the skill configuration."""
         return []
@@ -57,9 +71,16 @@ class Skill:
         return []
 
     async def get_prompt(self) -> str | None:
-        """Returns additional context for this skill. Will be injected into the the system prompt. Can be overridden by the skill to add dynamic data to context."""
+        """Returns additional context for this skill. Will be injected into the the system prompt. Can be overridden by the skill to add dynamic data to context.
+
+        The system prompt is cached, so call prompt_changed() whenever your dynamic data changes.
+        """
         return self.config.prompt or None
 
+    def prompt_changed(self) -> None:
+        """Call this if get_prompt() would return something new, so that the Wingman rebuilds its system prompt."""
+        self.wingman.invalidate_context()
+
     async def execute_tool(
         self, tool_name: str, parameters: dict[str, any]
     ) -> tuple[str, str]:
@@ -82,6 +103,18 @@ class Skill:
         """Returns whether a tool probably takes long and a message should be printet in between."""
         return False
 
+    async def is_tool_exclusive(self, tool_name: str) -> bool:
+        """Returns whether a tool must not run concurrently with other tool calls, e.g. because it sends inputs to the game."""
+        return False
+
+    async def get_startup_timeout(self) -> float | None:
+        """Returns the time in seconds validate() and prepare() may take each before the skill fails to load. None waits forever."""
+        return STARTUP_TIMEOUT
+
+    async def get_tool_timeout(self, tool_name: str) -> float | None:
+        """Returns the time in seconds a tool call may take before it's cancelled. None uses the Wingman's default."""
+        return None
+
     async def llm_call(self, messages, tools: list[dict] = None) -> any:
         return any
 
@@ -147,6 +180,6 @@ class Skill:
         """Starts the execution benchmark timer."""
         self.execution_start = time.perf_counter()
 
-    def threaded_execution(self, function, *args) -> threading.Thread:
-        """Execute a function in a separate thread."""
+    def threaded_execution(self, function, *args) -> Future | None:
+        """Execute a function in the background without waiting for it. Jobs are cancelled when the Wingman is unloaded."""
         pass
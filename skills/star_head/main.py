@@ -1,9 +1,11 @@
+import asyncio
 import json
 from typing import Optional
 from typing import TYPE_CHECKING
 import requests
 from api.enums import LogType, WingmanInitializationErrorType
 from api.interface import SettingsConfig, SkillConfig, WingmanInitializationError
+from services.http_client import get_http_session
 from skills.skill_base import Skill
 
 if TYPE_CHECKING:
@@ -90,8 +92,12 @@ class StarHead(Skill):
                 color=LogType.INFO,
             )
 
-        response = requests.get(
-            url, params=params, timeout=self.timeout, headers=self.headers
+        response = await asyncio.to_thread(
+            get_http_session().get,
+            url,
+            params=params,
+            timeout=self.timeout,
+            headers=self.headers,
         )
         response.raise_for_status()
         if self.settings.debug_mode:
@@ -165,7 +171,8 @@ class StarHead(Skill):
 
     async def _get_ship_information(self, ship: str) -> str:
         try:
-            response = requests.get(
+            response = await asyncio.to_thread(
+                get_http_session().get,
                 url=f"{self.star_citizen_wiki_url}/vehicles/{ship}",
                 timeout=self.timeout,
                 headers=self.headers,
@@ -201,7 +208,8 @@ class StarHead(Skill):
         }
         url = f"{self.starhead_url}/trading"
         try:
-            response = requests.post(
+            response = await asyncio.to_thread(
+                get_http_session().post,
                 url=url,
                 json=data,
                 timeout=self.timeout,
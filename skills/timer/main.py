@@ -514,8 +514,9 @@ class Timer(Skill):
                 """,
             },
         )
-        await self.wingman.add_context(self.wingman.messages)
-        completion = await self.llm_call(self.wingman.messages)
+        messages = self.wingman.messages.get_messages()
+        await self.wingman.add_context(messages)
+        completion = await self.llm_call(messages)
         answer = (
             completion.choices[0].message.content
             if completion and completion.choices
@@ -232,6 +232,7 @@ class VoiceChanger(Skill):
 
         self.context_personality = self.context_personality_next
         self.context_personality_next = ""
+        self.prompt_changed()
 
         self.threaded_execution(self._generate_new_context)
 
@@ -1,3 +1,4 @@
+import asyncio
 import time
 import math
 from urllib.parse import urlparse
@@ -127,15 +128,17 @@ class WebSearch(Skill):
                 # If a link is in search results or identified by the user, then use trafilatura to download its content and extract the content to text
                 if link:
                     trafilatura_url = link
-                    trafilatura_downloaded = fetch_url(
-                        trafilatura_url, config=self.trafilatura_config
+                    # downloading and extracting blocks, so keep it off the event loop
+                    trafilatura_downloaded = await asyncio.to_thread(
+                        fetch_url, trafilatura_url, config=self.trafilatura_config
                     )
                     if self.settings.debug_mode:
                         await self.printr.print_async(
                             f"web_search skill analyzing website at: {link} for full content using trafilatura",
                             color=LogType.INFO,
                         )
-                    trafilatura_result = extract(
+                    trafilatura_result = await asyncio.to_thread(
+                        extract,
                         trafilatura_downloaded,
                         include_comments=False,
                         include_tables=False,
@@ -160,14 +163,20 @@ class WebSearch(Skill):
             if search_type == "general":
                 self.min_results = 2
                 self.max_time = 5
-                search_results = DDGS().text(
-                    search_query, safesearch="off", max_results=self.max_results
+                search_results = await asyncio.to_thread(
+                    DDGS().text,
+                    search_query,
+                    safesearch="off",
+                    max_results=self.max_results,
                 )
             elif search_type == "news":
                 self.min_results = 2
                 self.max_time = 5
-                search_results = DDGS().news(
-                    search_query, safesearch="off", max_results=self.max_results
+                search_results = await asyncio.to_thread(
+                    DDGS().news,
+                    search_query,
+                    safesearch="off",
+                    max_results=self.max_results,
                 )
             else:
                 search_results = [
@@ -189,7 +198,7 @@ class WebSearch(Skill):
                 len(processed_results) < self.min_results
                 and time.time() - start_time < self.max_time
             ):
-                time.sleep(0.1)
+                await asyncio.sleep(0.1)
 
             final_results = "\n\n".join(processed_results)
             if final_results:
@@ -3,9 +3,9 @@ import shutil
 import math
 import copy
 from datetime import datetime, timedelta
-import requests
 import truck_telemetry
 from pyproj import Proj, transform
+import asyncio
 import time
 from typing import TYPE_CHECKING
 from api.interface import (
@@ -14,6 +14,7 @@ from api.interface import (
     WingmanInitializationError,
 )
 from api.enums import LogType
+from services.http_client import get_http_session
 from skills.skill_base import Skill
 from services.file import get_writable_dir
 
@@ -195,7 +196,7 @@ class ATSTelemetry(Skill):
                 changed_data = await self.query_and_compare_data(self.telemetry_loop_data_points)
                 if changed_data:
                     await self.initiate_llm_call_with_changed_data(changed_data)
-                time.sleep(loop_time)
+                await asyncio.sleep(loop_time)
 
     # Compare new telemetry data in monitored fields and react if there are changes
     async def query_and_compare_data(self, data_points: list):
@@ -499,7 +500,7 @@ class ATSTelemetry(Skill):
                 except:
                     telemetry_started = False
             # Try again in ten seconds; maybe user has not loaded up Truck Simulator yet
-            time.sleep(10)
+            await asyncio.sleep(10)
         if self.loaded:
             await self.initialize_telemetry_cache_loop(10)
 
@@ -851,7 +852,7 @@ class ATSTelemetry(Skill):
         headers = {
             'User-Agent': f'ats_telemetry_skill {self.wingman.name}'
         }
-        response = requests.get(url, headers=headers)
+        response = await asyncio.to_thread(get_http_session().get, url, headers=headers)
         if response.status_code == 200:
             return response.json()
         else:
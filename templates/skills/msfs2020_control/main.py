@@ -1,6 +1,5 @@
-import time
+import asyncio
 import random
-import requests
 from typing import TYPE_CHECKING
 from SimConnect import *
 from api.interface import (
@@ -9,6 +8,7 @@ from api.interface import (
     WingmanInitializationError,
 )
 from api.enums import LogType
+from services.http_client import get_http_session
 from skills.skill_base import Skill
 
 if TYPE_CHECKING:
@@ -145,7 +145,7 @@ class Msfs2020Control(Skill):
 
         if tool_name == "get_data_from_sim":
             data_point = parameters.get("data_point")
-            value = self.aq.get(data_point)
+            value = await asyncio.to_thread(self.aq.get, data_point)
             function_response = f"{data_point} value is: {value}"
 
         elif tool_name == "set_data_or_perform_action_in_sim":
@@ -154,7 +154,7 @@ class Msfs2020Control(Skill):
             
             try:
                 if argument is not None:
-                    self.aq.set(action, argument)
+                    await asyncio.to_thread(self.aq.set, action, argument)
                 else:
                     event_to_trigger = self.ae.find(action)
                     event_to_trigger()
@@ -224,7 +224,7 @@ class Msfs2020Control(Skill):
                 await self.print_execution_time()
 
             if place_info:
-                on_ground = self.aq.get("SIM_ON_GROUND")
+                on_ground = await asyncio.to_thread(self.aq.get, "SIM_ON_GROUND")
                 on_ground_statement = "The plane is currently in the air."
                 if on_ground == False:
                     on_ground_statement = "The plane is currently on the ground."
@@ -251,7 +251,8 @@ class Msfs2020Control(Skill):
                         f"Attempting to find MSFS2020....",
                         color=LogType.INFO,
                     )
-                self.sm = SimConnect()
+                # connecting and every request wait for the sim, so keep them off the event loop
+                self.sm = await asyncio.to_thread(SimConnect)
                 self.aq = AircraftRequests(self.sm, _time=2000)
                 self.ae = AircraftEvents(self.sm)
                 self.already_initialized_simconnect = True
@@ -264,7 +265,7 @@ class Msfs2020Control(Skill):
                     await self.initialize_data_monitoring_loop()
             except:
                 # Wait 30 seconds between connect attempts
-                time.sleep(30)
+                await asyncio.sleep(30)
 
     async def initialize_data_monitoring_loop(self):
         if self.data_monitoring_loop_running:
@@ -299,7 +300,7 @@ class Msfs2020Control(Skill):
                             f"Something failed in looped monitoring check.  Could not return data or send to llm: {e}.",
                             color=LogType.INFO,
                         )
-                time.sleep(random_time)
+                await asyncio.sleep(random_time)
 
     async def stop_data_monitoring_loop(self):
         self.data_monitoring_loop_running = False
@@ -316,17 +317,17 @@ class Msfs2020Control(Skill):
         ground_altitude = 0
         # If all parameters are already provided, just run the request
         if latitude and longitude and altitude:
-            ground_altitude = self.aq.get("GROUND_ALTITUDE")
+            ground_altitude = await asyncio.to_thread(self.aq.get, "GROUND_ALTITUDE")
         # If only latitude and longitude, grab altitude so a reasonable "zoom level" can be set for place data
         elif latitude and longitude:
-            altitude = self.aq.get("PLANE_ALTITUDE")
-            ground_altitude = self.aq.get("GROUND_ALTITUDE")
+            altitude = await asyncio.to_thread(self.aq.get, "PLANE_ALTITUDE")
+            ground_altitude = await asyncio.to_thread(self.aq.get, "GROUND_ALTITUDE")
         # Otherwise grab all data components
         else:
-            latitude = self.aq.get("PLANE_LATITUDE")
-            longitude = self.aq.get("PLANE_LONGITUDE")
-            altitude = self.aq.get("PLANE_ALTITUDE")
-            ground_altitude = self.aq.get("GROUND_ALTITUDE")
+            latitude = await asyncio.to_thread(self.aq.get, "PLANE_LATITUDE")
+            longitude = await asyncio.to_thread(self.aq.get, "PLANE_LONGITUDE")
+            altitude = await asyncio.to_thread(self.aq.get, "PLANE_ALTITUDE")
+            ground_altitude = await asyncio.to_thread(self.aq.get, "GROUND_ALTITUDE")
 
         # If no values still, for instance, when connection is made but no data yet, return None
         if not latitude or not longitude or not altitude or not ground_altitude:
@@ -359,7 +360,7 @@ class Msfs2020Control(Skill):
         headers = {
             'User-Agent': f'msfs2020control_skill wingmanai {self.wingman.name}'
         }
-        response = requests.get(url, headers=headers)
+        response = await asyncio.to_thread(get_http_session().get, url, headers=headers)
         if response.status_code == 200:
             return response.json()
         else:
@@ -369,7 +370,7 @@ class Msfs2020Control(Skill):
         
     # Get LLM to provide a verbal response to the user, without requiring the user to initiate a communication with the LLM
     async def initiate_llm_call_with_plane_data(self, data):
-        on_ground = self.aq.get("SIM_ON_GROUND")
+        on_ground = await asyncio.to_thread(self.aq.get, "SIM_ON_GROUND")
         on_ground_statement = "The plane is currently in the air."
         if on_ground:
             on_ground_statement = "The plane is currently on the ground."
@@ -414,6 +415,10 @@ class Msfs2020Control(Skill):
     async def is_waiting_response_needed(self, tool_name: str) -> bool:
         return True
 
+    async def is_tool_exclusive(self, tool_name: str) -> bool:
+        # sim events must be sent in order
+        return True
+
     async def prepare(self) -> None:
         """Load the skill by trying to connect to the sim"""
         self.loaded = True
@@ -1,4 +1,3 @@
-import requests
 import json
 from typing import TYPE_CHECKING
 from api.enums import LogType
@@ -7,6 +6,7 @@ from api.interface import (
     SkillConfig,
     WingmanInitializationError,
 )
+from services.http_client import get_http_session
 from skills.skill_base import Skill
 import asyncio
 
@@ -218,7 +218,9 @@ class NMSAssistant(Skill):
         return tools
 
     async def request_api(self, endpoint: str) -> dict:
-        response = requests.get(f"{API_BASE_URL}{endpoint}")
+        response = await asyncio.to_thread(
+            get_http_session().get, f"{API_BASE_URL}{endpoint}"
+        )
         if response.status_code == 200:
             return response.json()
         else:
@@ -1,4 +1,4 @@
-import time
+import asyncio
 import copy
 from os import path
 from random import randrange
@@ -310,12 +310,12 @@ class RadioChatter(Skill):
         """Start the radio chatter."""
 
         self.radio_status = True
-        time.sleep(max(5, self.interval_min))  # sleep for min 5s else min interval
+        await asyncio.sleep(max(5, self.interval_min))  # sleep for min 5s else min interval
 
         while self.is_active():
             await self._generate_chatter()
             interval = self.randrange(self.interval_min, self.interval_max)
-            time.sleep(interval)
+            await asyncio.sleep(interval)
 
     def is_active(self) -> bool:
         return self.radio_status and self.loaded
@@ -406,7 +406,7 @@ class RadioChatter(Skill):
 
             # wait for audio_player idleing
             while self.wingman.audio_player.is_playing:
-                time.sleep(2)
+                await asyncio.sleep(2)
 
             if not self.is_active():
                 return
@@ -427,11 +427,11 @@ class RadioChatter(Skill):
                     f"Background radio chatter: {text}"
                 )
             while not self.wingman.audio_player.is_playing:
-                time.sleep(0.1)
+                await asyncio.sleep(0.1)
             await self._switch_voice(original_voice_setting, elevenlabs_streaming)
 
         while self.wingman.audio_player.is_playing:
-            time.sleep(1)  # stay in function call until last message got played
+            await asyncio.sleep(1)  # stay in function call until last message got played
 
     async def _get_random_voice_index(self, count: int) -> list[int]:
         """Switch voice to a random voice from the list."""
@@ -1,4 +1,4 @@
-import time
+import asyncio
 from typing import TYPE_CHECKING
 from api.interface import (
     SettingsConfig,
@@ -51,6 +51,10 @@ class TypingAssistant(Skill):
         ]
         return tools
 
+    async def is_tool_exclusive(self, tool_name: str) -> bool:
+        # typing must not be interleaved with other inputs
+        return True
+
     async def execute_tool(
         self, tool_name: str, parameters: dict[str, any]
     ) -> tuple[str, str]:
@@ -68,11 +72,14 @@ class TypingAssistant(Skill):
             content_to_type = parameters.get("content_to_type")
             press_enter = parameters.get("end_by_pressing_enter")
 
-            keyboard.write(content_to_type, delay=0.01, hold=0.01)
+            # types character by character, so keep it off the event loop
+            await asyncio.to_thread(
+                keyboard.write, content_to_type, delay=0.01, hold=0.01
+            )
 
             if press_enter is True:
                 keyboard.press("enter")
-                time.sleep(0.2)
+                await asyncio.sleep(0.2)
                 keyboard.release("enter")
 
             function_response = "Typed user request at active mouse cursor position."
@@ -14,6 +14,7 @@ import requests
 from api.enums import LogType, WingmanInitializationErrorType
 from api.interface import SettingsConfig, SkillConfig, WingmanInitializationError
 from services.file import get_writable_dir
+from services.http_client import get_http_session
 from skills.skill_base import Skill
 
 if TYPE_CHECKING:
@@ -714,6 +715,7 @@ class UEXCorp(Skill):
             None
         """
         self.dynamic_context += "\n" + content
+        self.prompt_changed()
 
     def _get_timestamp(self) -> int:
         """
@@ -765,7 +767,8 @@ class UEXCorp(Skill):
 
             timeout_error = False
             try:
-                response = requests.get(
+                response = await asyncio.to_thread(
+                    get_http_session().get,
                     url,
                     params=params,
                     timeout=(self.uexcorp_api_timeout * request_count),
@@ -818,7 +821,8 @@ class UEXCorp(Skill):
 
             timeout_error = False
             try:
-                response = requests.post(
+                response = await asyncio.to_thread(
+                    get_http_session().post,
                     url,
                     headers={
                         "accept": "application/json",
@@ -856,8 +860,10 @@ class UEXCorp(Skill):
                 f"https://api.star-citizen.wiki/api/v2/galactapedia/{article_id}"
             )
             try:
-                article_response = requests.get(
-                    article_url, timeout=self.uexcorp_api_timeout
+                article_response = await asyncio.to_thread(
+                    get_http_session().get,
+                    article_url,
+                    timeout=self.uexcorp_api_timeout,
                 )
                 article_response.raise_for_status()
             except requests.exceptions.RequestException as e:
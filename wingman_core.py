@@ -1,11 +1,8 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import os
 import re
-import threading
 from typing import Optional
 from fastapi import APIRouter, File, UploadFile
-import requests
 import sounddevice as sd
 from showinfm import show_in_file_manager
 import azure.cognitiveservices.speech as speechsdk
@@ -21,7 +18,9 @@ from api.enums import (
 from api.interface import (
     AudioDevice,
     AudioFile,
+    AudioSettings,
     AzureSttConfig,
+    ConfigDirInfo,
     ConfigWithDirInfo,
     ElevenlabsModel,
     VoiceActivationSettings,
@@ -35,24 +34,33 @@ from providers.xvasynth import XVASynth
 from wingmen.open_ai_wingman import OpenAiWingman
 from wingmen.wingman import Wingman
 from services.file import get_writable_dir
+from services.hotkeys import get_hotkey_codes
+from services.http_client import HttpClients, get_async_http_client
 from services.voice_service import VoiceService
 from services.settings_service import SettingsService
 from services.config_service import ConfigService
 from services.audio_player import AudioPlayer
 from services.audio_library import AudioLibrary
-from services.audio_recorder import RECORDING_PATH, AudioRecorder
+from services.audio_mixer import close_output_mixers, configure_output_mixers
+from services.audio_recorder import DEFAULT_PRE_ROLL, RECORDING_PATH, AudioRecorder
 from services.config_manager import ConfigManager
 from services.printr import Printr
+from services.recorded_audio import RecordedAudio
+from services.runtime import Runtime
 from services.secret_keeper import SecretKeeper
 from services.tower import Tower
 from services.websocket_user import WebSocketUser
 
 
+VOICE_ACTIVATION_GROUP = "voice_activation"
+
+
 class WingmanCore(WebSocketUser):
     def __init__(
         self, config_manager: ConfigManager, app_root_path: str, app_is_bundled: bool
     ):
         self.printr = Printr()
+        self.runtime = Runtime()
         self.app_root_path = app_root_path
 
         self.router = APIRouter()
@@ -268,6 +276,7 @@ class WingmanCore(WebSocketUser):
         self.audio_library = AudioLibrary()
 
         self.tower: Tower = None
+        self.tower_config_dir: Optional[ConfigDirInfo] = None
 
         self.active_recording = {"key": "", "wingman": None}
 
@@ -288,6 +297,9 @@ class WingmanCore(WebSocketUser):
         self.settings_service.settings_events.subscribe(
             "audio_devices_changed", self.on_audio_devices_changed
         )
+        self.settings_service.settings_events.subscribe(
+            "audio_settings_changed", self.on_audio_settings_changed
+        )
         self.settings_service.settings_events.subscribe(
             "voice_activation_changed", self.set_voice_activation
         )
@@ -322,12 +334,28 @@ class WingmanCore(WebSocketUser):
                 self.settings_service.settings.audio.output,
             ]
             self.audio_recorder.update_input_stream()
+            self.__apply_audio_settings(self.settings_service.settings.audio)
 
     async def startup(self):
         if self.settings_service.settings.voice_activation.enabled:
             await self.set_voice_activation(is_enabled=True)
 
     async def initialize_tower(self, config_dir_info: ConfigWithDirInfo):
+        config_dir = config_dir_info.config_dir
+        if (
+            self.tower
+            and self.tower_config_dir
+            and self.tower_config_dir.directory == config_dir.directory
+        ):
+            # the same config was reloaded, so only the Wingmen that changed are touched
+            self.tower_errors = await self.tower.reconcile(
+                config=config_dir_info.config,
+                settings=self.config_manager.settings_config,
+            )
+            for error in self.tower_errors:
+                self.printr.toast_error(error.message)
+            return
+
         await self.unload_tower()
 
         self.tower = Tower(
@@ -343,6 +371,7 @@ class WingmanCore(WebSocketUser):
         for error in self.tower_errors:
             self.printr.toast_error(error.message)
 
+        self.tower_config_dir = config_dir
         self.config_service.set_tower(self.tower)
 
     async def unload_tower(self):
@@ -350,17 +379,12 @@ class WingmanCore(WebSocketUser):
             for wingman in self.tower.wingmen:
                 await wingman.unload()
             self.tower = None
+            self.tower_config_dir = None
             self.config_service.set_tower(None)
 
     def is_hotkey_pressed(self, hotkey: list[int] | str) -> bool:
-        codes = []
-
-        if isinstance(hotkey, str):
-            hotkey_codes = keyboard.parse_hotkey(hotkey)
-            codes = [item[0] for tup in hotkey_codes for item in tup]
-
-        if isinstance(hotkey, list):
-            codes = hotkey
+        # parsed hotkeys are cached
+        codes = get_hotkey_codes(hotkey)
 
         # check if all hotkey codes are in the key events code list
         is_pressed = all(code in self.key_events for code in codes)
@@ -381,11 +405,9 @@ class WingmanCore(WebSocketUser):
         if self.tower and self.active_recording["key"] == "":
             wingman = None
             if key:
-                for potential_wingman in self.tower.wingmen:
-                    if potential_wingman.get_record_key() and self.is_hotkey_pressed(
-                        potential_wingman.get_record_key()
-                    ):
-                        wingman = potential_wingman
+                wingman = self.tower.get_wingman_from_key(
+                    key.scan_code, self.key_events
+                )
             elif button:
                 wingman = self.tower.get_wingman_from_mouse(button)
             if wingman:
@@ -410,7 +432,7 @@ class WingmanCore(WebSocketUser):
             or self.active_recording["key"] == button
         ):
             wingman = self.active_recording["wingman"]
-            recorded_audio_wav = self.audio_recorder.stop_recording(
+            recording = self.audio_recorder.stop_recording(
                 wingman_name=wingman.name
             )
             self.active_recording = {"key": "", "wingman": None}
@@ -422,20 +444,9 @@ class WingmanCore(WebSocketUser):
             ):
                 self.start_voice_recognition()
 
-            def run_async_process():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    if isinstance(wingman, Wingman):
-                        loop.run_until_complete(
-                            wingman.process(audio_input_wav=str(recorded_audio_wav))
-                        )
-                finally:
-                    loop.close()
-
-            if recorded_audio_wav:
-                play_thread = threading.Thread(target=run_async_process)
-                play_thread.start()
+            if recording and isinstance(wingman, Wingman):
+                self.save_recording_for_debugging(recording)
+                wingman.submit(recording=recording)
 
     def on_key(self, key):
         if key.event_type == "down":
@@ -458,25 +469,36 @@ class WingmanCore(WebSocketUser):
             self.on_release(button=event.button)
 
     # called when AudioRecorder regonized voice
-    def on_audio_recorder_speech_recorded(self, recording_file: str):
-        def run_async_process():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(wingman.process(transcript=text))
-            finally:
-                loop.close()
+    def on_audio_recorder_speech_recorded(self, recording: RecordedAudio):
+        self.save_recording_for_debugging(recording)
+        self.runtime.run(
+            self.process_voice_activation_recording,
+            recording,
+            group=VOICE_ACTIVATION_GROUP,
+        )
+
+    def save_recording_for_debugging(self, recording: RecordedAudio):
+        """Writes the recording to the audio_output directory if enabled in the settings. Recordings are kept in memory otherwise."""
+        if not self.settings_service.settings.debug_save_recordings:
+            return
 
+        file_path = os.path.join(
+            get_writable_dir(RECORDING_PATH), os.path.basename(recording.name)
+        )
+        self.runtime.run(recording.save, file_path)
+
+    async def process_voice_activation_recording(self, recording: RecordedAudio):
         provider = self.settings_service.settings.voice_activation.stt_provider
         text = None
+        wingman = None
 
         if provider == VoiceActivationSttProvider.WINGMAN_PRO:
             wingman_pro = WingmanPro(
                 wingman_name="system",
                 settings=self.settings_service.settings.wingman_pro,
             )
-            transcription = wingman_pro.transcribe_azure_speech(
-                filename=recording_file,
+            transcription = await wingman_pro.transcribe_azure_speech(
+                recording=recording,
                 config=AzureSttConfig(
                     languages=self.settings_service.settings.voice_activation.azure.languages,
                     # unused as Wingman Pro sets this at API level - just for Pydantic:
@@ -501,8 +523,8 @@ class WingmanCore(WebSocketUser):
 
                 return original_text != text, text
 
-            transcription = self.whispercpp.transcribe(
-                filename=recording_file,
+            transcription = await self.whispercpp.transcribe(
+                recording=recording,
                 config=self.settings_service.settings.voice_activation.whispercpp_config,
             )
             if transcription:
@@ -516,14 +538,13 @@ class WingmanCore(WebSocketUser):
         elif provider == VoiceActivationSttProvider.OPENAI:
             # TODO: can't await secret_keeper.retrieve here, so just assume the secret is there...
             openai = OpenAi(api_key=self.secret_keeper.secrets["openai"])
-            transcription = openai.transcribe(filename=recording_file)
+            transcription = await openai.transcribe(recording=recording)
             text = transcription.text
 
         if text:
             wingman = self.tower.get_wingman_from_text(text)
             if wingman:
-                play_thread = threading.Thread(target=run_async_process)
-                play_thread.start()
+                wingman.submit(transcript=text)
         else:
             self.printr.print(
                 "ignored empty transcription - probably just noise.", server_only=True
@@ -534,10 +555,15 @@ class WingmanCore(WebSocketUser):
 
         # get current audio devices
         current_mic = sd.default.device[0]
+        current_output = sd.default.device[1]
 
         # set new devices
         sd.default.device = devices
 
+        # the output mixer keeps its stream open, so reopen it on the new device
+        if current_output != devices[1]:
+            close_output_mixers()
+
         # update input stream if the input device has changed
         if current_mic != devices[0]:
             self.audio_recorder.valid_mic = True  # this allows a new error message
@@ -546,6 +572,20 @@ class WingmanCore(WebSocketUser):
                 self.start_voice_recognition(mute=True)
                 self.start_voice_recognition(mute=False, adjust_for_ambient_noise=True)
 
+    async def on_audio_settings_changed(self, audio_settings: AudioSettings):
+        self.__apply_audio_settings(audio_settings)
+
+    def __apply_audio_settings(self, audio_settings: AudioSettings):
+        configure_output_mixers(
+            blocksize=audio_settings.output_blocksize,
+            latency=audio_settings.output_latency,
+        )
+        self.audio_recorder.set_pre_roll(
+            audio_settings.input_pre_roll
+            if audio_settings.input_pre_roll is not None
+            else DEFAULT_PRE_ROLL
+        )
+
     async def set_voice_activation(self, is_enabled: bool):
         if is_enabled:
             if (
@@ -560,19 +600,10 @@ class WingmanCore(WebSocketUser):
 
     # called when Azure Speech Recognizer recognized voice
     def on_azure_voice_recognition(self, voice_event):
-        def run_async_process():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(wingman.process(transcript=text))
-            finally:
-                loop.close()
-
         text = voice_event.result.text
         wingman = self.tower.get_wingman_from_text(text)
         if text and wingman:
-            play_thread = threading.Thread(target=run_async_process)
-            play_thread.start()
+            wingman.submit(transcript=text)
 
     async def __init_azure_voice_activation(self):
         if self.azure_speech_recognizer or not self.config_service.current_config:
@@ -713,17 +744,8 @@ class WingmanCore(WebSocketUser):
     async def send_text_to_wingman(self, text: str, wingman_name: str):
         wingman = self.tower.get_wingman_by_name(wingman_name)
 
-        def run_async_process():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(wingman.process(transcript=text))
-            finally:
-                loop.close()
-
         if wingman and text:
-            play_thread = threading.Thread(target=run_async_process)
-            play_thread.start()
+            wingman.submit(transcript=text)
 
     # POST /send-audio-to-wingman
     async def send_audio_to_wingman(
@@ -734,27 +756,13 @@ class WingmanCore(WebSocketUser):
             return
 
         contents = await file.read()
-
-        filename = os.path.join(
-            get_writable_dir(RECORDING_PATH), "client_recording.wav"
+        recording = RecordedAudio.from_file_data(
+            contents, name=file.filename or "client_recording.wav"
         )
-        with open(filename, "wb") as f:
-            f.write(contents)
 
-        def run_async_process():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                if isinstance(wingman, Wingman):
-                    loop.run_until_complete(
-                        wingman.process(audio_input_wav=str(filename))
-                    )
-            finally:
-                loop.close()
-
-        if filename:
-            play_thread = threading.Thread(target=run_async_process)
-            play_thread.start()
+        if isinstance(wingman, Wingman):
+            self.save_recording_for_debugging(recording)
+            wingman.submit(recording=recording)
 
     # POST /reset-conversation-history
     def reset_conversation_history(self, wingman_name: Optional[str] = None):
@@ -864,7 +872,9 @@ class WingmanCore(WebSocketUser):
 
     # GET /models/openrouter
     async def get_openrouter_models(self):
-        response = requests.get(url=f"https://openrouter.ai/api/v1/models", timeout=10)
+        response = await get_async_http_client().get(
+            url="https://openrouter.ai/api/v1/models", timeout=10
+        )
         response.raise_for_status()
         content = response.json()
         return content.get("data", [])
@@ -872,7 +882,7 @@ class WingmanCore(WebSocketUser):
     # GET /models/groq
     async def get_groq_models(self):
         groq_api_key = await self.secret_keeper.retrieve(key="groq", requester="Groq")
-        response = requests.get(
+        response = await get_async_http_client().get(
             url="https://api.groq.com/openai/v1/models",
             timeout=10,
             headers={
@@ -888,7 +898,7 @@ class WingmanCore(WebSocketUser):
         cerebras_api_key = await self.secret_keeper.retrieve(
             key="cerebras", requester="Cerebras"
         )
-        response = requests.get(
+        response = await get_async_http_client().get(
             url="https://api.cerebras.ai/v1/models",
             timeout=10,
             headers={
@@ -904,7 +914,7 @@ class WingmanCore(WebSocketUser):
         openai_api_key = await self.secret_keeper.retrieve(
             key="openai", requester="OpenAI"
         )
-        response = requests.get(
+        response = await get_async_http_client().get(
             url="https://api.openai.com/v1/models",
             timeout=10,
             headers={
@@ -1008,12 +1018,8 @@ class WingmanCore(WebSocketUser):
         )
         elevenlabs = ElevenLabs(api_key=elevenlabs_api_key, wingman_name="")
         try:
-            # Run the synchronous method in a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as pool:
-                data = await loop.run_in_executor(
-                    pool, elevenlabs.get_subscription_data
-                )
+            # Run the synchronous method on the worker pool
+            data = await asyncio.to_thread(elevenlabs.get_subscription_data)
             return data
         except ValueError as e:
             self.printr.toast_error(f"Elevenlabs: \n{str(e)}")
@@ -1022,3 +1028,6 @@ class WingmanCore(WebSocketUser):
         await self.stop_whispercpp()
         await self.stop_xvasynth()
         await self.unload_tower()
+        await self.runtime.shutdown()
+        close_output_mixers()
+        await HttpClients().close()
@@ -2,11 +2,20 @@ import json
 import time
 import asyncio
 import random
-from typing import Mapping, Optional
-from openai.types.chat import ChatCompletion
+from typing import Optional
+import httpx
+from openai import APIConnectionError, APIStatusError
+from openai.types.chat import (
+    ChatCompletion,
+    ChatCompletionMessage,
+    ChatCompletionMessageToolCall,
+)
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message_tool_call import Function
 from api.interface import (
     SettingsConfig,
     SoundConfig,
+    WingmanConfig,
     WingmanInitializationError,
 )
 from api.enums import (
@@ -24,8 +33,18 @@ from providers.elevenlabs import ElevenLabs
 from providers.google import GoogleGenAI
 from providers.open_ai import OpenAi, OpenAiAzure
 from providers.wingman_pro import WingmanPro
+from services.audio_player import previous_playback
+from services.conversation_store import ConversationStore
 from services.markdown import cleanup_text
 from services.printr import Printr
+from services.recorded_audio import RecordedAudio
+from services.sentence_splitter import SentenceSplitter
+from services.settings_delta import SettingsDelta
+from services.token_estimator import (
+    estimate_message_tokens,
+    estimate_tools_tokens,
+)
+from services.tts_cache import TtsCache, pending_cache_key
 from skills.skill_base import Skill
 from wingmen.wingman import Wingman
 
@@ -48,6 +67,7 @@ class OpenAiWingman(Wingman):
         super().__init__(*args, **kwargs)
 
         self.edge_tts = Edge()
+        self.tts_cache = TtsCache()
 
         # validate will set these:
         self.openai: OpenAi = None
@@ -62,15 +82,13 @@ class OpenAiWingman(Wingman):
         self.google: GoogleGenAI = None
         self.perplexity: OpenAi = None
 
-        # tool queue
-        self.pending_tool_calls = []
         self.last_gpt_call = None
 
         # generated addional content
         self.instant_responses = []
         self.last_used_instant_responses = []
 
-        self.messages = []
+        self.messages = ConversationStore()
         """The conversation history that is used for the GPT calls"""
 
         self.azure_api_keys = {key: None for key in self.AZURE_SERVICES}
@@ -78,6 +96,13 @@ class OpenAiWingman(Wingman):
         self.tool_skills: dict[str, Skill] = {}
         self.skill_tools: list[dict] = []
 
+        self.context_message: Optional[dict] = None
+        """The cached system message. Rebuilt after invalidate_context() was called."""
+        self.context_tokens = 0
+        self.tools: Optional[list[dict]] = None
+        """The cached tool descriptors. Rebuilt after invalidate_tools() was called."""
+        self.tools_tokens = 0
+
     async def validate(self):
         errors = await super().validate()
 
@@ -217,12 +242,16 @@ class OpenAiWingman(Wingman):
         await super().unload_skills()
         self.tool_skills = {}
         self.skill_tools = []
+        self.invalidate_context()
+        self.invalidate_tools()
 
     async def prepare_skill(self, skill: Skill):
         # prepare the skill and skill tools
         for tool_name, tool in skill.get_tools():
             self.tool_skills[tool_name] = skill
             self.skill_tools.append(tool)
+        self.invalidate_context()
+        self.invalidate_tools()
 
         # init skill methods
         skill.llm_call = self.actual_llm_call
@@ -323,15 +352,31 @@ class OpenAiWingman(Wingman):
             )
 
     # overrides the base class method
-    async def update_settings(self, settings: SettingsConfig):
+    async def update_config(
+        self, config: WingmanConfig, validate=False, update_skills=False
+    ):
+        updated = await super().update_config(config, validate, update_skills)
+        # the prompts or commands might have changed (or were reverted)
+        self.invalidate_context()
+        self.invalidate_tools()
+        return updated
+
+    # overrides the base class method
+    async def update_settings(
+        self, settings: SettingsConfig, delta: Optional[SettingsDelta] = None
+    ):
         """Update the settings of the Wingman. This method should always be called when the user Settings have changed."""
 
         wingman_pro_changed = (
-            self.settings.wingman_pro.base_url != settings.wingman_pro.base_url
-            or self.settings.wingman_pro.region != settings.wingman_pro.region
+            delta.changed("wingman_pro.base_url", "wingman_pro.region")
+            if delta is not None
+            else (
+                self.settings.wingman_pro.base_url != settings.wingman_pro.base_url
+                or self.settings.wingman_pro.region != settings.wingman_pro.region
+            )
         )
 
-        await super().update_settings(settings)
+        await super().update_settings(settings, delta)
 
         if wingman_pro_changed and self.uses_provider("wingman_pro"):
             await self.validate_and_set_wingman_pro()
@@ -398,11 +443,11 @@ class OpenAiWingman(Wingman):
                         completion = await self.actual_llm_call(messages)
                     retry_count += 1
 
-    async def _transcribe(self, audio_input_wav: str) -> str | None:
+    async def _transcribe(self, recording: RecordedAudio) -> str | None:
         """Transcribes the recorded audio to text using the OpenAI Whisper API.
 
         Args:
-            audio_input_wav (str): The path to the audio file that contains the user's speech. This is a recording of what you you said.
+            recording (RecordedAudio): The user's speech. This is a recording of what you you said.
 
         Returns:
             str | None: The transcript of the audio file or None if the transcription failed.
@@ -410,35 +455,35 @@ class OpenAiWingman(Wingman):
         transcript = None
 
         if self.config.features.stt_provider == SttProvider.AZURE:
-            transcript = self.openai_azure.transcribe_whisper(
-                filename=audio_input_wav,
+            transcript = await self.openai_azure.transcribe_whisper(
+                recording=recording,
                 api_key=self.azure_api_keys["whisper"],
                 config=self.config.azure.whisper,
             )
         elif self.config.features.stt_provider == SttProvider.AZURE_SPEECH:
-            transcript = self.openai_azure.transcribe_azure_speech(
-                filename=audio_input_wav,
+            transcript = await self.openai_azure.transcribe_azure_speech(
+                recording=recording,
                 api_key=self.azure_api_keys["tts"],
                 config=self.config.azure.stt,
             )
         elif self.config.features.stt_provider == SttProvider.WHISPERCPP:
-            transcript = self.whispercpp.transcribe(
-                filename=audio_input_wav, config=self.config.whispercpp
+            transcript = await self.whispercpp.transcribe(
+                recording=recording, config=self.config.whispercpp
             )
         elif self.config.features.stt_provider == SttProvider.WINGMAN_PRO:
             if self.config.wingman_pro.stt_provider == WingmanProSttProvider.WHISPER:
-                transcript = self.wingman_pro.transcribe_whisper(
-                    filename=audio_input_wav
+                transcript = await self.wingman_pro.transcribe_whisper(
+                    recording=recording
                 )
             elif (
                 self.config.wingman_pro.stt_provider
                 == WingmanProSttProvider.AZURE_SPEECH
             ):
-                transcript = self.wingman_pro.transcribe_azure_speech(
-                    filename=audio_input_wav, config=self.config.azure.stt
+                transcript = await self.wingman_pro.transcribe_azure_speech(
+                    recording=recording, config=self.config.azure.stt
                 )
         elif self.config.features.stt_provider == SttProvider.OPENAI:
-            transcript = self.openai.transcribe(filename=audio_input_wav)
+            transcript = await self.openai.transcribe(recording=recording)
 
         if not transcript:
             return None
@@ -470,11 +515,18 @@ class OpenAiWingman(Wingman):
         )
         if instant_response:
             await self.add_assistant_message(instant_response)
-            return instant_response, instant_response, None, True
+            # played here instead of in process(), so it can be flagged as reusable for the TTS cache
+            self.turn_execution(self.play_to_user, instant_response, False, None, True)
+            return None, instant_response, None, True
+
+        # streamed responses are spoken sentence by sentence while they are generated
+        stream_to_user = self._is_response_streaming_enabled()
 
         # make a GPT call with the conversation history
         # if an instant command got executed, prevent tool calls to avoid duplicate executions
-        completion = await self._llm_call(instant_command_executed is False)
+        completion = await self._llm_call(
+            instant_command_executed is False, stream_to_user=stream_to_user
+        )
 
         if completion is None:
             return None, None, None, True
@@ -490,13 +542,20 @@ class OpenAiWingman(Wingman):
         while tool_calls:
             if is_waiting_response_needed:
                 message = None
+                spoken = False
+                is_filler = False
                 if response_message.content:
                     message = response_message.content
+                    spoken = stream_to_user
                 elif self.instant_responses:
                     message = self._get_random_filler()
+                    is_filler = True
                     is_summarize_needed = True
                 if message:
-                    self.threaded_execution(self.play_to_user, message, interrupt)
+                    if not spoken:
+                        self.turn_execution(
+                            self.play_to_user, message, interrupt, None, is_filler
+                        )
                     await printr.print_async(
                         f"{message}",
                         color=LogType.POSITIVE,
@@ -515,7 +574,9 @@ class OpenAiWingman(Wingman):
                 return None, instant_response, None, interrupt
 
             if is_summarize_needed:
-                completion = await self._llm_call(True)
+                completion = await self._llm_call(
+                    True, stream_to_user=stream_to_user, no_interrupt=not interrupt
+                )
                 if completion is None:
                     return None, None, None, True
 
@@ -530,8 +591,19 @@ class OpenAiWingman(Wingman):
             elif is_waiting_response_needed:
                 return None, None, None, interrupt
 
+        if stream_to_user:
+            # already spoken while streaming, so only return it for printing
+            return None, response_message.content, None, interrupt
+
         return response_message.content, response_message.content, None, interrupt
 
+    def _is_response_streaming_enabled(self) -> bool:
+        """Checks if LLM responses should be streamed and spoken sentence by sentence."""
+        return bool(self.config.features.stream_responses) and (
+            self.config.features.conversation_provider
+            not in [ConversationProvider.GOOGLE, ConversationProvider.WINGMAN_PRO]
+        )
+
     def _get_random_filler(self):
         # get last two used instant responses
         if len(self.last_used_instant_responses) > 2:
@@ -601,8 +673,14 @@ class OpenAiWingman(Wingman):
         # do not tamper with this message as it will lead to 400 errors!
         self.messages.append(message)
 
-        # adding dummy tool responses to prevent corrupted message history on parallel requests
-        # and checks if waiting response should be played
+        # adding dummy tool responses to prevent corrupted message history on parallel requests.
+        # This must not await anything, so that a cancelled turn can't leave tool calls without responses.
+        for tool_call in tool_calls or []:
+            if tool_call.id:
+                # adding a dummy tool response to get updated later
+                self._add_tool_response(tool_call, "Loading..", False)
+
+        # check if waiting response should be played
         unique_tools = {}
         is_waiting_response_needed = False
         is_summarize_needed = False
@@ -611,8 +689,6 @@ class OpenAiWingman(Wingman):
             for tool_call in tool_calls:
                 if not tool_call.id:
                     continue
-                # adding a dummy tool response to get updated later
-                self._add_tool_response(tool_call, "Loading..", False)
 
                 function_name = tool_call.function.name
                 if function_name in self.tool_skills:
@@ -640,10 +716,7 @@ class OpenAiWingman(Wingman):
             msg["tool_call_id"] = tool_call.id
         if tool_call.function.name is not None:
             msg["name"] = tool_call.function.name
-        self.messages.append(msg)
-
-        if tool_call.id and not completed:
-            self.pending_tool_calls.append(tool_call.id)
+        self.messages.add_tool_response(msg, pending=not completed)
 
     async def _update_tool_response(self, tool_call_id, response) -> bool:
         """Updates a tool response in the conversation history. This also moves the message to the end of the history if all tool responses are given.
@@ -658,75 +731,16 @@ class OpenAiWingman(Wingman):
         if not tool_call_id:
             return False
 
-        completed = False
-        index = len(self.messages)
-
-        # go through message history to find and update the tool call
-        for message in reversed(self.messages):
-            index -= 1
-            if (
-                self.__get_message_role(message) == "tool"
-                and message.get("tool_call_id") == tool_call_id
-            ):
-                message["content"] = str(response)
-                if tool_call_id in self.pending_tool_calls:
-                    self.pending_tool_calls.remove(tool_call_id)
-                break
-        if not index:
-            return False
-
-        # find the assistant message that triggered the tool call
-        for message in reversed(self.messages[:index]):
-            index -= 1
-            if self.__get_message_role(message) == "assistant":
-                break
-
-        # check if all tool calls are completed
-        completed = True
-        for tool_call in self.messages[index].tool_calls:
-            if tool_call.id in self.pending_tool_calls:
-                completed = False
-                break
-        if not completed:
-            return True
-
-        # find the first user message(s) that triggered this assistant message
-        index -= 1  # skip the assistant message
-        for message in reversed(self.messages[:index]):
-            index -= 1
-            if self.__get_message_role(message) != "user":
-                index += 1
-                break
-
-        # built message block to move
-        start_index = index
-        end_index = start_index
-        reached_tool_call = False
-        for message in self.messages[start_index:]:
-            if not reached_tool_call and self.__get_message_role(message) == "tool":
-                reached_tool_call = True
-            if reached_tool_call and self.__get_message_role(message) == "user":
-                end_index -= 1
-                break
-            end_index += 1
-        if end_index == len(self.messages):
-            end_index -= 1  # loop ended at the end of the message history, so we have to go back one index
-        message_block = self.messages[start_index : end_index + 1]
-
-        # check if the message block is already at the end
-        if end_index == len(self.messages) - 1:
-            return True
-
-        # move message block to the end
-        del self.messages[start_index : end_index + 1]
-        self.messages.extend(message_block)
+        updated, moved = self.messages.update_tool_response(
+            tool_call_id, str(response)
+        )
 
-        if self.settings.debug_mode:
+        if moved and self.settings.debug_mode:
             await printr.print_async(
                 "Moved message block to the end.", color=LogType.INFO
             )
 
-        return True
+        return updated
 
     async def add_user_message(self, content: str):
         """Shortens the conversation history if needed and adds a user message to it.
@@ -765,37 +779,17 @@ class OpenAiWingman(Wingman):
         if remember_messages is None or len(self.messages) == 0:
             return 0  # Configuration not set, nothing to delete.
 
-        # Find the cutoff index where to end deletion, making sure to only count 'user' messages towards the limit starting with newest messages.
-        cutoff_index = len(self.messages)
-        user_message_count = 0
-        for message in reversed(self.messages):
-            if self.__get_message_role(message) == "user":
-                user_message_count += 1
-                if user_message_count == remember_messages:
-                    break  # Found the cutoff point.
-            cutoff_index -= 1
-
-        # If messages below the keep limit, don't delete anything.
-        if user_message_count < remember_messages:
-            return 0
-
-        total_deleted_messages = cutoff_index  # Messages to delete.
-
-        # Remove the pending tool calls that are no longer needed.
-        for mesage in self.messages[:cutoff_index]:
-            if (
-                self.__get_message_role(mesage) == "tool"
-                and mesage.get("tool_call_id") in self.pending_tool_calls
-            ):
-                self.pending_tool_calls.remove(mesage.get("tool_call_id"))
-                if self.settings.debug_mode:
-                    await printr.print_async(
-                        f"Removing pending tool call {mesage.get('tool_call_id')} due to message history clean up.",
-                        color=LogType.WARNING,
-                    )
+        # Only 'user' messages count towards the limit, so that the next one is the last to remember.
+        total_deleted_messages, dropped_tool_calls = self.messages.trim(
+            remember_messages
+        )
 
-        # Remove the messages before the cutoff index, exclusive of the system message.
-        del self.messages[:cutoff_index]
+        if self.settings.debug_mode:
+            for tool_call_id in dropped_tool_calls:
+                await printr.print_async(
+                    f"Removing pending tool call {tool_call_id} due to message history clean up.",
+                    color=LogType.WARNING,
+                )
 
         # Optional debugging printout.
         if self.settings.debug_mode and total_deleted_messages > 0:
@@ -808,7 +802,7 @@ class OpenAiWingman(Wingman):
 
     def reset_conversation_history(self):
         """Resets the conversation history by removing all messages."""
-        self.messages = []
+        self.messages.clear()
 
     async def _try_instant_activation(self, transcript: str) -> str:
         """Tries to execute an instant activation command if present in the transcript.
@@ -837,20 +831,30 @@ class OpenAiWingman(Wingman):
         return None, False
 
     async def get_context(self):
-        """build the context and inserts it into the messages"""
-        skill_prompts = ""
-        for skill in self.skills:
-            prompt = await skill.get_prompt()
-            if prompt:
-                skill_prompts += "\n\n" + skill.name + "\n\n" + prompt
+        """Returns the system prompt. It is only rebuilt after invalidate_context() was called."""
+        if self.context_message is None:
+            skill_prompts = ""
+            for skill in self.skills:
+                prompt = await skill.get_prompt()
+                if prompt:
+                    skill_prompts += "\n\n" + skill.name + "\n\n" + prompt
+
+            context = self.config.prompts.system_prompt.format(
+                backstory=self.config.prompts.backstory, skills=skill_prompts
+            )
+            context_message = {"role": "system", "content": context}
+            self.context_tokens = estimate_message_tokens(context_message)
+            self.context_message = context_message
+        return self.context_message["content"]
 
-        context = self.config.prompts.system_prompt.format(
-            backstory=self.config.prompts.backstory, skills=skill_prompts
-        )
-        return context
+    def invalidate_context(self):
+        """Call this if the system prompt changed, e.g. because a skill provides new dynamic data in get_prompt()."""
+        self.context_message = None
 
     async def add_context(self, messages):
-        messages.insert(0, {"role": "system", "content": (await self.get_context())})
+        """Inserts the system message into the messages. The same message is reused as long as the prompt doesn't change."""
+        await self.get_context()
+        messages.insert(0, self.context_message)
 
     async def generate_image(self, text: str) -> str:
         """
@@ -865,46 +869,55 @@ class OpenAiWingman(Wingman):
 
         return ""
 
-    async def actual_llm_call(self, messages, tools: list[dict] = None):
+    async def actual_llm_call(
+        self, messages, tools: list[dict] = None, stream: bool = False
+    ):
         """
         Perform the actual LLM call with the messages provided.
+
+        If stream is True, OpenAI-compatible providers return a chunk stream instead of a completion.
         """
 
         if self.config.features.conversation_provider == ConversationProvider.AZURE:
-            completion = self.openai_azure.ask(
+            completion = await self.openai_azure.ask(
                 messages=messages,
+                stream=stream,
                 api_key=self.azure_api_keys["conversation"],
                 config=self.config.azure.conversation,
                 tools=tools,
             )
         elif self.config.features.conversation_provider == ConversationProvider.OPENAI:
-            completion = self.openai.ask(
+            completion = await self.openai.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.openai.conversation_model,
             )
         elif self.config.features.conversation_provider == ConversationProvider.MISTRAL:
-            completion = self.mistral.ask(
+            completion = await self.mistral.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.mistral.conversation_model.value,
             )
         elif self.config.features.conversation_provider == ConversationProvider.GROQ:
-            completion = self.groq.ask(
+            completion = await self.groq.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.groq.conversation_model,
             )
         elif (
             self.config.features.conversation_provider == ConversationProvider.CEREBRAS
         ):
-            completion = self.cerebras.ask(
+            completion = await self.cerebras.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.cerebras.conversation_model,
             )
         elif self.config.features.conversation_provider == ConversationProvider.GOOGLE:
-            completion = self.google.ask(
+            completion = await self.google.ask(
                 messages=messages,
                 tools=tools,
                 model=self.config.google.conversation_model.value,
@@ -913,16 +926,18 @@ class OpenAiWingman(Wingman):
             self.config.features.conversation_provider
             == ConversationProvider.OPENROUTER
         ):
-            completion = self.openrouter.ask(
+            completion = await self.openrouter.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.openrouter.conversation_model,
             )
         elif (
             self.config.features.conversation_provider == ConversationProvider.LOCAL_LLM
         ):
-            completion = self.local_llm.ask(
+            completion = await self.local_llm.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.local_llm.conversation_model,
             )
@@ -930,7 +945,7 @@ class OpenAiWingman(Wingman):
             self.config.features.conversation_provider
             == ConversationProvider.WINGMAN_PRO
         ):
-            completion = self.wingman_pro.ask(
+            completion = await self.wingman_pro.ask(
                 messages=messages,
                 deployment=self.config.wingman_pro.conversation_deployment,
                 tools=tools,
@@ -938,17 +953,28 @@ class OpenAiWingman(Wingman):
         elif (
             self.config.features.conversation_provider == ConversationProvider.PERPLEXITY
         ):
-            completion = self.perplexity.ask(
+            completion = await self.perplexity.ask(
                 messages=messages,
+                stream=stream,
                 tools=tools,
                 model=self.config.perplexity.conversation_model.value,
             )
 
         return completion
 
-    async def _llm_call(self, allow_tool_calls: bool = True):
+    async def _llm_call(
+        self,
+        allow_tool_calls: bool = True,
+        stream_to_user: bool = False,
+        no_interrupt: bool = False,
+    ):
         """Makes the primary LLM call with the conversation history and tools enabled.
 
+        Args:
+            allow_tool_calls (bool): Whether the LLM may call tools.
+            stream_to_user (bool): Stream the response and speak each sentence as soon as it is complete.
+            no_interrupt (bool): Whether the first streamed sentence should wait for the current playback to finish.
+
         Returns:
             The LLM completion object or None if the call fails.
         """
@@ -962,15 +988,26 @@ class OpenAiWingman(Wingman):
 
         if self.settings.debug_mode:
             self.start_execution_benchmark()
-            await printr.print_async(
-                f"Calling LLM with {(len(self.messages))} messages (excluding context) and {len(tools) if tools else 0} tools.",
-                color=LogType.INFO,
-            )
 
-        messages = self.messages.copy()
-        await self.add_context(messages)
-        completion = await self.actual_llm_call(messages, tools)
+        messages = await self._build_llm_messages(tools)
+        completion = await self.actual_llm_call(messages, tools, stream=stream_to_user)
+
+        if (
+            stream_to_user
+            and completion is not None
+            and not isinstance(completion, ChatCompletion)
+        ):
+            completion = await self._collect_streamed_completion(
+                completion, thiscall, no_interrupt
+            )
 
+        usage = getattr(completion, "usage", None)
+        if usage:
+            printr.print(
+                f"LLM call of {self.name} used {usage.prompt_tokens} prompt and {usage.completion_tokens} completion tokens.",
+                color=LogType.INFO,
+                server_only=True,
+            )
         if self.settings.debug_mode:
             await self.print_execution_time(reset_timer=True)
 
@@ -983,6 +1020,212 @@ class OpenAiWingman(Wingman):
 
         return completion
 
+    async def _build_llm_messages(self, tools: list[dict] | None) -> list[dict]:
+        """Builds the messages of an LLM call: the context and the conversation history.
+
+        If the wingman has a token budget, the oldest messages are dropped until the estimated tokens
+        of the context, the tools and the history fit into it.
+        """
+        messages = self.messages.get_messages()
+        await self.add_context(messages)
+
+        context = messages[: len(messages) - len(self.messages)]
+        context_tokens = sum(
+            (
+                self.context_tokens
+                if message is self.context_message
+                else estimate_message_tokens(message)
+            )
+            for message in context
+        )
+        tools_tokens = (
+            self.tools_tokens if tools is self.tools else estimate_tools_tokens(tools)
+        )
+        budget = self.config.features.max_context_tokens
+
+        if budget and context_tokens + tools_tokens + self.messages.token_count > budget:
+            deleted, dropped_tool_calls = self.messages.trim_to_budget(
+                budget - context_tokens - tools_tokens
+            )
+            if deleted:
+                messages = context + self.messages.get_messages()
+
+            # dropping history changes what the LLM knows, so this is always logged
+            for tool_call_id in dropped_tool_calls:
+                printr.print(
+                    f"Removing pending tool call {tool_call_id} due to the token budget.",
+                    color=LogType.WARNING,
+                    server_only=True,
+                )
+            printr.print(
+                f"Deleted {deleted} messages from the conversation history of {self.name} to meet the token budget of {budget}.",
+                color=LogType.WARNING,
+                server_only=True,
+            )
+
+        total_tokens = context_tokens + tools_tokens + self.messages.token_count
+        printr.print(
+            f"{self.name} is calling the LLM with {len(self.messages)} messages (excluding context) and {len(tools) if tools else 0} tools, "
+            f"~{total_tokens} tokens (context: {context_tokens}, tools: {tools_tokens}, history: {self.messages.token_count})"
+            + (f" of {budget} budget." if budget else "."),
+            color=LogType.INFO,
+            server_only=True,
+        )
+
+        return messages
+
+    async def _collect_streamed_completion(
+        self, stream, thiscall: float, no_interrupt: bool = False
+    ) -> ChatCompletion | None:
+        """Consumes a completion stream, speaks every complete sentence while the rest is still generated and assembles the final completion.
+
+        Args:
+            stream: The chunk stream returned by the LLM call.
+            thiscall (float): The timestamp of the LLM call. The stream is abandoned if a newer call was made.
+            no_interrupt (bool): Whether the first sentence should wait for the current playback to finish.
+
+        Returns:
+            The assembled completion object or None if the call was superseded or the stream failed.
+        """
+        splitter = SentenceSplitter()
+        sentences: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def speak_sentence(
+            sentence: str, previous: Optional[asyncio.Task], wait_for_playback: bool
+        ):
+            # following sentences must never cut off the previous ones, but only their playback has to wait
+            previous_playback.set(previous)
+            await self.play_to_user(sentence, wait_for_playback)
+
+        async def speak_sentences():
+            # sentence N+1 is synthesized while sentence N is still playing
+            speaking: list[asyncio.Task] = []
+            try:
+                while (sentence := await sentences.get()) is not None:
+                    previous = speaking[-1] if speaking else None
+                    speaking.append(
+                        asyncio.create_task(
+                            speak_sentence(
+                                sentence, previous, no_interrupt and previous is None
+                            )
+                        )
+                    )
+                    # synthesize at most one sentence ahead
+                    if previous:
+                        await previous
+                if speaking:
+                    await speaking[-1]
+            finally:
+                for task in speaking:
+                    task.cancel()
+
+        speaker = asyncio.create_task(speak_sentences())
+
+        content = ""
+        model = ""
+        tool_calls: dict[int, dict] = {}
+        cancelled = False
+        try:
+            async for chunk in stream:
+                if self.last_gpt_call != thiscall:
+                    cancelled = True
+                    break
+                model = chunk.model or model
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    content += delta.content
+                    for sentence in splitter.feed(delta.content):
+                        sentences.put_nowait(sentence)
+
+                # tool calls arrive in fragments that are identified by their index
+                for tool_call_delta in delta.tool_calls or []:
+                    tool_call = tool_calls.setdefault(
+                        tool_call_delta.index, {"id": "", "name": "", "arguments": ""}
+                    )
+                    if tool_call_delta.id:
+                        tool_call["id"] = tool_call_delta.id
+                    if tool_call_delta.function:
+                        if tool_call_delta.function.name:
+                            tool_call["name"] += tool_call_delta.function.name
+                        if tool_call_delta.function.arguments:
+                            tool_call["arguments"] += tool_call_delta.function.arguments
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except (APIStatusError, APIConnectionError, httpx.HTTPError) as e:
+            # the provider failed mid-stream, so don't speak the partial answer
+            cancelled = True
+            self.__handle_stream_error(e)
+        finally:
+            if cancelled:
+                speaker.cancel()
+                # closes the connection, so the provider stops generating
+                await stream.close()
+            else:
+                rest = splitter.flush()
+                if rest:
+                    sentences.put_nowait(rest)
+                sentences.put_nowait(None)
+                await speaker
+
+        if cancelled:
+            return None
+
+        message = ChatCompletionMessage(
+            role="assistant",
+            content=content,
+            tool_calls=(
+                [
+                    ChatCompletionMessageToolCall(
+                        id=tool_call["id"],
+                        type="function",
+                        function=Function(
+                            name=tool_call["name"], arguments=tool_call["arguments"]
+                        ),
+                    )
+                    for _, tool_call in sorted(tool_calls.items())
+                ]
+                if tool_calls
+                else None
+            ),
+        )
+        return ChatCompletion(
+            id=str(thiscall),
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason="tool_calls" if tool_calls else "stop",
+                    message=message,
+                )
+            ],
+            created=int(thiscall),
+            model=model,
+            object="chat.completion",
+        )
+
+    def __handle_stream_error(self, error: Exception):
+        if isinstance(error, APIStatusError):
+            provider = {
+                ConversationProvider.AZURE: self.openai_azure,
+                ConversationProvider.OPENAI: self.openai,
+                ConversationProvider.MISTRAL: self.mistral,
+                ConversationProvider.GROQ: self.groq,
+                ConversationProvider.CEREBRAS: self.cerebras,
+                ConversationProvider.OPENROUTER: self.openrouter,
+                ConversationProvider.LOCAL_LLM: self.local_llm,
+                ConversationProvider.PERPLEXITY: self.perplexity,
+            }.get(self.config.features.conversation_provider)
+            if provider:
+                provider._handle_api_error(error)
+                return
+
+        printr.toast_error(
+            f"The connection to the LLM provider was interrupted: {str(error) or type(error).__name__}"
+        )
+
     async def _process_completion(self, completion: ChatCompletion):
         """Processes the completion returned by the LLM call.
 
@@ -1010,6 +1253,9 @@ class OpenAiWingman(Wingman):
     async def _handle_tool_calls(self, tool_calls):
         """Processes all the tool calls identified in the response message.
 
+        If concurrent tool calls are enabled, consecutive tool calls that are not exclusive run in parallel.
+        The responses are written back in the original order.
+
         Args:
             tool_calls: The list of tool calls to process.
 
@@ -1017,25 +1263,26 @@ class OpenAiWingman(Wingman):
             str: The immediate response from processed tool calls or None if there are no immediate responses.
         """
         instant_response = None
-        function_response = ""
+        skill = None
+        results = []
 
-        for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            function_args = (
-                tool_call.function.arguments
-                # Mistral returns a dict
-                if isinstance(tool_call.function.arguments, dict)
-                # OpenAI returns a string
-                else json.loads(tool_call.function.arguments)
-            )
-            (
-                function_response,
-                instant_response,
-                skill,
-            ) = await self.execute_command_by_function_call(
-                function_name, function_args
-            )
+        if self.config.features.concurrent_tool_calls and len(tool_calls) > 1:
+            batch = []
+            for tool_call in tool_calls:
+                if await self._is_tool_exclusive(tool_call.function.name):
+                    results.extend(await self._execute_tool_calls_concurrently(batch))
+                    batch = []
+                    results.append(await self._execute_tool_call(tool_call))
+                else:
+                    batch.append(tool_call)
+            results.extend(await self._execute_tool_calls_concurrently(batch))
+        else:
+            for tool_call in tool_calls:
+                results.append(await self._execute_tool_call(tool_call))
 
+        for tool_call, (function_response, instant_response, skill) in zip(
+            tool_calls, results
+        ):
             if tool_call.id:
                 # updating the dummy tool response with the actual response
                 await self._update_tool_response(tool_call.id, function_response)
@@ -1045,6 +1292,70 @@ class OpenAiWingman(Wingman):
 
         return instant_response, skill
 
+    async def _execute_tool_calls_concurrently(
+        self, tool_calls: list
+    ) -> list[tuple[str, str, Skill | None]]:
+        if len(tool_calls) <= 1:
+            return [await self._execute_tool_call(tool_call) for tool_call in tool_calls]
+
+        if self.settings.debug_mode:
+            await printr.print_async(
+                f"Executing {len(tool_calls)} tool calls concurrently.",
+                color=LogType.INFO,
+            )
+
+        results = await asyncio.gather(
+            *(self._execute_tool_call(tool_call) for tool_call in tool_calls),
+            return_exceptions=True,
+        )
+        # the other tool calls are done, so a failure can be raised just like in sequential mode
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _execute_tool_call(self, tool_call) -> tuple[str, str, Skill | None]:
+        """Executes a single tool call and cancels it if it exceeds its timeout."""
+        function_name = tool_call.function.name
+        function_args = (
+            tool_call.function.arguments
+            # Mistral returns a dict
+            if isinstance(tool_call.function.arguments, dict)
+            # OpenAI returns a string
+            else json.loads(tool_call.function.arguments)
+        )
+
+        execution = self.execute_command_by_function_call(function_name, function_args)
+        if function_name == "execute_command":
+            # a superseded turn must not leave keys pressed, so commands always run to completion
+            return await asyncio.shield(execution)
+
+        timeout = await self._get_tool_timeout(function_name)
+        try:
+            return await asyncio.wait_for(execution, timeout)
+        except TimeoutError:
+            await printr.print_async(
+                f"Tool call '{function_name}' was cancelled after {timeout} seconds.",
+                color=LogType.WARNING,
+            )
+            return (
+                f"The tool call timed out after {timeout} seconds.",
+                None,
+                self.tool_skills.get(function_name),
+            )
+
+    async def _is_tool_exclusive(self, function_name: str) -> bool:
+        # commands send inputs, so their order matters
+        if function_name == "execute_command":
+            return True
+        skill = self.tool_skills.get(function_name)
+        return skill is None or await skill.is_tool_exclusive(function_name)
+
+    async def _get_tool_timeout(self, function_name: str) -> float | None:
+        skill = self.tool_skills.get(function_name)
+        timeout = await skill.get_tool_timeout(function_name) if skill else None
+        return timeout or self.config.features.tool_call_timeout or None
+
     async def execute_command_by_function_call(
         self, function_name: str, function_args: dict[str, any]
     ) -> tuple[str, str, Skill | None]:
@@ -1071,7 +1382,7 @@ class OpenAiWingman(Wingman):
             # if the command has responses, we have to play one of them
             if command and command.responses:
                 instant_response = self._select_command_response(command)
-                await self.play_to_user(instant_response)
+                await self.play_to_user(instant_response, cache=True)
 
         # Go through the skills and check if the function name matches any of the tools
         if function_name in self.tool_skills:
@@ -1095,12 +1406,14 @@ class OpenAiWingman(Wingman):
         text: str,
         no_interrupt: bool = False,
         sound_config: Optional[SoundConfig] = None,
+        cache: bool = False,
     ):
         """Plays audio to the user using the configured TTS Provider (default: OpenAI TTS).
         Also adds sound effects if enabled in the configuration.
 
         Args:
             text (str): The text to play as audio.
+            cache (bool): Whether the text is a reusable phrase, e.g. a command response or filler, whose audio should be kept in the TTS cache.
         """
         if sound_config:
             printr.print(
@@ -1125,6 +1438,60 @@ class OpenAiWingman(Wingman):
             while self.audio_player.is_playing:
                 await asyncio.sleep(0.1)
 
+        cache_key = self._get_tts_cache_key(text) if cache else None
+        if cache_key and self.tts_cache.contains(cache_key):
+            cached_audio = await asyncio.to_thread(self.tts_cache.load, cache_key)
+            if cached_audio:
+                await self.audio_player.play_with_effects(
+                    input_data=cached_audio,
+                    config=sound_config,
+                    wingman_name=self.name,
+                )
+                return
+
+        # the audio player stores what the provider synthesizes under this key
+        cache_key_token = pending_cache_key.set(cache_key)
+        try:
+            await self._play_with_tts_provider(text, sound_config)
+        finally:
+            pending_cache_key.reset(cache_key_token)
+
+    def _get_tts_cache_key(self, text: str) -> Optional[str]:
+        """Returns the TTS cache key of the text for the current TTS provider and voice or None if it shouldn't be cached."""
+        if not self.config.features.use_tts_cache:
+            return None
+
+        provider = self.config.features.tts_provider
+        if provider == TtsProvider.EDGE_TTS:
+            voice_settings = self.config.edge_tts.model_dump()
+        elif provider == TtsProvider.ELEVENLABS:
+            voice_settings = self.config.elevenlabs.model_dump(
+                exclude={"output_streaming"}
+            )
+        elif provider == TtsProvider.AZURE:
+            voice_settings = self.config.azure.tts.model_dump(
+                exclude={"output_streaming"}
+            )
+        elif provider == TtsProvider.XVASYNTH:
+            voice_settings = self.config.xvasynth.model_dump()
+        elif provider == TtsProvider.OPENAI:
+            voice_settings = {"voice": self.config.openai.tts_voice}
+        elif provider == TtsProvider.WINGMAN_PRO:
+            voice_settings = {
+                "provider": self.config.wingman_pro.tts_provider,
+                "voice": (
+                    self.config.openai.tts_voice
+                    if self.config.wingman_pro.tts_provider
+                    == WingmanProTtsProvider.OPENAI
+                    else self.config.azure.tts.voice
+                ),
+            }
+        else:
+            return None
+
+        return self.tts_cache.get_key(provider.value, voice_settings, text)
+
+    async def _play_with_tts_provider(self, text: str, sound_config: SoundConfig):
         if self.config.features.tts_provider == TtsProvider.EDGE_TTS:
             await self.edge_tts.play_audio(
                 text=text,
@@ -1199,10 +1566,14 @@ class OpenAiWingman(Wingman):
     def build_tools(self) -> list[dict]:
         """
         Builds a tool for each command that is not instant_activation.
+        The tools are cached until invalidate_tools() is called, so don't modify the returned list.
 
         Returns:
             list[dict]: A list of tool descriptors in OpenAI format.
         """
+        if self.tools is not None:
+            return self.tools
+
         commands = [
             command.name
             for command in self.config.commands
@@ -1233,15 +1604,10 @@ class OpenAiWingman(Wingman):
         for tool in self.skill_tools:
             tools.append(tool)
 
+        self.tools_tokens = estimate_tools_tokens(tools)
+        self.tools = tools
         return tools
 
-    def __get_message_role(self, message):
-        """Helper method to get the role of the message regardless of its type."""
-        if isinstance(message, Mapping):
-            return message.get("role")
-        elif hasattr(message, "role"):
-            return message.role
-        else:
-            raise TypeError(
-                f"Message is neither a mapping nor has a 'role' attribute: {message}"
-            )
+    def invalidate_tools(self):
+        """Call this if the commands or skill tools changed."""
+        self.tools = None
@@ -1,15 +1,16 @@
 from copy import deepcopy
 import random
 import time
-import difflib
 import asyncio
-import threading
+from concurrent.futures import Future
+from functools import partial
 from typing import Optional
 import keyboard.keyboard as keyboard
 import mouse.mouse as mouse
 from api.interface import (
     CommandConfig,
     SettingsConfig,
+    SkillConfig,
     SoundConfig,
     WingmanConfig,
     WingmanInitializationError,
@@ -19,8 +20,14 @@ from providers.whispercpp import Whispercpp
 from providers.xvasynth import XVASynth
 from services.audio_player import AudioPlayer
 from services.module_manager import ModuleManager
+from services.runtime import Runtime
+from services.wingman_inbox import WingmanInbox
 from services.secret_keeper import SecretKeeper
+from services.settings_delta import SettingsDelta
+from services.startup_scheduler import StartupScheduler
+from services.phrase_index import PhraseIndex
 from services.printr import Printr
+from services.recorded_audio import RecordedAudio
 from services.audio_library import AudioLibrary
 
 from skills.skill_base import Skill
@@ -81,6 +88,15 @@ class Wingman:
 
         self.skills: list[Skill] = []
 
+        self.current_turn: Optional[asyncio.Task] = None
+        """The task that processes the latest user input. It's cancelled as soon as a newer input arrives."""
+        self.turn_jobs: set[Future] = set()
+        """Background jobs (e.g. queued TTS) that belong to the current turn."""
+        self.inbox = WingmanInbox(self)
+        """Serializes the user inputs. Use submit() to process an input."""
+
+        self._index_commands()
+
     def get_record_key(self) -> str | int:
         """Returns the activation or "push-to-talk" key for this Wingman."""
         return self.config.record_key_codes or self.config.record_key
@@ -149,16 +165,25 @@ class Wingman:
     async def unload(self):
         """This method is called when the Wingman is unloaded by Tower. You can override it if you need to clean up resources."""
         await self.unload_skills()
+        # stop background jobs of this Wingman and its skills
+        Runtime().cancel_group(self.name)
 
     async def unload_skills(self):
         """Call this to trigger unload for all skills."""
         for skill in self.skills:
             await skill.unload()
 
-    async def init_skills(self) -> list[WingmanInitializationError]:
+    async def init_skills(
+        self, scheduler: Optional[StartupScheduler] = None
+    ) -> list[WingmanInitializationError]:
         """This method is called when the Wingman is instantiated by Tower or when a skill's config changes.
         It is run AFTER validate() so you can access validated params safely here.
-        It is used to load and init the skills of the Wingman."""
+        It is used to load and init the skills of the Wingman.
+
+        The skills are validated and prepared concurrently, each with the timeout of Skill.get_startup_timeout().
+        Skills that fail or time out in either step are unloaded and reported in the returned errors.
+        Pass the scheduler of the Tower to include them in its startup report.
+        """
         if self.skills:
             await self.unload_skills()
 
@@ -167,54 +192,118 @@ class Wingman:
         if not self.config.skills:
             return errors
 
-        for skill_config in self.config.skills:
-            try:
-                skill = ModuleManager.load_skill(
-                    config=skill_config,
-                    settings=self.settings,
-                    wingman=self,
-                )
-                if skill:
-                    # init skill methods
-                    skill.threaded_execution = self.threaded_execution
-
-                    validation_errors = await skill.validate()
+        scheduler = scheduler or StartupScheduler()
+        step_names = [
+            f"{self.name}: {skill_config.name}" for skill_config in self.config.skills
+        ]
+        results = await asyncio.gather(
+            *[
+                scheduler.add(step_name, partial(self.__load_skill, skill_config))
+                for step_name, skill_config in zip(step_names, self.config.skills)
+            ],
+            return_exceptions=True,
+        )
 
-                    # Give the user 2*5 seconds to enter the secret if one is required and missing
-                    if any(
-                        error.error_type == "missing_secret"
-                        for error in validation_errors
-                    ):
-                        for _attempt in range(2):
-                            await asyncio.sleep(5)
-                            validation_errors = await skill.validate()
-                            if not validation_errors:
-                                break
-
-                    errors.extend(validation_errors)
-
-                    if len(errors) == 0:
-                        self.skills.append(skill)
-                        await self.prepare_skill(skill)
-                        await skill.prepare()
-                        printr.print(
-                            f"Skill '{skill_config.name}' loaded successfully.",
-                            color=LogType.INFO,
-                            server_only=True,
-                        )
-                    else:
-                        await printr.print_async(
-                            f"Skill '{skill_config.name}' could not be loaded: {' '.join(error.message for error in validation_errors)}",
-                            color=LogType.ERROR,
-                        )
-            except Exception as e:
+        preparations = []
+        for step_name, skill_config, result in zip(
+            step_names, self.config.skills, results
+        ):
+            if isinstance(result, BaseException):
                 await printr.print_async(
-                    f"Could not load skill '{skill_config.name}': {str(e)}",
+                    f"Could not load skill '{skill_config.name}': {str(result)}",
                     color=LogType.ERROR,
                 )
+                continue
+
+            skill, validation_errors = result
+            if not skill:
+                continue
+            if validation_errors:
+                errors.extend(validation_errors)
+                await skill.unload()
+                await printr.print_async(
+                    f"Skill '{skill_config.name}' could not be loaded: {' '.join(error.message for error in validation_errors)}",
+                    color=LogType.ERROR,
+                )
+                continue
+
+            preparations.append(
+                (
+                    skill_config,
+                    skill,
+                    scheduler.add(
+                        f"{step_name} (prepare)",
+                        skill.prepare,
+                        dependencies=[step_name],
+                        timeout=await skill.get_startup_timeout(),
+                    ),
+                )
+            )
+
+        for skill_config, skill, preparation in preparations:
+            try:
+                await preparation
+            except Exception as e:
+                # a skill that couldn't be prepared is dropped like one that failed validation
+                message = f"Skill '{skill_config.name}' could not be prepared: {str(e) or type(e).__name__}"
+                errors.append(
+                    WingmanInitializationError(
+                        wingman_name=self.name,
+                        message=message,
+                        error_type=WingmanInitializationErrorType.UNKNOWN,
+                    )
+                )
+                await skill.unload()
+                await printr.print_async(message, color=LogType.ERROR)
+                continue
+
+            # registered in the order of the config, so the tools and prompts don't depend on timing
+            self.skills.append(skill)
+            await self.prepare_skill(skill)
+            printr.print(
+                f"Skill '{skill_config.name}' loaded successfully.",
+                color=LogType.INFO,
+                server_only=True,
+            )
 
         return errors
 
+    async def __load_skill(
+        self, skill_config: SkillConfig
+    ) -> tuple[Optional[Skill], list[WingmanInitializationError]]:
+        skill = ModuleManager.load_skill(
+            config=skill_config,
+            settings=self.settings,
+            wingman=self,
+        )
+        if not skill:
+            return None, []
+
+        # init skill methods
+        skill.threaded_execution = self.threaded_execution
+
+        try:
+            validation_errors = await asyncio.wait_for(
+                self.__validate_skill(skill),
+                timeout=await skill.get_startup_timeout(),
+            )
+        except BaseException:
+            await skill.unload()
+            raise
+        return skill, validation_errors
+
+    async def __validate_skill(self, skill: Skill) -> list[WingmanInitializationError]:
+        validation_errors = await skill.validate()
+
+        # Give the user 2*5 seconds to enter the secret if one is required and missing
+        if any(error.error_type == "missing_secret" for error in validation_errors):
+            for _attempt in range(2):
+                await asyncio.sleep(5)
+                validation_errors = await skill.validate()
+                if not validation_errors:
+                    break
+        return validation_errors
+
     async def prepare_skill(self, skill: Skill):
         """This method is called only once when the Skill is instantiated.
         It is run AFTER validate() so you can access validated params safely here.
@@ -228,7 +317,7 @@ class Wingman:
 
     # ──────────────────────────── The main processing loop ──────────────────────────── #
 
-    async def process(self, audio_input_wav: str = None, transcript: str = None):
+    async def process(self, recording: RecordedAudio = None, transcript: str = None):
         """The main method that gets called when the wingman is activated. This method controls what your wingman actually does and you can override it if you want to.
 
         The base implementation here triggers the transcription and processing of the given audio input.
@@ -237,7 +326,8 @@ class Wingman:
         Async so you can do async processing, e.g. send a request to an API.
 
         Args:
-            audio_input_wav (str): The path to the audio file that contains the user's speech. This is a recording of what you you said.
+            recording (RecordedAudio): The user's speech, kept in memory. This is a recording of what you you said.
+            transcript (str): The text to process if the speech was already transcribed. Skips the transcription.
 
         Hooks:
             - async _transcribe: transcribe the audio to text
@@ -245,6 +335,8 @@ class Wingman:
             - async play_to_user: do something with the response, e.g. play it as audio
         """
 
+        self.current_turn = asyncio.current_task()
+
         self.start_execution_benchmark()
 
         process_result = None
@@ -254,7 +346,7 @@ class Wingman:
 
         if not transcript:
             # transcribe the audio.
-            transcript = await self._transcribe(audio_input_wav)
+            transcript = await self._transcribe(recording)
 
         if self.settings.debug_mode and not transcript:
             await self.print_execution_time(reset_timer=True)
@@ -296,11 +388,11 @@ class Wingman:
 
     # ───────────────── virtual methods / hooks ───────────────── #
 
-    async def _transcribe(self, audio_input_wav: str) -> str | None:
+    async def _transcribe(self, recording: RecordedAudio) -> str | None:
         """Transcribes the audio to text. You can override this method if you want to use a different transcription service.
 
         Args:
-            audio_input_wav (str): The path to the audio file that contains the user's speech. This is a recording of what you you said.
+            recording (RecordedAudio): The user's speech. This is a recording of what you you said.
 
         Returns:
             str | None: The transcript of the audio file and the detected language as locale (if determined).
@@ -327,6 +419,7 @@ class Wingman:
         text: str,
         no_interrupt: bool = False,
         sound_config: Optional[SoundConfig] = None,
+        cache: bool = False,
     ):
         """You'll probably want to play the response to the user as audio using a TTS provider or mechanism of your choice.
 
@@ -334,6 +427,7 @@ class Wingman:
             text (str): The response of your _get_response_for_transcript. This is usually the "response" from conversation with the AI.
             no_interrupt (bool): prevent interrupting the audio playback
             sound_config (SoundConfig): An optional sound configuration to use for the playback. If unset, the Wingman's sound config is used.
+            cache (bool): Whether the text is a reusable phrase (e.g. a command response) that may be cached. Unique responses of the LLM shouldn't be.
         """
         pass
 
@@ -348,14 +442,20 @@ class Wingman:
         Returns:
             {}: The command object from the config
         """
-        if self.config.commands is None:
-            return None
+        return self.commands_by_name.get(command_name)
 
-        command = next(
-            (item for item in self.config.commands if item.name == command_name),
-            None,
-        )
-        return command
+    def _index_commands(self):
+        """Builds the lookups for commands and their instant activation phrases. Called whenever the commands change."""
+        self.commands_by_name: dict[str, CommandConfig] = {}
+        self.instant_activation_index: PhraseIndex[CommandConfig] = PhraseIndex()
+        # a snapshot, so that changes to the commands are detected even if the list was edited in place
+        self.indexed_commands = deepcopy(self.config.commands)
+
+        for command in self.config.commands or []:
+            # the first command with a name wins, just like in the config
+            self.commands_by_name.setdefault(command.name, command)
+            for phrase in command.instant_activation or []:
+                self.instant_activation_index.add(phrase, command)
 
     def _select_command_response(self, command: CommandConfig) -> str | None:
         """Returns one of the configured responses of the command. This base implementation returns a random one.
@@ -384,27 +484,14 @@ class Wingman:
             {} | None: The executed instant_activation command.
         """
 
-        # create list with phrases pointing to commands
-        commands_by_instant_activation = {}
-        for command in self.config.commands:
-            if command.instant_activation:
-                for phrase in command.instant_activation:
-                    if phrase.lower() in commands_by_instant_activation:
-                        commands_by_instant_activation[phrase.lower()].append(command)
-                    else:
-                        commands_by_instant_activation[phrase.lower()] = [command]
-
-        # find best matching phrase
-        phrase = difflib.get_close_matches(
-            transcript.lower(), commands_by_instant_activation.keys(), n=1, cutoff=0.8
-        )
+        # find the commands of the best matching phrase
+        commands = self.instant_activation_index.find(transcript, cutoff=0.8)
 
         # if no phrase found, return None
-        if not phrase:
+        if not commands:
             return None
 
         # execute all commands for the phrase
-        commands = commands_by_instant_activation[phrase[0]]
         for command in commands:
             await self._execute_command(command)
 
@@ -466,7 +553,7 @@ class Wingman:
                             action.keyboard.hotkey_codes[0],
                             0 + (1 if action.keyboard.hotkey_extended else 0),
                         )
-                        time.sleep(hold)
+                        await asyncio.sleep(hold)
                         keyboard.direct_event(
                             action.keyboard.hotkey_codes[0],
                             2 + (1 if action.keyboard.hotkey_extended else 0),
@@ -475,7 +562,7 @@ class Wingman:
                         keyboard.press(
                             action.keyboard.hotkey_codes or action.keyboard.hotkey
                         )
-                        time.sleep(hold)
+                        await asyncio.sleep(hold)
                         keyboard.release(
                             action.keyboard.hotkey_codes or action.keyboard.hotkey
                         )
@@ -504,7 +591,10 @@ class Wingman:
 
                 if action.mouse.move:
                     x, y = action.mouse.move
-                    mouse.move(x, y, absolute=False, duration=0.5)
+                    # moves smoothly for half a second, so keep it off the event loop
+                    await asyncio.to_thread(
+                        mouse.move, x, y, absolute=False, duration=0.5
+                    )
 
                 if action.mouse.scroll:
                     mouse.wheel(action.mouse.scroll)
@@ -512,37 +602,63 @@ class Wingman:
                 if action.mouse.button:
                     if action.mouse.hold:
                         mouse.press(button=action.mouse.button)
-                        time.sleep(action.mouse.hold)
+                        await asyncio.sleep(action.mouse.hold)
                         mouse.release(button=action.mouse.button)
                     else:
                         mouse.click(button=action.mouse.button)
 
             if action.write:
-                keyboard.write(action.write)
+                await asyncio.to_thread(keyboard.write, action.write)
 
             if action.wait:
-                time.sleep(action.wait)
+                await asyncio.sleep(action.wait)
 
             if action.audio:
                 await self.audio_library.start_playback(
                     action.audio, self.config.sound.volume
                 )
 
-    def threaded_execution(self, function, *args) -> threading.Thread:
-        """Execute a function in a separate thread."""
+    def threaded_execution(self, function, *args) -> Future | None:
+        """Execute a function in the background without waiting for it.
 
-        def start_thread(function, *args):
-            if asyncio.iscoroutinefunction(function):
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-                new_loop.run_until_complete(function(*args))
-                new_loop.close()
-            else:
-                function(*args)
+        Coroutine functions run on the main event loop, blocking functions on the shared worker pool.
+        All jobs belong to this Wingman's task group and are cancelled when the Wingman is unloaded.
+        """
+        return Runtime().run(function, *args, group=self.name)
+
+    def submit(
+        self, recording: RecordedAudio = None, transcript: str = None
+    ) -> Future | None:
+        """Hands a user input to the Wingman. Safe to call from any thread.
+
+        Inputs are processed one after another by process(), according to the request_policy of the Wingman.
+        """
+        return self.inbox.submit(recording=recording, transcript=transcript)
+
+    def turn_execution(self, function, *args) -> Future | None:
+        """Like threaded_execution, but the job is cancelled together with the current turn, e.g. for TTS of the response."""
+        future = self.threaded_execution(function, *args)
+        if future:
+            self.turn_jobs.add(future)
+            future.add_done_callback(self.turn_jobs.discard)
+        return future
+
+    def cancel_turn(self):
+        """Aborts the turn in progress: its LLM request, tool calls and queued TTS."""
+        current_task = asyncio.current_task()
+        turn = self.current_turn
+        self.current_turn = None
+        if turn and turn is not current_task and not turn.done():
+            turn.cancel()
+            if self.settings.debug_mode:
+                printr.print(
+                    "Cancelled the previous turn due to a new input.",
+                    color=LogType.WARNING,
+                    server_only=True,
+                )
 
-        thread = threading.Thread(target=start_thread, args=(function, *args))
-        thread.start()
-        return thread
+        for job in list(self.turn_jobs):
+            job.cancel()
 
     async def update_config(
         self, config: WingmanConfig, validate=False, update_skills=False
@@ -552,6 +668,8 @@ class Wingman:
             old_config = deepcopy(self.config)
 
         self.config = config
+        if config.commands != self.indexed_commands:
+            self._index_commands()
 
         if update_skills:
             await self.init_skills()
@@ -562,13 +680,31 @@ class Wingman:
             for error in errors:
                 if error.error_type != WingmanInitializationErrorType.MISSING_SECRET:
                     self.config = old_config
+                    self._index_commands()
                     return False
 
         return True
 
-    async def update_settings(self, settings: SettingsConfig):
-        """Update the settings of the Wingman. This method should always be called when the user Settings have changed."""
+    async def update_settings(
+        self, settings: SettingsConfig, delta: Optional[SettingsDelta] = None
+    ):
+        """Update the settings of the Wingman. This method should always be called when the user Settings have changed.
+
+        Args:
+            settings (SettingsConfig): The new settings.
+            delta (SettingsDelta): What changed. Skills are only reloaded if one of them needs it. Without a delta, all skills are reloaded.
+        """
         self.settings = settings
-        await self.init_skills()
+
+        if delta is None:
+            await self.init_skills()
+        else:
+            reload_skills = False
+            for skill in self.skills:
+                # every skill has to get the new settings, so don't stop at the first one that needs a reload
+                if await skill.update_settings(settings, delta):
+                    reload_skills = True
+            if reload_skills:
+                await self.init_skills()
 
         printr.print(f"Wingman {self.name}'s settings changed", server_only=True)